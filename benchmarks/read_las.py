@@ -0,0 +1,75 @@
+"""Compare the speed of the fast `.las` reader with `lasio` on a synthetic
+file.
+
+Usage: python benchmarks/read_las.py [--rows 200000] [--curves 20] [--repeats 3]
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+from timeit import repeat
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from petroflow.src.las_io import read_las  # pylint: disable=wrong-import-position
+from petroflow.src.well_segment import WellSegment  # pylint: disable=wrong-import-position
+
+
+def write_las(path, n_rows, n_curves, seed=42):
+    """Write a LAS 2.0 file with `n_rows` depth steps of `n_curves` random
+    curves, 1% of whose values are `NULL`."""
+    rng = np.random.default_rng(seed)
+    depth = np.round(1000 + 0.1 * np.arange(n_rows), 1)
+    curves = np.round(rng.normal(size=(n_rows, n_curves)) * 100, 4)
+    curves[rng.random(curves.shape) < 0.01] = -999.25
+    with open(path, "w") as las_file:
+        las_file.write("~VERSION INFORMATION\n")
+        las_file.write(" VERS.   2.0 : CWLS LOG ASCII STANDARD - VERSION 2.0\n")
+        las_file.write(" WRAP.   NO : ONE LINE PER DEPTH STEP\n")
+        las_file.write("~WELL INFORMATION\n")
+        las_file.write(" STRT.M   {} : START DEPTH\n".format(depth[0]))
+        las_file.write(" STOP.M   {} : STOP DEPTH\n".format(depth[-1]))
+        las_file.write(" STEP.M   0.1 : STEP\n")
+        las_file.write(" NULL.   -999.25 : NULL VALUE\n")
+        las_file.write("~CURVE INFORMATION\n")
+        las_file.write(" DEPT.M : DEPTH\n")
+        for i in range(n_curves):
+            las_file.write(" CURVE{0}.UNIT : CURVE {0}\n".format(i))
+        las_file.write("~ASCII\n")
+        np.savetxt(las_file, np.column_stack([depth, curves]), fmt="%.4f")
+
+
+def main():
+    """Run the benchmark and check, that both readers return identical
+    frames."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000, help="the number of depth steps")
+    parser.add_argument("--curves", type=int, default=20, help="the number of curves except depth")
+    parser.add_argument("--repeats", type=int, default=3, help="the number of timing runs of each reader")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "logs.las")
+        write_las(path, args.rows, args.curves)
+        size = os.path.getsize(path) / 2**20
+
+        def read_lasio():
+            # Any loader argument makes the segment read the file with lasio
+            return WellSegment._load_las(path, null_policy="strict")  # pylint: disable=protected-access
+
+        pd.testing.assert_frame_equal(read_las(path), read_lasio())
+        fast_time = min(repeat(lambda: read_las(path), number=1, repeat=args.repeats))
+        lasio_time = min(repeat(read_lasio, number=1, repeat=args.repeats))
+
+    print("File: {} rows, {} curves, {:.1f} MiB".format(args.rows, args.curves, size))
+    print("read_las: {:.3f} s".format(fast_time))
+    print("lasio:    {:.3f} s".format(lasio_time))
+    print("Speedup:  {:.1f}x".format(lasio_time / fast_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,5 +3,8 @@
 from .well import Well
 from .well_batch import WellBatch
 from .well_dataset import WellDataset
+from .catalog import WellCatalog
+from .well_cache import WellCache
+from .shared_cache import cleanup_shared_memory
 from .named_expr import WS
 from .core_images import CoreBatch, CoreIndex
@@ -15,6 +15,10 @@ class AbstractWellSegment(metaclass=ABCMeta):
     def load_core(self):
         pass
 
+    @abstractmethod
+    def build_core_cache(self):
+        pass
+
     @abstractmethod
     def dump(self):
         pass
@@ -27,6 +31,10 @@ class AbstractWellSegment(metaclass=ABCMeta):
     def deepcopy(self):
         pass
 
+    @abstractmethod
+    def refresh_files_index(self):
+        pass
+
     @abstractmethod
     def validate_core(self):
         pass
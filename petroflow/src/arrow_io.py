@@ -0,0 +1,185 @@
+"""Implements reading and writing of `DataFrame`s in Arrow IPC format with
+memory mapping. `pyarrow` is imported on first use, since its import takes
+a noticeable time."""
+
+import json
+
+import numpy as np
+
+
+# Schema metadata key to store depth ranges of file chunks in
+CHUNKS_KEY = b"petroflow_depth_chunks"
+
+# The number of rows in each chunk of a file
+CHUNK_SIZE = 2**14
+
+
+def _get_depth_columns(df):
+    """Get names of columns, defining the top and the bottom depths of each
+    row of a `DataFrame`, or `None` if it is not indexed by depth."""
+    if "DEPTH" in df:
+        return "DEPTH", "DEPTH"
+    if "DEPTH_FROM" in df and "DEPTH_TO" in df:
+        return "DEPTH_FROM", "DEPTH_TO"
+    return None
+
+
+def get_chunk_depth_ranges(df, chunk_size):
+    """Get depth ranges of consecutive chunks of `chunk_size` rows of a
+    `DataFrame` as a `dict` with `depth_from` and `depth_to` lists or `None`
+    if it is empty or not indexed by depth."""
+    depth_columns = _get_depth_columns(df)
+    if depth_columns is None or len(df) == 0:
+        return None
+    chunk_starts = np.arange(0, len(df), chunk_size)
+    top_column, bottom_column = depth_columns
+    return {
+        "depth_from": np.fmin.reduceat(df[top_column].values, chunk_starts).tolist(),
+        "depth_to": np.fmax.reduceat(df[bottom_column].values, chunk_starts).tolist(),
+    }
+
+
+def _write_table(sink, table):
+    """Write an Arrow table into an output stream in Arrow IPC file format as
+    a single record batch."""
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table.combine_chunks())
+
+
+def write_arrow(df, path, chunk_size=CHUNK_SIZE):
+    """Save a `DataFrame` with a default `RangeIndex` into an uncompressed
+    Arrow IPC file, which can be memory-mapped by `read_arrow`.
+
+    Unlike `pandas.DataFrame.to_feather`, `nan` values in float columns are
+    stored as is instead of being converted to nulls. Since Arrow arrays with
+    nulls can't be converted to `numpy` without a copy, this allows float
+    columns to be read without copying.
+
+    The table is always written as a single record batch, since columns of
+    several batches can't be read without concatenation. If the `DataFrame`
+    has either `DEPTH` or both `DEPTH_FROM` and `DEPTH_TO` columns, depth
+    ranges of its consecutive chunks of `chunk_size` rows are saved in the
+    file schema metadata. This allows `read_arrow` to read only rows of
+    chunks, overlapping with a given depth range.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        A `DataFrame` to save.
+    path : str or pyarrow.NativeFile
+        A path to a resulting file or an Arrow output stream to write to.
+    chunk_size : positive int, optional
+        The number of rows in each chunk of a depth-indexed `DataFrame`.
+        Defaults to `CHUNK_SIZE`.
+    """
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, column in enumerate(df.columns):
+        values = df[column].values
+        if values.dtype.kind == "f":
+            table = table.set_column(i, table.field(i), pa.array(values, from_pandas=False))
+
+    chunks = get_chunk_depth_ranges(df, chunk_size)
+    if chunks is not None:
+        chunks["chunk_size"] = chunk_size
+        metadata = dict(table.schema.metadata or {})
+        metadata[CHUNKS_KEY] = json.dumps(chunks).encode()
+        table = table.replace_schema_metadata(metadata)
+
+    if isinstance(path, str):
+        with pa.OSFile(path, "wb") as sink:
+            _write_table(sink, table)
+    else:
+        _write_table(path, table)
+
+
+def dump_arrow_buffer(df, chunk_size=CHUNK_SIZE):
+    """Save a `DataFrame` with a default `RangeIndex` into an in-memory Arrow
+    IPC file in the same way as `write_arrow` does and return its content as
+    a `uint8` array, which can be loaded by `read_arrow`. Since the table is
+    stored as a single record batch, its numeric columns without nulls are
+    loaded as views of the array."""
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    sink = pa.BufferOutputStream()
+    write_arrow(df, sink, chunk_size=chunk_size)
+    return np.frombuffer(sink.getvalue(), dtype=np.uint8)
+
+
+def get_arrow_columns(path):
+    """Get column names of an Arrow IPC or a feather file without reading its
+    data."""
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    from pyarrow import feather  # pylint: disable=import-outside-toplevel
+
+    try:
+        return pa.ipc.open_file(pa.memory_map(path, "r")).schema.names
+    except pa.ArrowInvalid:
+        # Feather V1 files don't follow Arrow IPC format
+        return feather.read_table(path).column_names
+
+
+def _read_depth_range(reader, depth_range):
+    """Read only rows of chunks, overlapping with a `depth_range`, if their
+    depth ranges are saved in the file. Otherwise, read the whole file.
+
+    Rows are selected by slicing the table, so they are not copied. Files,
+    written with a record batch per chunk, are read by batches."""
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    metadata = reader.schema.metadata or {}
+    if depth_range is None or CHUNKS_KEY not in metadata:
+        return reader.read_all()
+    chunks = json.loads(metadata[CHUNKS_KEY].decode())
+    depth_from, depth_to = depth_range
+    mask = (np.array(chunks["depth_from"]) <= depth_to) & (np.array(chunks["depth_to"]) >= depth_from)
+    chunk_indices = np.where(mask)[0]
+    if "chunk_size" not in chunks:
+        batches = [reader.get_batch(i) for i in chunk_indices]
+        return pa.Table.from_batches(batches, schema=reader.schema)
+    table = reader.read_all()
+    if len(chunk_indices) == 0:
+        return table.slice(0, 0)
+    chunk_size = chunks["chunk_size"]
+    start = chunk_indices[0] * chunk_size
+    stop = (chunk_indices[-1] + 1) * chunk_size
+    return table.slice(start, stop - start)
+
+
+def read_arrow(path, columns=None, depth_range=None):
+    """Load a `DataFrame` from an Arrow IPC file through a memory map or from
+    an Arrow IPC file, already placed in memory.
+
+    Numeric columns without nulls are not copied into process memory: they
+    are backed by the page cache, so several processes reading the same file
+    share the same physical pages. Such columns are read-only.
+
+    Parameters
+    ----------
+    path : str or buffer-like
+        A path to an Arrow IPC file or an object, supporting the buffer
+        protocol, with its content (e.g. an array, returned by
+        `dump_arrow_buffer`). Columns of a `DataFrame`, loaded from a buffer,
+        are backed by the buffer memory in the same way as they are backed by
+        the memory map.
+    columns : list of str or None, optional
+        Columns to load. Columns, missing in the file, are ignored. Other
+        columns are never converted to `pandas`. If `None`, all columns are
+        loaded. Defaults to `None`.
+    depth_range : tuple of two int or None, optional
+        If given and the file was written by `write_arrow` from a
+        depth-indexed `DataFrame`, only rows of chunks, overlapping with the
+        closed interval `depth_range`, are read. The result still has to be
+        filtered by depth since chunk boundaries don't match the range
+        boundaries. If `None`, the whole file is read. Defaults to `None`.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        Loaded `DataFrame` with each column stored in a separate block.
+    """
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    source = pa.memory_map(path, "r") if isinstance(path, str) else pa.BufferReader(pa.py_buffer(path))
+    table = _read_depth_range(pa.ipc.open_file(source), depth_range)
+    if columns is not None:
+        table = table.select([col for col in columns if col in table.column_names])
+    return table.to_pandas(split_blocks=True)
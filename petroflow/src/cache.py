@@ -0,0 +1,220 @@
+"""Implements a persistent cache of parsed well files."""
+
+import os
+import json
+import hashlib
+import warnings
+
+import numpy as np
+
+from .arrow_io import read_arrow, write_arrow
+from .utils import dump_atomic
+
+
+CACHE_DIR_NAME = ".cache"
+
+
+def get_cache_dir(well_path, cache):
+    """Get a directory to store cache files of a well in.
+
+    Parameters
+    ----------
+    well_path : str
+        A path to a well directory.
+    cache : bool or str
+        If `True`, cache files are stored in a `.cache` subdirectory of the
+        well directory. If `str`, a path to a directory to store cache files
+        of all wells in. Each well gets its own subdirectory there, named
+        after a hash of the absolute path to the well.
+
+    Returns
+    -------
+    cache_dir : str
+        A path to the cache directory of the well.
+    """
+    if cache is True:
+        return os.path.join(well_path, CACHE_DIR_NAME)
+    well_hash = hashlib.md5(os.path.abspath(well_path).encode()).hexdigest()
+    return os.path.join(cache, well_hash)
+
+
+def get_file_hash(path, chunk_size=2**20):
+    """Calculate md5 hash of a file content."""
+    file_hash = hashlib.md5()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def get_file_stamp(path):
+    """Get size and modification time of a file, used to check whether its
+    cached copy is up to date."""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def _dump_stamp(path, stamp):
+    """Atomically save a stamp of a source file into a json file."""
+    def dump_fn(tmp_path):
+        with open(tmp_path, "w") as stamp_file:
+            json.dump(stamp, stamp_file)
+    dump_atomic(path, dump_fn)
+
+
+def _is_cache_valid(path, stamp_path):
+    """Check whether a cached copy of the file `path` is up to date.
+
+    The cache is considered valid if the size and modification time of the
+    source file match the saved stamp. If they don't, source file hash is
+    compared with the saved one, so that touched or copied, but not changed
+    files don't cause cache rebuilding. In the latter case the stamp is
+    updated.
+    """
+    try:
+        with open(stamp_path) as stamp_file:
+            cached_stamp = json.load(stamp_file)
+    except (OSError, ValueError):
+        return False
+    stamp = get_file_stamp(path)
+    if all(cached_stamp.get(key) == val for key, val in stamp.items()):
+        return True
+    if cached_stamp.get("hash") != get_file_hash(path):
+        return False
+    stamp["hash"] = cached_stamp["hash"]
+    try:
+        _dump_stamp(stamp_path, stamp)
+    except OSError:
+        pass
+    return True
+
+
+def load_cached_df(path, loader, cache_dir, columns=None, depth_range=None):
+    """Load a `DataFrame` from its cached columnar copy if it is up to date.
+    Otherwise, load it with `loader` and cache the result.
+
+    The cache is stored in `cache_dir` and consists of two files for each
+    source file: an `.arrow` copy of the loaded `DataFrame`, which is read
+    through a memory map, and a `.json` stamp with the size, modification
+    time and hash of the source file.
+
+    Parameters
+    ----------
+    path : str
+        A path to a source file.
+    loader : callable
+        A function that takes `path` and returns a `DataFrame` with a default
+        `RangeIndex`.
+    cache_dir : str
+        A directory with cache files.
+    columns : list of str or None, optional
+        Columns to load. Columns, missing in the file, are ignored. If
+        `None`, all columns are loaded. Note, that the whole source file is
+        always parsed when the cache is built. Defaults to `None`.
+    depth_range : tuple of two int or None, optional
+        If given, only chunks of the cached copy, overlapping with this closed
+        interval, are read. The result still has to be filtered by depth.
+        Defaults to `None`.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        Loaded `DataFrame`.
+    """
+    file_name = os.path.basename(path)
+    cache_path = os.path.join(cache_dir, file_name + ".arrow")
+    stamp_path = os.path.join(cache_dir, file_name + ".json")
+    if _is_cache_valid(path, stamp_path):
+        try:
+            return read_arrow(cache_path, columns=columns, depth_range=depth_range)
+        except (OSError, ValueError):
+            pass
+
+    stamp = get_file_stamp(path)
+    stamp["hash"] = get_file_hash(path)
+    df = loader(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        dump_atomic(cache_path, lambda tmp_path: write_arrow(df, tmp_path))
+        _dump_stamp(stamp_path, stamp)
+    except (OSError, ValueError) as err:
+        warnings.warn("Unable to cache {}: {}".format(path, err))
+    if columns is not None:
+        df = df[[col for col in columns if col in df]]
+    return df
+
+
+def load_cached_arrays(cache_dir, name, stamp):
+    """Load arrays, cached by `dump_cached_arrays` under a given `name`, if
+    their saved stamp is equal to `stamp`.
+
+    Arrays are memory-mapped in copy-on-write mode: they are read from the
+    page cache on demand and can be modified without changing cache files.
+
+    Parameters
+    ----------
+    cache_dir : str
+        A directory with cache files.
+    name : str
+        A name of cached arrays.
+    stamp : dict
+        A json-serializable description of the sources of the arrays. Cached
+        arrays are considered stale if the saved stamp differs from it.
+
+    Returns
+    -------
+    arrays : dict or None
+        A mapping from an array name to a memory-mapped array or `None` if the
+        cache is missing or stale.
+    meta : dict or None
+        Metadata, saved along with the arrays, or `None` if the cache is
+        missing or stale.
+    """
+    try:
+        with open(os.path.join(cache_dir, name + ".json")) as meta_file:
+            cache_meta = json.load(meta_file)
+        if cache_meta["stamp"] != stamp:
+            return None, None
+        arrays = {array_name: np.load(os.path.join(cache_dir, "{}_{}.npy".format(name, array_name)), mmap_mode="c")
+                  for array_name in cache_meta["arrays"]}
+    except (OSError, ValueError, KeyError):
+        return None, None
+    return arrays, cache_meta["meta"]
+
+
+def dump_cached_arrays(cache_dir, name, arrays, stamp, meta=None):
+    """Save arrays into `.npy` files, which can be memory-mapped by
+    `load_cached_arrays`, along with a stamp of their sources and metadata.
+    Warns instead of raising an error if arrays can't be saved.
+
+    Parameters
+    ----------
+    cache_dir : str
+        A directory with cache files.
+    name : str
+        A name of cached arrays.
+    arrays : dict
+        A mapping from an array name to an array.
+    stamp : dict
+        A json-serializable description of the sources of the arrays.
+    meta : dict, optional
+        Json-serializable metadata to save along with the arrays.
+    """
+    def dump_meta(tmp_path):
+        with open(tmp_path, "w") as meta_file:
+            json.dump({"stamp": stamp, "meta": meta or {}, "arrays": sorted(arrays)}, meta_file)
+
+    def make_dump_array(array):
+        def dump_array(tmp_path):
+            with open(tmp_path, "wb") as array_file:
+                np.save(array_file, array)
+        return dump_array
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for array_name, array in arrays.items():
+            dump_atomic(os.path.join(cache_dir, "{}_{}.npy".format(name, array_name)), make_dump_array(array))
+        # Metadata is saved last so that arrays are never read with a stale stamp
+        dump_atomic(os.path.join(cache_dir, name + ".json"), dump_meta)
+    except (OSError, ValueError) as err:
+        warnings.warn("Unable to cache {}: {}".format(name, err))
@@ -0,0 +1,242 @@
+"""Implements WellCatalog - a manifest of all wells of a field, that allows to
+create wells without scanning their directories."""
+
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from .arrow_io import get_arrow_columns
+from .utils import dump_atomic
+
+
+CATALOG_FILE_NAME = "catalog.json"
+
+
+def _list_dir(path):
+    """List names of files and subdirectories of a directory, ignoring hidden
+    entries."""
+    files, dirs = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            (dirs if entry.is_dir() else files).append(entry.name)
+    return sorted(files), sorted(dirs)
+
+
+def _get_stamp(path):
+    """Get size and modification time of a file or a directory."""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def _read_mnemonics(path):
+    """Read names of well logs from a logs file header without parsing its
+    data. Returns `None` if the file format is not supported or the file
+    can't be read."""
+    ext = os.path.splitext(path)[1][1:]
+    try:
+        if ext in {"feather", "arrow"}:
+            columns = get_arrow_columns(path)
+        elif ext == "csv":
+            columns = pd.read_csv(path, nrows=0).columns.tolist()
+        elif ext == "las":
+            import lasio  # pylint: disable=import-outside-toplevel
+            columns = ["DEPTH" if curve.mnemonic == "DEPT" else curve.mnemonic
+                       for curve in lasio.read(path, ignore_data=True).curves]
+        else:
+            return None
+    except Exception:  # pylint: disable=broad-except
+        return None
+    return [col for col in columns if col != "DEPTH"]
+
+
+class WellCatalog:
+    """A manifest of all wells of a field, stored in a `catalog.json` file in
+    the field directory.
+
+    For each well directory, containing a `meta.json` file, the catalog
+    stores well metadata, listings of the well directory and its
+    subdirectories, sizes and modification times of well files, mnemonics of
+    well logs and the number of core samples. Passing a catalog to a
+    `WellDataset` or a `Well` allows to create wells without opening their
+    `meta.json` files and listing their directories.
+
+    If the catalog file does not exist, the catalog is built and saved on
+    creation. Otherwise, it is loaded and must be updated with `update`
+    after well directories are changed.
+
+    Parameters
+    ----------
+    path : str
+        A path to the field directory, containing well directories.
+    n_workers : positive int or None, optional
+        The number of threads to scan well directories with. If `None`, the
+        default number of workers of `ThreadPoolExecutor` is used. Defaults
+        to `None`.
+
+    Attributes
+    ----------
+    path : str
+        A path to the field directory.
+    entries : dict
+        A mapping from a well directory name to its catalog entry.
+    """
+
+    def __init__(self, path, n_workers=None):
+        self.path = path
+        self.n_workers = n_workers
+        self.entries = {}
+        if os.path.exists(self.catalog_path):
+            self.load()
+        else:
+            self.build()
+
+    @property
+    def catalog_path(self):
+        """str: A path to the catalog file."""
+        return os.path.join(self.path, CATALOG_FILE_NAME)
+
+    @property
+    def paths(self):
+        """dict: A mapping from a well directory name to its full path."""
+        return {dir_name: os.path.join(self.path, dir_name) for dir_name in self.entries}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, dir_name):
+        return dir_name in self.entries
+
+    def get_entry(self, well_path):
+        """Get a catalog entry of a well by the path to its directory or
+        `None` if the well is not in the catalog."""
+        well_path = os.path.abspath(well_path)
+        if os.path.dirname(well_path) != os.path.abspath(self.path):
+            return None
+        return self.entries.get(os.path.basename(well_path))
+
+    def get_listings(self, well_path):
+        """Get listings of a well directory and its subdirectories in the
+        format, accepted by `DirectoryIndex`, or `None` if the well is not in
+        the catalog."""
+        entry = self.get_entry(well_path)
+        if entry is None:
+            return None
+        return {os.path.join(well_path, dir_name): listing for dir_name, listing in entry["listings"].items()}
+
+    def _list_wells(self):
+        """List names of all well directories in the field directory."""
+        _, dirs = _list_dir(self.path)
+        return [dir_name for dir_name in dirs if os.path.isfile(os.path.join(self.path, dir_name, "meta.json"))]
+
+    def _scan_well(self, dir_name):
+        """Create a catalog entry of a well by scanning its directory."""
+        well_path = os.path.join(self.path, dir_name)
+        with open(os.path.join(well_path, "meta.json")) as meta_file:
+            meta = json.load(meta_file)
+
+        files, dirs = _list_dir(well_path)
+        listings = {".": {"files": files, "dirs": dirs}}
+        dir_stamps = {".": _get_stamp(well_path)["mtime"]}
+        for sub_dir in dirs:
+            sub_path = os.path.join(well_path, sub_dir)
+            sub_files, sub_dirs = _list_dir(sub_path)
+            listings[sub_dir] = {"files": sub_files, "dirs": sub_dirs}
+            dir_stamps[sub_dir] = _get_stamp(sub_path)["mtime"]
+
+        logs_files = [file for file in files if os.path.splitext(file)[0] == "logs"]
+        mnemonics = _read_mnemonics(os.path.join(well_path, logs_files[0])) if len(logs_files) == 1 else None
+        n_samples = {sub_dir: len(listings[sub_dir]["files"]) for sub_dir in dirs if sub_dir.startswith("samples")}
+        return {
+            "meta": meta,
+            "listings": listings,
+            "dir_stamps": dir_stamps,
+            "file_stamps": {file: _get_stamp(os.path.join(well_path, file)) for file in files},
+            "mnemonics": mnemonics,
+            "n_samples": n_samples,
+        }
+
+    def _is_entry_valid(self, dir_name, entry):
+        """Check whether a catalog entry of a well is up to date by comparing
+        modification times of the well directory and its subdirectories and
+        stamps of well files with saved ones."""
+        well_path = os.path.join(self.path, dir_name)
+        try:
+            for sub_dir, mtime in entry["dir_stamps"].items():
+                if _get_stamp(os.path.join(well_path, sub_dir))["mtime"] != mtime:
+                    return False
+            for file, stamp in entry["file_stamps"].items():
+                if _get_stamp(os.path.join(well_path, file)) != stamp:
+                    return False
+        except OSError:
+            return False
+        return True
+
+    def _update_entry(self, dir_name):
+        """Get an up to date catalog entry of a well, rescanning its directory
+        only if the saved entry is stale."""
+        entry = self.entries.get(dir_name)
+        if entry is not None and self._is_entry_valid(dir_name, entry):
+            return entry
+        return self._scan_well(dir_name)
+
+    def _scan(self, scan_fn):
+        """Update catalog entries of all wells in parallel with `scan_fn` and
+        save the catalog."""
+        dir_names = self._list_wells()
+        with ThreadPoolExecutor(max_workers=self.n_workers) as executor:
+            entries = list(executor.map(scan_fn, dir_names))
+        self.entries = dict(zip(dir_names, entries))
+        self.save()
+        return self
+
+    def build(self):
+        """Scan all well directories and save the catalog from scratch.
+
+        Returns
+        -------
+        self : WellCatalog
+            The catalog itself.
+        """
+        return self._scan(self._scan_well)
+
+    def update(self):
+        """Incrementally update the catalog: rescan only wells, whose
+        directories or files were changed since the last update, add new
+        wells and remove deleted ones. The catalog is saved afterwards.
+
+        Returns
+        -------
+        self : WellCatalog
+            The catalog itself.
+        """
+        return self._scan(self._update_entry)
+
+    def load(self):
+        """Load the catalog from its file.
+
+        Returns
+        -------
+        self : WellCatalog
+            The catalog itself.
+        """
+        with open(self.catalog_path) as catalog_file:
+            self.entries = json.load(catalog_file)
+        return self
+
+    def save(self):
+        """Atomically save the catalog into its file.
+
+        Returns
+        -------
+        self : WellCatalog
+            The catalog itself.
+        """
+        def dump_fn(tmp_path):
+            with open(tmp_path, "w") as catalog_file:
+                json.dump(self.entries, catalog_file)
+        dump_atomic(self.catalog_path, dump_fn)
+        return self
@@ -4,8 +4,6 @@ import os
 from itertools import product
 
 import numpy as np
-import PIL
-import cv2
 
 from petroflow.batchflow import FilesIndex, ImagesBatch, action, inbatch_parallel
 
@@ -69,12 +67,14 @@ class CoreBatch(ImagesBatch):
 
     @staticmethod
     def _mirror_padding(image, shape):
+        from PIL import Image  # pylint: disable=import-outside-toplevel
+
         new_shape = (np.array(shape) - image.size) * (np.array(shape) - image.size > 0)
         padding_shape = ((new_shape[1], new_shape[1]), (new_shape[0], new_shape[0]), (0, 0))
         image = np.array(image)
         if image.ndim == 2:
             padding_shape = padding_shape[:-1]
-        return PIL.Image.fromarray(np.pad(image, padding_shape, mode='reflect'))
+        return Image.fromarray(np.pad(image, padding_shape, mode='reflect'))
 
     @staticmethod
     def _get_uv_path(path_dl):
@@ -123,9 +123,11 @@ class CoreBatch(ImagesBatch):
         dst : tuple
             components to save resulting images. Default: ('dl', 'uv').
         """
+        from PIL import Image  # pylint: disable=import-outside-toplevel
+
         full_path_dl = self._get_file_name(index, src=None)
         full_path_uv = self._get_uv_path(full_path_dl)
-        res = (PIL.Image.open(full_path_dl), PIL.Image.open(full_path_uv))
+        res = (Image.open(full_path_dl), Image.open(full_path_uv))
         if grayscale:
             res = [item.convert('L') for item in res]
         return res[0], res[1]
@@ -213,11 +215,13 @@ class CoreBatch(ImagesBatch):
         dst : tuple of str
             components to save resulting images and labels. Default: ('uv', 'labels').
         """
+        from PIL import ImageOps  # pylint: disable=import-outside-toplevel
+
         _ = kwargs
         src = self.components[1:] if src is None else src
         img, label = self._get_components(index, src)
         if np.random.rand() < proba:
-            img = PIL.ImageOps.flip(img)
+            img = ImageOps.flip(img)
             label = 1.
         return img, label
 
@@ -290,13 +294,16 @@ class CoreBatch(ImagesBatch):
         dst : tuple of str
             components to save resulting images. Default: ('dl', 'uv').
         """
+        import cv2  # pylint: disable=import-outside-toplevel
+        from PIL import Image  # pylint: disable=import-outside-toplevel
+
         _ = kwargs
         res = []
         src = self.components[:2] if src is None else src
         for component in src:
             pos = self.get_pos(None, component, index)
             image = np.array(getattr(self, component)[pos])
-            res.append(PIL.Image.fromarray(cv2.equalizeHist(image))) # pylint: disable=no-member
+            res.append(Image.fromarray(cv2.equalizeHist(image))) # pylint: disable=no-member
         return res
 
     @action
@@ -313,11 +320,13 @@ class CoreBatch(ImagesBatch):
         dst : tuple of str
             components to save resulting images. Default: 'uv'.
         """
+        from PIL import Image  # pylint: disable=import-outside-toplevel
+
         _ = kwargs
         src = self.components[1] if src is None else src
         pos = self.get_pos(None, src, index)
         image = np.array(getattr(self, src)[pos])
-        return PIL.Image.fromarray(((image > threshold) * 255).astype('uint8'))
+        return Image.fromarray(((image > threshold) * 255).astype('uint8'))
 
     @action
     @inbatch_parallel(init='indices', post='_assemble_uv')
@@ -334,13 +343,16 @@ class CoreBatch(ImagesBatch):
         dst : tuple of str
             components to save resulting images. Default: 'uv'.
         """
+        import cv2  # pylint: disable=import-outside-toplevel
+        from PIL import Image  # pylint: disable=import-outside-toplevel
+
         _ = kwargs
         src = self.components[1] if src is None else src
         kernel = (kernel, kernel) if isinstance(kernel, int) else kernel
         kernel = np.ones(kernel, np.float32) / (kernel[0] * kernel[1])
         pos = self.get_pos(None, src, index)
         image = np.array(getattr(self, src)[pos])
-        return PIL.Image.fromarray(cv2.filter2D(image, -1, kernel)) # pylint: disable=no-member
+        return Image.fromarray(cv2.filter2D(image, -1, kernel)) # pylint: disable=no-member
 
     @action
     def make_random_crops(self, shape, n_crops=1, src=None, channels='first', **kwargs):
@@ -0,0 +1,112 @@
+"""Implements DirectoryIndex - a cache of directory listings of a well."""
+
+import os
+
+
+class DirectoryIndex:
+    """A cache of directory listings, that allows to check for file existence
+    and to resolve file names without extensions without scanning
+    directories each time.
+
+    Each directory is listed once at the time of the first request and the
+    listing is kept until `refresh` is called. An instance is shared between
+    all copies and slices of a `WellSegment`, including deep copies.
+
+    Parameters
+    ----------
+    listings : dict, optional
+        Preliminary listings of directories. Maps a directory path to a dict
+        with `files` and `dirs` keys, containing names of files and
+        subdirectories respectively. Directories, missing in `listings`, are
+        listed on demand.
+    """
+
+    def __init__(self, listings=None):
+        self._listings = {}
+        # Values, derived from the state of listed files, that are kept until the index is refreshed
+        self._memo = {}
+        for path, listing in (listings or {}).items():
+            self._listings[os.path.normpath(path)] = self._build_listing(listing["files"], listing["dirs"])
+
+    def __deepcopy__(self, memo):
+        """Share the index between deep copies."""
+        return self
+
+    @staticmethod
+    def _build_listing(files, dirs):
+        """Create a directory listing with a mapping from each name without
+        extension to all matching entries.
+
+        A name is mapped to an entry if `glob(name + ".*")` matches it, so an
+        entry `a.b.c` is mapped to both `a` and `a.b`. As in `glob`, hidden
+        entries are ignored.
+        """
+        names = sorted(set(files) | set(dirs))
+        stems = {}
+        for name in names:
+            if name.startswith("."):
+                continue
+            dot_pos = name.find(".")
+            while dot_pos != -1:
+                stems.setdefault(name[:dot_pos], []).append(name)
+                dot_pos = name.find(".", dot_pos + 1)
+        return {"files": set(files), "dirs": set(dirs), "stems": stems}
+
+    def _get_listing(self, path):
+        """Get a listing of a directory, scanning it if not cached. A listing
+        of a missing directory is empty."""
+        path = os.path.normpath(path)
+        listing = self._listings.get(path)
+        if listing is None:
+            files, dirs = [], []
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        (dirs if entry.is_dir() else files).append(entry.name)
+            except (FileNotFoundError, NotADirectoryError):
+                pass
+            listing = self._build_listing(files, dirs)
+            self._listings[path] = listing
+        return listing
+
+    def listdir(self, path):
+        """Return a list of names of all entries of a directory."""
+        listing = self._get_listing(path)
+        return sorted(listing["files"] | listing["dirs"])
+
+    def exists(self, path):
+        """Check whether a file or a directory exists."""
+        dir_path, name = os.path.split(os.path.normpath(path))
+        listing = self._get_listing(dir_path)
+        return name in listing["files"] or name in listing["dirs"]
+
+    def isdir(self, path):
+        """Check whether a directory exists."""
+        dir_path, name = os.path.split(os.path.normpath(path))
+        return name in self._get_listing(dir_path)["dirs"]
+
+    def find(self, path, name):
+        """Find all entries in a directory `path` with a given `name` and any
+        extension. Equivalent to `glob(os.path.join(path, name + ".*"))`."""
+        dir_path, name = os.path.split(os.path.join(path, name))
+        return [os.path.join(dir_path, item) for item in self._get_listing(dir_path)["stems"].get(name, [])]
+
+    def memoize(self, key, func):
+        """Get a value with a given `key`, computed by calling `func` on the
+        first request and kept until the index is refreshed. Used to share
+        values, derived from the state of well files, such as file stamps,
+        between all segments of a well."""
+        if key not in self._memo:
+            self._memo[key] = func()
+        return self._memo[key]
+
+    def refresh(self, path=None):
+        """Drop cached listing of a directory `path` or of all directories if
+        `path` is `None`, so that they are scanned again on the next request.
+        Memoized values are always dropped.
+        """
+        self._memo.clear()
+        if path is None:
+            self._listings.clear()
+        else:
+            self._listings.pop(os.path.normpath(path), None)
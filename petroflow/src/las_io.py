@@ -0,0 +1,96 @@
+"""Implements a fast reader of `.las` files with unwrapped numeric data."""
+
+import numpy as np
+import pandas as pd
+
+
+def _parse_header_line(line):
+    """Split a header line of a `.las` file in the `MNEM.UNIT VALUE : DESCRIPTION`
+    format into an upper-case mnemonic and a value."""
+    if "." not in line:
+        raise ValueError("Unsupported header line {}".format(line))
+    mnemonic, rest = line.split(".", 1)
+    # The unit goes right after the dot and can't contain spaces
+    value = rest.split(":", 1)[0]
+    if value[:1].strip():
+        value = value.split(None, 1)[1] if len(value.split(None, 1)) > 1 else ""
+    return mnemonic.strip().upper(), value.strip()
+
+
+def _read_header(las_file):
+    """Read the header of a `.las` file up to its `~A` section and return
+    curve mnemonics and the value of the `NULL` item. Raises `ValueError` if
+    the file can't be read by `read_las`."""
+    section = None
+    mnemonics = []
+    null_value = None
+    for line in iter(las_file.readline, b""):
+        line = line.decode("utf-8").strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("~"):
+            section = line[1:2].upper()
+            if section == "A":
+                return mnemonics, null_value
+            continue
+        if section not in {"V", "W", "C"}:
+            continue
+        mnemonic, value = _parse_header_line(line)
+        if section == "V":
+            if mnemonic == "VERS" and not value.startswith("2"):
+                raise ValueError("Only LAS 2.0 files are supported")
+            if mnemonic == "WRAP" and value.upper() != "NO":
+                raise ValueError("Wrapped files are not supported")
+            if mnemonic == "DLM" and value.upper() not in {"SPACE", "TAB"}:
+                raise ValueError("Only whitespace data delimiters are supported")
+        elif section == "W" and mnemonic == "NULL":
+            null_value = float(value) if value else None
+        elif section == "C":
+            mnemonics.append(mnemonic)
+    raise ValueError("~A section is missing")
+
+
+def read_las(path):
+    """Read a `.las` file with unwrapped numeric data into a `DataFrame`.
+
+    Only the version, well and curves sections of the header are parsed. The
+    `~A` section is streamed into a `float64` array by the compiled
+    `numpy.loadtxt` parser instead of being split into Python objects, which
+    makes reading of large files several times faster, than with
+    `lasio`. Values, equal to the `NULL` header item, are replaced with
+    `numpy.nan`. `DEPT` curve is renamed to `DEPTH` and converted from
+    meters into integer centimeters.
+
+    Parameters
+    ----------
+    path : str
+        A path to a `.las` file.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        Loaded `DataFrame` with a default `RangeIndex`.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a LAS 2.0 file with unwrapped whitespace-delimited
+        numeric data, its first curve is not depth or curve mnemonics are not
+        unique. Such files should be read by `lasio`.
+    """
+    with open(path, "rb") as las_file:
+        mnemonics, null_value = _read_header(las_file)
+        mnemonics = ["DEPTH" if mnemonic == "DEPT" else mnemonic for mnemonic in mnemonics]
+        if not mnemonics or mnemonics[0] != "DEPTH" or len(set(mnemonics)) != len(mnemonics):
+            raise ValueError("The first curve must be depth and curve mnemonics must be unique")
+        data = np.loadtxt(las_file, dtype=np.float64, comments="#", ndmin=2, encoding="latin-1")
+    if data.shape[1] != len(mnemonics):
+        raise ValueError("The number of data columns doesn't match the number of curves")
+
+    if null_value is not None:
+        data[data == null_value] = np.nan
+    df = pd.DataFrame(data[:, 1:], columns=mnemonics[1:])
+    # Depth values in a .las file are assumed to be in meters. Units are not parsed from the header since they are
+    # optional and their format is not strictly fixed.
+    df.insert(0, "DEPTH", np.round(data[:, 0] * 100).astype(int))
+    return df
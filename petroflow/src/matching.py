@@ -7,8 +7,6 @@ from collections import namedtuple
 
 import multiprocess as mp
 import numpy as np
-from scipy.optimize import minimize
-from scipy.interpolate import interp1d
 
 
 Shift = namedtuple("Shift", ["depth_from", "depth_to", "sequence_delta", "interval_deltas", "loss",
@@ -175,6 +173,9 @@ def match_boring_sequence(boring_sequence, lithology_intervals, well_log, core_l
         `Shift` object for each initial guess, containing final loss and
         deltas.
     """
+    from scipy.optimize import minimize  # pylint: disable=import-outside-toplevel
+    from scipy.interpolate import interp1d  # pylint: disable=import-outside-toplevel
+
     well_depth_from = well_log.index.min()
     well_depth_to = well_log.index.max()
     well_log = well_log.dropna()
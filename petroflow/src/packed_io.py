@@ -0,0 +1,236 @@
+"""Implements reading and writing of packed wells - single files, containing
+all well data in blosc-compressed blocks with an index footer."""
+
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from .arrow_io import read_arrow, dump_arrow_buffer, get_chunk_depth_ranges
+
+
+# An extension of packed well files
+PACKED_EXT = "pfw"
+
+# Magic bytes at the beginning and at the end of a packed well file
+MAGIC = b"PFWELL01"
+
+# The number of rows of tables in each compressed block
+TABLE_CHUNK_ROWS = 2**14
+
+# The number of rows of core images in each compressed block
+IMAGE_CHUNK_ROWS = 1024
+
+# Blosc compression parameters
+BLOSC_CNAME = "lz4"
+BLOSC_CLEVEL = 5
+
+
+def is_packed(path):
+    """Check whether `path` is a packed well file."""
+    return os.path.isfile(path) and path.endswith("." + PACKED_EXT)
+
+
+def write_packed(path, meta, tables, core=None, core_meta=None):
+    """Write well data into a packed well file.
+
+    The file consists of a magic prefix, a sequence of blosc-compressed
+    blocks and a json footer with positions of all blocks, followed by the
+    footer size and the magic suffix. Each table is split into blocks of
+    `TABLE_CHUNK_ROWS` rows, each containing an Arrow IPC file, and depth
+    ranges of blocks of depth-indexed tables are saved in the footer. Core
+    images are split into blocks of `IMAGE_CHUNK_ROWS` rows. This way a
+    segment of a well reads and decompresses only blocks, overlapping with
+    it, and each block stays far below the blosc limit of 2 GB.
+
+    Parameters
+    ----------
+    path : str
+        A path to a resulting file.
+    meta : dict
+        Json-serializable well metadata.
+    tables : dict
+        A mapping from a table name to a `DataFrame` with a default
+        `RangeIndex`.
+    core : dict, optional
+        A mapping from a name of core image or its mask to an array.
+    core_meta : dict, optional
+        Json-serializable parameters of core images.
+    """
+    import blosc  # pylint: disable=import-outside-toplevel
+
+    index = {"meta": meta, "tables": {}, "core": None}
+    with open(path, "wb") as file:
+        def write_block(data, typesize):
+            block = blosc.compress(data, typesize=typesize, clevel=BLOSC_CLEVEL, shuffle=blosc.SHUFFLE,
+                                   cname=BLOSC_CNAME)
+            offset = file.tell()
+            file.write(block)
+            return [offset, len(block)]
+
+        file.write(MAGIC)
+        for name, df in tables.items():
+            # An empty table is stored as a single block to keep its schema
+            chunk_starts = range(0, max(len(df), 1), TABLE_CHUNK_ROWS)
+            chunks = [write_block(dump_arrow_buffer(df.iloc[start:start+TABLE_CHUNK_ROWS]), 8)
+                      for start in chunk_starts]
+            index["tables"][name] = {"chunks": chunks,
+                                     "depth_ranges": get_chunk_depth_ranges(df, TABLE_CHUNK_ROWS)}
+
+        if core:
+            images = {}
+            for name, img in core.items():
+                img = np.ascontiguousarray(img)
+                chunks = [write_block(img[start:start+IMAGE_CHUNK_ROWS], img.dtype.itemsize)
+                          for start in range(0, len(img), IMAGE_CHUNK_ROWS)]
+                images[name] = {"dtype": img.dtype.str, "shape": img.shape, "chunk_rows": IMAGE_CHUNK_ROWS,
+                                "chunks": chunks}
+            index["core"] = {"meta": core_meta or {}, "images": images}
+
+        footer = json.dumps(index).encode()
+        file.write(footer)
+        file.write(len(footer).to_bytes(8, "little"))
+        file.write(MAGIC)
+
+
+class PackedWell:
+    """A reader of a packed well file, written by `write_packed`.
+
+    Only the footer is read on creation. Each block is read on demand by a
+    separate positioned read, so that the reader can be shared between
+    threads and copies of a segment.
+
+    Parameters
+    ----------
+    path : str
+        A path to a packed well file.
+
+    Attributes
+    ----------
+    path : str
+        A path to the file.
+    meta : dict
+        Well metadata.
+    core_meta : dict or None
+        Parameters of stored core images or `None` if they are not stored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError("{} is not a packed well file".format(path))
+            file.seek(-len(MAGIC) - 8, os.SEEK_END)
+            footer_size = int.from_bytes(file.read(8), "little")
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError("Packed well file {} is truncated".format(path))
+            file.seek(-len(MAGIC) - 8 - footer_size, os.SEEK_END)
+            self._index = json.loads(file.read(footer_size).decode())
+        self.meta = self._index["meta"]
+        core = self._index["core"]
+        self.core_meta = None if core is None else core["meta"]
+
+    def __deepcopy__(self, memo):
+        """Share the reader between deep copies, since it is immutable."""
+        return self
+
+    @property
+    def tables(self):
+        """list of str: Names of stored tables."""
+        return list(self._index["tables"])
+
+    @property
+    def images(self):
+        """list of str: Names of stored core images and their masks."""
+        core = self._index["core"]
+        return [] if core is None else list(core["images"])
+
+    def _read_block(self, block):
+        """Read and decompress a block, given by its offset and size."""
+        import blosc  # pylint: disable=import-outside-toplevel
+        offset, size = block
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            data = file.read(size)
+        return blosc.decompress(data)
+
+    def read_table(self, name, columns=None, depth_range=None):
+        """Read a stored table.
+
+        Parameters
+        ----------
+        name : str
+            A name of the table.
+        columns : list of str or None, optional
+            Columns to load. Columns, missing in the table, are ignored. If
+            `None`, all columns are loaded. Defaults to `None`.
+        depth_range : tuple of two int or None, optional
+            If given, only blocks of a depth-indexed table, overlapping with
+            this closed interval, are read and decompressed. The result still
+            has to be filtered by depth. Defaults to `None`.
+
+        Returns
+        -------
+        df : pandas.DataFrame
+            Loaded `DataFrame` with a default `RangeIndex`. If a single block
+            is read, its numeric columns are read-only.
+        """
+        info = self._index["tables"][name]
+        chunks = info["chunks"]
+        depth_ranges = info["depth_ranges"]
+        is_empty = False
+        if depth_range is not None and depth_ranges is not None:
+            depth_from, depth_to = depth_range
+            mask = ((np.array(depth_ranges["depth_from"]) <= depth_to) &
+                    (np.array(depth_ranges["depth_to"]) >= depth_from))
+            is_empty = not mask.any()
+            # The first block is read anyway to get an empty table with the stored schema
+            chunks = chunks[:1] if is_empty else [chunks[i] for i in np.where(mask)[0]]
+        dfs = [read_arrow(np.frombuffer(self._read_block(block), dtype=np.uint8), columns=columns)
+               for block in chunks]
+        if is_empty:
+            return dfs[0].iloc[:0]
+        if len(dfs) == 1:
+            return dfs[0]
+        return pd.concat(dfs, ignore_index=True)
+
+    def read_image(self, name, start, stop, fill_value=None):
+        """Read rows [`start`, `stop`) of a stored core image or its mask.
+        Only blocks, overlapping with these rows, are read. Rows outside the
+        image are filled with `fill_value`.
+
+        Parameters
+        ----------
+        name : str
+            A name of the image.
+        start : int
+            The first row to read. Can be negative.
+        stop : int
+            The row after the last one to read. Can exceed image height.
+        fill_value : scalar, optional
+            A value to fill rows outside the image with. Defaults to
+            `numpy.nan` for float images and to zero otherwise.
+
+        Returns
+        -------
+        img : numpy.ndarray
+            Read rows of the image.
+        """
+        info = self._index["core"]["images"][name]
+        shape = tuple(info["shape"])
+        dtype = np.dtype(info["dtype"])
+        chunk_rows = info["chunk_rows"]
+        if fill_value is None:
+            fill_value = np.nan if dtype.kind == "f" else 0
+        img = np.full((max(stop - start, 0),) + shape[1:], fill_value, dtype=dtype)
+        first_chunk = max(start, 0) // chunk_rows
+        for i, block in enumerate(info["chunks"][first_chunk:], first_chunk):
+            chunk_start = i * chunk_rows
+            if chunk_start >= stop:
+                break
+            chunk = np.frombuffer(self._read_block(block), dtype=dtype).reshape((-1,) + shape[1:])
+            src_start, src_stop = max(start - chunk_start, 0), min(stop - chunk_start, len(chunk))
+            if src_start < src_stop:
+                img[chunk_start+src_start-start:chunk_start+src_stop-start] = chunk[src_start:src_stop]
+        return img
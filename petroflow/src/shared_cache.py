@@ -0,0 +1,273 @@
+"""Implements a node-local cache of well data in shared memory, which allows
+several processes to share loaded well attributes without copying them."""
+
+import os
+import sys
+import json
+import atexit
+import hashlib
+import tempfile
+import warnings
+from contextlib import contextmanager
+
+import numpy as np
+
+
+# A prefix of names of shared memory blocks
+SHM_PREFIX = "petroflow_"
+
+# A directory with files, storing ids of processes, that use each block
+REFS_DIR = os.path.join(tempfile.gettempdir(), "petroflow_shm")
+
+# Alignment of arrays in a block
+ALIGNMENT = 64
+
+# Whether shared memory blocks can be excluded from resource tracking on creation
+TRACK_SUPPORTED = sys.version_info >= (3, 13)
+
+# Shared memory blocks, attached by the current process: block name -> (block, pid of the attaching process)
+_ATTACHED = {}
+
+
+def _get_shared_memory_class():
+    """Import `SharedMemory` lazily, since it is available since Python 3.8."""
+    try:
+        from multiprocessing.shared_memory import SharedMemory  # pylint: disable=import-outside-toplevel
+    except ImportError as err:
+        raise ImportError("Shared memory cache requires Python 3.8 or later") from err
+    return SharedMemory
+
+
+def _get_resource_tracker():
+    """Import `multiprocessing` resource tracker lazily, since it is available
+    since Python 3.8."""
+    try:
+        from multiprocessing import resource_tracker  # pylint: disable=import-outside-toplevel
+    except ImportError as err:
+        raise ImportError("Shared memory cache requires Python 3.8 or later") from err
+    return resource_tracker
+
+
+def _get_fcntl():
+    """Import `fcntl` lazily, since it is available only on POSIX systems."""
+    try:
+        import fcntl  # pylint: disable=import-outside-toplevel
+    except ImportError as err:
+        raise ImportError("Shared memory cache is supported only on POSIX systems") from err
+    return fcntl
+
+
+def _open_block(name, create=False, size=0):
+    """Create or attach a shared memory block, which is not tracked by
+    `multiprocessing` resource tracker. Otherwise, the tracker would unlink
+    the block as soon as the process, that created it, exits."""
+    shared_memory_class = _get_shared_memory_class()
+    if TRACK_SUPPORTED:
+        return shared_memory_class(name, create=create, size=size, track=False)  # pylint: disable=unexpected-keyword-arg
+    block = shared_memory_class(name, create=create, size=size)
+    _get_resource_tracker().unregister(block._name, "shared_memory")  # pylint: disable=protected-access
+    return block
+
+
+def _is_alive(pid):
+    """Check whether a process with a given id is running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextmanager
+def _lock_refs(name):
+    """Lock a file with ids of processes, that use a block `name`, and yield
+    a set of alive ones. Changes of the set are saved on exit."""
+    fcntl = _get_fcntl()
+    os.makedirs(REFS_DIR, exist_ok=True)
+    with open(os.path.join(REFS_DIR, name), "a+") as refs_file:
+        fcntl.flock(refs_file, fcntl.LOCK_EX)
+        try:
+            refs_file.seek(0)
+            content = refs_file.read()
+            refs = {pid for pid in json.loads(content) if _is_alive(pid)} if content else set()
+            yield refs
+            refs_file.seek(0)
+            refs_file.truncate()
+            json.dump(sorted(refs), refs_file)
+            refs_file.flush()
+        finally:
+            fcntl.flock(refs_file, fcntl.LOCK_UN)
+
+
+def _get_block_size(arrays, header):
+    """Get the size of a block, required to store `arrays` after a `header`
+    of a given length."""
+    size = 8 + len(header)
+    for array in arrays.values():
+        size = -(-size // ALIGNMENT) * ALIGNMENT + array.nbytes
+    return size
+
+
+def _make_header(arrays, meta):
+    """Create a json header of a block, describing positions of `arrays` in
+    it. The header size is fixed iteratively, since offsets depend on it."""
+    header = b""
+    while True:
+        offset = 8 + len(header)
+        layout = {}
+        for array_name, array in arrays.items():
+            offset = -(-offset // ALIGNMENT) * ALIGNMENT
+            layout[array_name] = {"dtype": array.dtype.str, "shape": array.shape, "offset": offset}
+            offset += array.nbytes
+        new_header = json.dumps({"arrays": layout, "meta": meta}).encode()
+        if len(new_header) == len(header):
+            return new_header, layout
+        header = new_header
+
+
+def _create_block(name, arrays, meta):
+    """Create a shared memory block and copy `arrays` and json-serializable
+    `meta` into it."""
+    header, layout = _make_header(arrays, meta)
+    size = max(_get_block_size(arrays, header), 1)
+    stat = os.statvfs("/dev/shm") if os.path.isdir("/dev/shm") else None
+    if stat is not None and stat.f_bavail * stat.f_frsize < size:
+        # Writing beyond the size of /dev/shm causes SIGBUS instead of an exception
+        raise MemoryError("Not enough shared memory to store {} bytes".format(size))
+    block = _open_block(name, create=True, size=size)
+    block.buf[8:8+len(header)] = header
+    for array_name, array in arrays.items():
+        array_layout = layout[array_name]
+        dst = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf, offset=array_layout["offset"])
+        dst[...] = array
+    # Header size is written last, so that blocks, whose creation was interrupted, have zero header size
+    block.buf[:8] = len(header).to_bytes(8, "little")
+    return block
+
+
+def _is_block_complete(block):
+    """Check whether the creation of a block was finished."""
+    return int.from_bytes(bytes(block.buf[:8]), "little") > 0
+
+
+def _read_block(block):
+    """Get read-only arrays and metadata, stored in a shared memory block,
+    without copying."""
+    header_size = int.from_bytes(bytes(block.buf[:8]), "little")
+    header = json.loads(bytes(block.buf[8:8+header_size]).decode())
+    arrays = {}
+    for array_name, array_layout in header["arrays"].items():
+        array = np.ndarray(array_layout["shape"], dtype=np.dtype(array_layout["dtype"]), buffer=block.buf,
+                           offset=array_layout["offset"])
+        array.flags.writeable = False
+        arrays[array_name] = array
+    return arrays, header["meta"]
+
+
+def get_block_name(*key):
+    """Get a name of a shared memory block from a json-serializable `key`."""
+    return SHM_PREFIX + hashlib.md5(json.dumps(key).encode()).hexdigest()
+
+
+def get_shared_arrays(name, build_fn):
+    """Get arrays, shared between processes under a given `name`. If they
+    don't exist, they are built by `build_fn` and published.
+
+    The first process to request a block creates it, other processes map the
+    same memory read-only with zero copies. Each block keeps track of the
+    ids of processes, that use it, and is unlinked by the last of them on
+    exit. Blocks, left by crashed processes, are reused by subsequent
+    requests or removed by `cleanup_shared_memory`.
+
+    Parameters
+    ----------
+    name : str
+        A name of a shared memory block.
+    build_fn : callable
+        A function without arguments, that returns a `dict` of arrays to
+        share and a json-serializable `dict` of metadata.
+
+    Returns
+    -------
+    arrays : dict
+        A mapping from an array name to a read-only array. If the arrays
+        can't be put into shared memory, locally built ones are returned.
+    meta : dict
+        Metadata of the arrays.
+    """
+    attached = _ATTACHED.get(name)
+    if attached is not None and attached[1] == os.getpid():
+        return _read_block(attached[0])
+
+    with _lock_refs(name) as refs:
+        try:
+            block = _open_block(name)
+            if not _is_block_complete(block):
+                block.close()
+                _unlink_block(name)
+                raise FileNotFoundError
+        except FileNotFoundError:
+            arrays, meta = build_fn()
+            try:
+                block = _create_block(name, arrays, meta)
+            except (OSError, MemoryError) as err:
+                warnings.warn("Unable to put {} into shared memory: {}".format(name, err))
+                return arrays, meta
+        refs.add(os.getpid())
+    _ATTACHED[name] = (block, os.getpid())
+    return _read_block(block)
+
+
+def _unlink_block(name):
+    """Remove a shared memory block. Processes, that have already mapped it,
+    can still use it until they exit."""
+    try:
+        block = _open_block(name)
+    except FileNotFoundError:
+        return
+    block.close()
+    if not TRACK_SUPPORTED:
+        # unlink unregisters the block in the resource tracker, so it must be registered first
+        _get_resource_tracker().register(block._name, "shared_memory")  # pylint: disable=protected-access
+    block.unlink()
+
+
+def _release_block(name):
+    """Remove the current process from users of a block and unlink the block
+    if it is not used by any other process."""
+    with _lock_refs(name) as refs:
+        refs.discard(os.getpid())
+        if not refs:
+            _unlink_block(name)
+
+
+@atexit.register
+def _release_blocks():
+    """Release all blocks, attached by the current process, on its exit."""
+    for name, (_, pid) in list(_ATTACHED.items()):
+        if pid == os.getpid():
+            _release_block(name)
+    _ATTACHED.clear()
+
+
+def cleanup_shared_memory():
+    """Unlink all well data blocks in shared memory, that are not used by
+    any running process, e.g. left after crashes of their users, and remove
+    their reference files. Should not be called while other processes
+    create new blocks."""
+    if not os.path.isdir(REFS_DIR):
+        return
+    for name in os.listdir(REFS_DIR):
+        if not name.startswith(SHM_PREFIX) or name in _ATTACHED:
+            continue
+        with _lock_refs(name) as refs:
+            is_used = bool(refs)
+            if not is_used:
+                _unlink_block(name)
+        if not is_used:
+            try:
+                os.remove(os.path.join(REFS_DIR, name))
+            except OSError:
+                pass
@@ -1,15 +1,45 @@
 """Miscellaneous utility functions."""
 
+import os
 import re
 import warnings
+import weakref
+import threading
 import functools
 
-import pint
 import numpy as np
 from numba import njit
 
 
-UNIT_REGISTRY = pint.UnitRegistry()
+# Factors to convert common length units to centimeters. Other units are
+# converted by `pint`, which is imported on first use since creation of its
+# unit registry is slow.
+LENGTH_UNITS_CM = {
+    **dict.fromkeys(["mm", "millimeter", "millimeters", "millimetre", "millimetres"], 0.1),
+    **dict.fromkeys(["cm", "centimeter", "centimeters", "centimetre", "centimetres"], 1),
+    **dict.fromkeys(["dm", "decimeter", "decimeters", "decimetre", "decimetres"], 10),
+    **dict.fromkeys(["m", "meter", "meters", "metre", "metres"], 100),
+    **dict.fromkeys(["km", "kilometer", "kilometers", "kilometre", "kilometres"], 100000),
+    **dict.fromkeys(["in", "inch", "inches"], 2.54),
+    **dict.fromkeys(["ft", "foot", "feet"], 30.48),
+}
+
+DEPTH_REGEXP = re.compile(r"(?P<value>[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?)(?P<units>[a-zA-Z]+)")
+
+
+@functools.lru_cache(maxsize=None)
+def get_unit_registry():
+    """Create a `pint` unit registry on the first call and return it."""
+    import pint  # pylint: disable=import-outside-toplevel
+    return pint.UnitRegistry()
+
+
+def to_cm(units):
+    """Get a factor to convert length `units` to centimeters."""
+    factor = LENGTH_UNITS_CM.get(units)
+    if factor is None:
+        factor = get_unit_registry()(units).to("cm").magnitude
+    return factor
 
 
 def to_list(obj):
@@ -48,6 +78,7 @@ def process_columns(*dec_args, dst_from_result=False):
         @functools.wraps(method)
         def wrapper(self, *args, attr="logs", src=None, except_src=None, dst=None,
                     drop_src=False, dst_from_result=None, **kwargs):
+            self._detach(attr)  # pylint: disable=protected-access
             df = getattr(self, attr)
             if (src is not None) and (except_src is not None):
                 raise ValueError("src and except_src can't be specified together")
@@ -106,11 +137,10 @@ def parse_depth(depth, check_positive=False, var_name="Depth/length"):
         Depth value converted to centimeters.
     """
     if isinstance(depth, str):
-        regexp = re.compile(r"(?P<value>[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?)(?P<units>[a-zA-Z]+)")
-        match = regexp.fullmatch(depth)
+        match = DEPTH_REGEXP.fullmatch(depth)
         if not match:
             raise ValueError("{} must be specified in a <value><units> format".format(var_name))
-        depth = float(match.group("value")) * UNIT_REGISTRY(match.group("units")).to("cm").magnitude
+        depth = float(match.group("value")) * to_cm(match.group("units"))
         if depth.is_integer():
             depth = int(depth)
     if not isinstance(depth, (int, np.integer)):
@@ -120,6 +150,19 @@ def parse_depth(depth, check_positive=False, var_name="Depth/length"):
     return depth
 
 
+def dump_atomic(path, dump_fn):
+    """Write a file by calling `dump_fn` with a temporary path and then
+    atomically renaming the result to `path`, so that concurrent readers
+    never see a partially written file."""
+    tmp_path = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+    try:
+        dump_fn(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
 def map_values(values, mapping):
     """Either map each `values` value using either `dict` or `callable` or
     return `values` themselves if mapping is `None`.
@@ -153,3 +196,52 @@ def fill_intervals(arr, starts, ends, values):
     if values.dtype.kind in set('UO'):
         return for_fill_intervals(arr, starts, ends, values)
     raise TypeError("Only numeric, str and object dtypes are supported.")
+
+
+def get_overlapping_slice(depth_from, depth_to, query_from, query_to):
+    """Get a slice of intervals [`depth_from`, `depth_to`), overlapping with
+    the interval [`query_from`, `query_to`), in O(log(n)) time.
+
+    Both `depth_from` and `depth_to` must be sorted in ascending order, which
+    holds for non-overlapping intervals, sorted by their starts.
+
+    Parameters
+    ----------
+    depth_from : 1-D ndarray
+        Starts of intervals.
+    depth_to : 1-D ndarray
+        Ends of intervals.
+    query_from : int
+        The start of the query interval.
+    query_to : int
+        The end of the query interval.
+
+    Returns
+    -------
+    overlap : slice
+        Positions of intervals, overlapping with the query interval.
+    """
+    start = np.searchsorted(depth_to, query_from, side="right")
+    stop = np.searchsorted(depth_from, query_to, side="left")
+    return slice(start, max(start, stop))
+
+
+class CopyableWeakRef:
+    """A weak reference, that is kept as is by `copy` and `deepcopy` and
+    becomes dead after pickling, since the referent can't be shared with
+    another process."""
+
+    def __init__(self, obj=None):
+        self._ref = None if obj is None else weakref.ref(obj)
+
+    def __call__(self):
+        return None if self._ref is None else self._ref()
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (CopyableWeakRef, ())
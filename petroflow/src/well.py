@@ -1,19 +1,21 @@
 """Implements Well class."""
 # pylint: disable=abstract-method
 
+import weakref
 import warnings
 from copy import copy, deepcopy
 from functools import wraps
-from collections import defaultdict, Counter
+from itertools import chain
+from collections import defaultdict
 
 import numpy as np
 import pandas as pd
 
 from .base_delegator import BaseDelegator
 from .abstract_classes import AbstractWell
-from .well_segment import WellSegment
+from .well_segment import WellSegment, SHARE_DATA_MEMO_KEY
 from .exceptions import SkipWellException
-from .utils import parse_depth
+from .utils import to_list, parse_depth
 
 
 class SegmentDelegatingMeta(BaseDelegator):
@@ -48,7 +50,7 @@ class SegmentDelegatingMeta(BaseDelegator):
         `Well`. Otherwise, aggregate the `Well` and call the method."""
         @wraps(getattr(WellSegment, name))
         def delegator(self, *args, aggregate=True, **kwargs):
-            segments = [self.aggregated_segment] if aggregate else self.iter_level()
+            segments = [self._get_aggregated_segment()] if aggregate else self.iter_level()  # pylint: disable=protected-access
             for segment in segments:
                 getattr(segment, name)(*args, **kwargs)
             return self
@@ -71,12 +73,16 @@ class SegmentDelegatingMeta(BaseDelegator):
 def add_segment_properties(cls):
     """Add missing properties of `WellSegment` to `Well`."""
     properties = (WellSegment.attrs_depth_index + WellSegment.attrs_fdtd_index +
-                  WellSegment.attrs_no_index + WellSegment.attrs_image)
+                  WellSegment.attrs_no_index + WellSegment.attrs_image +
+                  tuple(attr + "_mask" for attr in WellSegment.attrs_image))
+    image_properties = WellSegment.attrs_image + tuple(attr + "_mask" for attr in WellSegment.attrs_image)
     for attr in properties:
         if hasattr(cls, attr):
             continue
-        def prop(self, attr=attr):
-            return getattr(self.aggregated_segment, attr)
+        def prop(self, attr=attr, images=attr in image_properties):
+            val = getattr(self._get_aggregated_segment(images=images), attr)  # pylint: disable=protected-access
+            # Tables of the cached aggregated segment are copied to keep it intact on inplace changes
+            return val if val is None or images else val.copy()
         setattr(cls, attr, property(prop))
     return cls
 
@@ -111,18 +117,54 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
         - `samples_dl` and `samples_uv` (optional) - directories, containing
           daylight and ultraviolet images of core samples respectively. Images
           of the same sample must have the same name in both dirs.
-        - Optional `.csv`, `.las` or `.feather` file for certain segment
-          attributes (see more details in the `WellSegment.Attributes`
+        - Optional `.csv`, `.las`, `.feather` or `.arrow` file for certain
+          segment attributes (see more details in the `WellSegment.Attributes`
           section).
+        Alternatively, a path to a packed `.pfw` well file.
     core_width : positive float, optional
         The width of core samples in cm. Defaults to 10 cm.
     pixels_per_cm : positive float, optional
         The number of pixels in cm used to determine the loaded width of core
         sample images. Image height is calculated so as to keep the aspect
         ratio. Defaults to 5 pixels.
+    core_workers : positive int or None, optional
+        The number of threads to decode and resize core sample images of
+        each segment with. If 1, samples are loaded sequentially. If `None`,
+        the default number of workers of `ThreadPoolExecutor` is used.
+        Defaults to `None`.
+    core_resample : str, optional
+        A name of the `PIL` filter to resize core sample images with: one of
+        "nearest", "box", "bilinear", "hamming", "bicubic" or "lanczos".
+        Defaults to "lanczos".
+    core_dtype : {"float32", "uint8"}, optional
+        The dtype of loaded core images. If "uint8", rows of core images, not
+        covered by any sample image, are filled with zeros and covered rows
+        are marked in `core_dl_mask` and `core_uv_mask` segment attributes
+        instead of filling uncovered rows with `numpy.nan`. Defaults to
+        "float32".
+    core_fast_decode : bool, optional
+        Specifies whether to decode JPEG sample images at a reduced scale
+        using `PIL` draft mode. Faster, but resulting pixels may slightly
+        differ from those of a fully decoded image. Defaults to `False`.
     validate : bool, optional
         Specifies whether to check well data for correctness and consistency.
         Slightly reduces processing speed. Defaults to `True`.
+    cache : bool or str, optional
+        Specifies whether to cache a binary columnar copy of `.las` and `.csv`
+        files the first time they are parsed. If `True`, cache files are
+        stored in a `.cache` subdirectory of the well directory. If `str`, a
+        path to a directory to store cache files of all wells in. Core
+        images are also cached as memory-mapped strips, rendered once per
+        image parameters. Defaults to `False`.
+    shared_cache : bool, optional
+        Specifies whether to share loaded table attributes and core images
+        between processes on the same node through shared memory. Shared
+        attributes are read-only. Requires Python 3.8 or later and a POSIX
+        system. Defaults to `False`.
+    catalog : WellCatalog or None, optional
+        A catalog of the field, containing the well. If given, well metadata
+        and directory listings are taken from the catalog instead of the file
+        system. Defaults to `None`.
     segments : list of WellSegment or Well instances or None, optional
         Segments to put into `segments` attribute. Usually is used by methods
         which increase the tree depth. If `None`, `path` must be defined.
@@ -149,10 +191,44 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
 
     def __init__(self, *args, segments=None, **kwargs):
         super().__init__()
+        # A segment and `crop` arguments, if segments of the well are lazily created crops of the segment
+        self._lazy_crop = None
         if segments is None:
             self.segments = [WellSegment(*args, **kwargs)]
         else:
             self.segments = segments
+        # A tuple of the tree state with weak references to its data and the aggregated segment without images
+        self._aggregated_cache = None
+
+    def __getstate__(self):
+        """Drop the cached aggregated segment on copying and pickling."""
+        state = self.__dict__.copy()
+        state["_aggregated_cache"] = None
+        return state
+
+    @property
+    def segments(self):
+        """list of Well or WellSegment: Children of the well in the segment
+        tree. Lazy crops are created on the first access."""
+        if self._lazy_crop is not None:
+            segment, method, crop_args = self._lazy_crop
+            self._lazy_crop = None
+            self._segments = getattr(segment, method)(*crop_args)
+        return self._segments
+
+    @segments.setter
+    def segments(self, segments):
+        self._lazy_crop = None
+        self._segments = segments
+
+    @classmethod
+    def _from_lazy_crop(cls, segment, method, *crop_args):
+        """Create a well, whose segments are crops of a `segment`, created by
+        its `method` ("crop" or "crop_at") with `crop_args` on their first
+        access."""
+        well = cls(segments=[])
+        well._lazy_crop = (segment, method, crop_args)
+        return well
 
     @property
     def name(self):
@@ -170,7 +246,7 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
         `WellSegment` instances. Initial depth of a created `Well` is 2: a
         root and a single segment.
         """
-        if all(isinstance(item, WellSegment) for item in self):
+        if self._lazy_crop is not None or all(isinstance(item, WellSegment) for item in self):
             return 2
         return self.segments[0].tree_depth + 1
 
@@ -179,32 +255,160 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
         """float: Length of the well in centimeters."""
         return self.depth_to - self.depth_from
 
+    def _get_children_bounds(self):
+        """Get tops and bottoms of children of the well, whose children are
+        segments. Bounds of lazy crops are calculated without creating
+        them."""
+        if self._lazy_crop is not None:
+            segment, method, crop_args = self._lazy_crop
+            return segment._get_crop_bounds(method, *crop_args)  # pylint: disable=protected-access
+        depth_from = np.array([segment.depth_from for segment in self.segments if isinstance(segment, WellSegment)])
+        depth_to = np.array([segment.depth_to for segment in self.segments if isinstance(segment, WellSegment)])
+        return depth_from, depth_to
+
+    def _get_parent_levels(self):
+        """Flatten the segment tree into levels by `_get_levels` down to the
+        parents of segments, so that lazy crops are not created."""
+        return self._get_levels(n_levels=self.tree_depth - 1)
+
+    def _get_leaf_bounds(self):
+        """Get tops and bottoms of all segments at the last level of the
+        segment tree without creating lazy crops."""
+        levels, _ = self._get_parent_levels()
+        bounds = [well._get_children_bounds() for well in levels[-1]]  # pylint: disable=protected-access
+        depth_from = np.concatenate([np.zeros(0, dtype=np.int64)] + [depth_from for depth_from, _ in bounds])
+        depth_to = np.concatenate([np.zeros(0, dtype=np.int64)] + [depth_to for _, depth_to in bounds])
+        return depth_from, depth_to
+
     @property
     def depth_from(self):
         """float: Top of the well in centimeters."""
-        return min([well.depth_from for well in self])
+        depth_from, _ = self._get_leaf_bounds()
+        if len(depth_from) == 0:
+            raise ValueError("Well has no segments")
+        return depth_from.min().item()
 
     @property
     def depth_to(self):
         """float: Bottom of the well in centimeters."""
-        return max([well.depth_to for well in self])
+        _, depth_to = self._get_leaf_bounds()
+        if len(depth_to) == 0:
+            raise ValueError("Well has no segments")
+        return depth_to.max().item()
 
     @property
     def n_segments(self):
         """int: Total number of `WellSegment` instances at the last level of
         the segment tree."""
-        return len(self.iter_level())
+        return len(self._get_leaf_bounds()[0])
+
+    @property
+    def nbytes(self):
+        """int: Total size of loaded tables and core images of all segments
+        in bytes."""
+        return sum(segment.nbytes for segment in self)
 
     @property
     def aggregated_segment(self):
-        """WellSegment: The only segment of an aggregated copy of the well."""
-        return self.deepcopy().aggregate().segments[0]
+        """WellSegment: The only segment of an aggregated copy of the well.
+        It is created on each access."""
+        return self._get_aggregated_segment(images=True)
+
+    def _get_state(self):
+        """Get the state of the segment tree. See `WellSegment._get_state`
+        for details."""
+        states = [segment._get_state() for segment in self.iter_level()]  # pylint: disable=protected-access
+        bounds = tuple(bound for segment_bounds, _ in states for bound in segment_bounds)
+        data = tuple(self.iter_level()) + tuple(item for _, segment_data in states for item in segment_data)
+        return bounds, data
+
+    @staticmethod
+    def _is_same_data(refs, data):
+        """Check whether weak references `refs` point to objects of `data`.
+        Dead references never match, so freed objects are not confused with
+        new ones, created at the same address."""
+        if len(refs) != len(data):
+            return False
+        return all(item is None if ref is None else ref() is item for ref, item in zip(refs, data))
+
+    def _get_aggregated_segment(self, images=True):
+        """Get the only segment of an aggregated copy of the well.
+
+        A segment without images is cached until the segment tree, depth
+        ranges or loaded attributes of its segments change. The cache holds
+        only weak references to the data of the tree, so it doesn't keep
+        replaced attributes in memory. Aggregated images are never cached,
+        since they take as much memory as the images of all segments.
+
+        Parameters
+        ----------
+        images : bool, optional
+            Whether core images should be aggregated. If `False`, loaded
+            images are neither copied nor aggregated, so the resulting segment
+            should be used only to get table attributes. If `True`, the
+            segment is created on each call. Defaults to `True`.
+
+        Returns
+        -------
+        segment : WellSegment
+            Aggregated segment.
+        """
+        bounds, data = self._get_state()
+        if not images and self._aggregated_cache is not None:
+            cached_bounds, cached_refs, segment = self._aggregated_cache
+            if cached_bounds == bounds and self._is_same_data(cached_refs, data):
+                return segment
+
+        memo = {SHARE_DATA_MEMO_KEY: True}
+        if not images:
+            # Make deepcopy replace loaded images with None, so that they are not copied and aggregated
+            for segment in self.iter_level():
+                for attr in segment._core_attrs:  # pylint: disable=protected-access
+                    img = getattr(segment, "_" + attr)
+                    if img is not None:
+                        memo[id(img)] = None
+        segment = deepcopy(self, memo).aggregate().segments[0]
+        if not images:
+            refs = tuple(None if item is None else weakref.ref(item) for item in data)
+            self._aggregated_cache = (bounds, refs, segment)
+        return segment
 
     def __iter__(self):
         """Iterate over segments."""
         for segment in self.segments:
             yield segment
 
+    def _get_levels(self, n_levels=None):
+        """Flatten the segment tree into levels by a single breadth-first
+        traversal.
+
+        Parameters
+        ----------
+        n_levels : positive int or None, optional
+            The number of levels to flatten. If `None`, all levels are
+            flattened. Defaults to `None`.
+
+        Returns
+        -------
+        levels : list of lists
+            Nodes of the tree at each level in left-to-right order. The
+            first level contains only `self`.
+        parents : list of 1-D ndarrays
+            Positions of parents of nodes at each level except the first one
+            in the previous level.
+        """
+        levels = [[self]]
+        parents = []
+        # All nodes at the same level have the same type, since all segments are at the last level
+        while (n_levels is None or len(levels) < n_levels) and isinstance(levels[-1][0], Well):
+            wells = levels[-1]
+            children = list(chain.from_iterable(well.segments for well in wells))
+            if not children:
+                break
+            levels.append(children)
+            parents.append(np.repeat(np.arange(len(wells)), [len(well.segments) for well in wells]))
+        return levels, parents
+
     def iter_level(self, level=-1):
         """Iterate over segments at some fixed level of the segment tree.
 
@@ -225,14 +429,36 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
             return [self]
         if level == 1:
             return self.segments
-        return [item for well in self for item in well.iter_level(level - 1)]
+        levels, _ = self._get_levels(n_levels=level + 1)
+        return levels[level] if level < len(levels) else []
 
     def _prune(self):
-        """Recursively prune segment tree."""
-        self.segments = [well for well in self if isinstance(well, WellSegment) or well.n_segments > 0]
-        for well in self:
-            if isinstance(well, Well):
-                well._prune() # pylint: disable=protected-access
+        """Prune segment tree. The numbers of segments in all subtrees are
+        counted bottom-up over flattened tree levels, so that the tree is
+        pruned in linear time. Lazy crops are counted without creating
+        them."""
+        levels, parents = self._get_parent_levels()
+        n_children = [len(well._get_children_bounds()[0]) for well in levels[-1]]  # pylint: disable=protected-access
+        self._prune_levels(levels, parents, n_children)
+
+    @staticmethod
+    def _prune_levels(levels, parents, n_leaf_segments):
+        """Prune flattened levels of a segment tree given the numbers of
+        segments in subtrees of the nodes at the last passed level."""
+        n_segments = [None] * (len(levels) - 1) + [np.asarray(n_leaf_segments, dtype=np.int64)]
+        for i in range(len(levels) - 2, -1, -1):
+            n_segments[i] = np.bincount(parents[i], weights=n_segments[i + 1], minlength=len(levels[i]))
+            n_segments[i] = n_segments[i].astype(np.int64)
+        for wells, children_n_segments in zip(levels[:-1], n_segments[1:]):
+            keep = children_n_segments > 0
+            if keep.all():
+                continue
+            pos = 0
+            for well in wells:
+                n_children = len(well.segments)
+                well.segments = [child for child, keep_child in zip(well.segments, keep[pos:pos+n_children])
+                                 if keep_child]
+                pos += n_children
 
     def prune(self):
         """Remove subtrees without `WellSegment` instances at the last level
@@ -258,17 +484,33 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
         """
         return copy(self)
 
-    def deepcopy(self):
+    def deepcopy(self, share_data=False):
         """Perform a deep copy of an object.
 
+        Parameters
+        ----------
+        share_data : bool, optional
+            If `True`, loaded tables and core images of segments are not
+            copied, but shared with the copy until the first inplace change of
+            either of them by well methods. Direct inplace changes of shared
+            attributes affect both wells. Defaults to `False`.
+
         Returns
         -------
         self : AbstractWell
             Deep copy.
         """
-        return deepcopy(self)
+        return deepcopy(self, {SHARE_DATA_MEMO_KEY: True} if share_data else None)
+
+    def _create_view(self, cache_entry=None):
+        """Create a copy of the well, whose segments are views of the
+        corresponding segments of the well. See `WellSegment._create_view`
+        for details."""
+        res = self.copy()
+        res.segments = [segment._create_view(cache_entry) for segment in self]  # pylint: disable=protected-access
+        return res
 
-    def dump(self, path):
+    def dump(self, path, table_format="feather", pack_core=True):
         """Dump well data. First the well is aggregated and then the resulting
         segment is dumped. Segment attributes are saved in the following
         manner:
@@ -276,20 +518,29 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
           `meta.json` file.
         - `core_dl` and `core_uv` are not saved. Instead, `samples_dl` and
           `samples_uv` directories are copied if exist.
-        - All other attributes are dumped in feather format.
+        - All other attributes are dumped in `table_format` format.
+        If `table_format` is "packed", all the data is saved into a single
+        file `<name>.pfw` instead (see `WellSegment.dump` for details).
 
         Parameters
         ----------
         path : str
             A path to a directory, where well dir with the dump will be
             created.
+        table_format : {"feather", "arrow", "packed"}, optional
+            A format to dump table-based attributes in. `arrow` files are
+            uncompressed and are read through a memory map. Defaults to
+            "feather".
+        pack_core : bool, optional
+            Whether to store core images in a packed well file. Ignored for
+            other formats. Defaults to `True`.
 
         Returns
         -------
         self : AbstractWell
             Self unchanged.
         """
-        self.aggregated_segment.dump(path)
+        self._get_aggregated_segment().dump(path, table_format=table_format, pack_core=pack_core)
         return self
 
     def __getitem__(self, key):
@@ -329,15 +580,20 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
 
     def _check_segment_lengths(self, length):
         """Check that all segments of `self` are not shorter than `length`."""
-        if any(seg.length < length for seg in self.iter_level()):
+        depth_from, depth_to = self._get_leaf_bounds()
+        if np.any(depth_to - depth_from < length):
             err_msg = "A segment, shorter than {} exists. Try calling drop_short_segments first.".format(length)
             raise ValueError(err_msg)
 
-    def crop(self, length, step, drop_last=False, fill_value=0):
+    def crop(self, length, step, drop_last=False, fill_value=0, lazy=False):
         """Create crops from segments at the last level. All cropped segments
         have the same length and are cropped with some fixed step. The tree
         depth will be increased.
 
+        If `lazy` is `True`, cropped segments are not created until the
+        segment tree is accessed. Until then, data of crops can be obtained
+        by `crop_to_array` as arrays of windows without creating segments.
+
         Parameters
         ----------
         length : positive int or str
@@ -354,6 +610,9 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
             Defaults to `False`.
         fill_value : float, optional
             Value to fill padded part of `logs`. Defaults to 0.
+        lazy : bool, optional
+            Whether to postpone creation of cropped segments until the
+            segment tree is accessed. Defaults to `False`.
 
         Returns
         -------
@@ -365,18 +624,124 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
             self._check_segment_lengths(length)
         wells = self.iter_level(-2)
         for well in wells:
-            well.segments = [
-                Well(segments=segment.crop(length, step, drop_last, fill_value))
-                for segment in well
-            ]
+            if lazy:
+                well.segments = [Well._from_lazy_crop(segment, "crop", length, step, drop_last, fill_value)
+                                 for segment in well]
+            else:
+                well.segments = [
+                    Well(segments=segment.crop(length, step, drop_last, fill_value))
+                    for segment in well
+                ]
         return self
 
-    def random_crop(self, length, n_crops=1):
+    def crop_to_array(self, attrs="logs"):
+        """Get data of all segments at the last level of a cropped well as
+        arrays of windows.
+
+        Data of lazy crops, created by `crop` or `random_crop` with
+        `lazy=True`, is obtained from the cropped segments without creating
+        the crops themselves: windows of regular crops are strided views of
+        segment data and windows of random crops are gathered by fancy
+        indexing. Data of already created segments is stacked, so they must
+        have the same length. Their `logs` are reindexed to a regular grid
+        with `numpy.nan` for missing depths.
+
+        Parameters
+        ----------
+        attrs : str or list of str, optional
+            Attributes to get: "logs" and core images with their masks.
+            Defaults to "logs".
+
+        Returns
+        -------
+        depth_from : 1-D ndarray
+            Start depths of segments at the last level.
+        arrays : dict
+            A mapping from an attribute name to an array of its values for
+            all segments at the last level with shape `(n_segments, ...)`.
+            Values of `logs` of each segment are a `(n_depths, n_logs)`
+            array.
+        """
+        depth_from, arrays, _ = self._crops_to_array([self], attrs)
+        return depth_from, arrays
+
+    @staticmethod
+    def _crops_to_array(wells, attrs):
+        """Get data of all segments at the last level of `wells` as arrays of
+        windows, preallocated for all the wells. See `crop_to_array` for
+        details.
+
+        Returns
+        -------
+        depth_from : 1-D ndarray
+            Start depths of segments at the last level.
+        arrays : dict
+            A mapping from an attribute name to an array of its values.
+        well_indices : 1-D ndarray
+            Positions of wells in `wells`, which segments belong to.
+        """
+        attrs = to_list(attrs)
+        # Each chunk is either a lazy random crop to gather or already created arrays to copy
+        chunks = []
+        for i, well in enumerate(wells):
+            for subwell in well.iter_level(-2):
+                lazy_crop = subwell._lazy_crop  # pylint: disable=protected-access
+                if lazy_crop is not None and lazy_crop[1] == "crop_at":
+                    segment, _, (starts, length) = lazy_crop
+                    shapes = {attr: segment._get_crop_shape(attr, length) for attr in attrs}  # pylint: disable=protected-access
+                    chunks.append((i, np.asarray(starts), shapes, lazy_crop))
+                    continue
+                if lazy_crop is not None:
+                    segment, method, crop_args = lazy_crop
+                    starts, arrays = getattr(segment, method + "_to_array")(*crop_args, attrs=attrs)
+                else:
+                    segments = subwell.segments
+                    starts = np.array([segment.depth_from for segment in segments])
+                    arrays = {attr: np.stack([segment._get_crop_array(attr) for segment in segments])  # pylint: disable=protected-access
+                              for attr in attrs}
+                shapes = {attr: (arr.shape[1:], arr.dtype) for attr, arr in arrays.items()}
+                chunks.append((i, starts, shapes, arrays))
+        if not chunks:
+            raise ValueError("Wells have no segments")
+        if len(chunks) == 1 and isinstance(chunks[0][3], dict):
+            # Windows of a single chunk are returned as is to keep strided views of segment data
+            i, starts, _, arrays = chunks[0]
+            return starts, arrays, np.full(len(starts), i)
+
+        n_segments = sum(len(starts) for _, starts, _, _ in chunks)
+        arrays = {}
+        for attr in attrs:
+            shapes = {shape for _, _, chunk_shapes, _ in chunks for shape, _ in [chunk_shapes[attr]]}
+            if len(shapes) > 1:
+                raise ValueError("Windows of {} have different shapes: {}".format(attr, sorted(shapes)))
+            dtype = np.result_type(*[chunk_shapes[attr][1] for _, _, chunk_shapes, _ in chunks])
+            arrays[attr] = np.empty((n_segments,) + shapes.pop(), dtype=dtype)
+
+        pos = 0
+        for _, starts, _, data in chunks:
+            chunk_out = {attr: arr[pos:pos+len(starts)] for attr, arr in arrays.items()}
+            if isinstance(data, dict):
+                for attr, arr in data.items():
+                    chunk_out[attr][...] = arr
+            else:
+                segment, _, (crop_starts, length) = data
+                segment.crop_at_to_array(crop_starts, length, attrs=attrs, out=chunk_out)
+            pos += len(starts)
+        depth_from = np.concatenate([starts for _, starts, _, _ in chunks])
+        well_indices = np.concatenate([np.full(len(starts), i) for i, starts, _, _ in chunks])
+        return depth_from, arrays, well_indices
+
+    def random_crop(self, length, n_crops=1, lazy=False):
         """Create random crops from segments at the last level. All cropped
         segments have the same length, their positions are sampled uniformly
         from the segment. The tree depth will be increased. Branches of the
         tree without segments at last level will be dropped.
 
+        Segments are sampled with probabilities, proportional to their
+        lengths. If `lazy` is `True`, cropped segments are not created until
+        the segment tree is accessed. Until then, data of crops can be
+        obtained by `crop_to_array`.
+
         Parameters
         ----------
         length : positive int or str
@@ -384,29 +749,76 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
             a <value><units> format (e.g. "10m").
         n_crops : positive int, optional
             The number of crops from the well. Defaults to 1.
+        lazy : bool, optional
+            Whether to postpone creation of cropped segments until the
+            segment tree is accessed. Defaults to `False`.
 
         Returns
         -------
         self : AbstractWell
             The well with cropped segments.
         """
+        self._random_crop([self], length, n_crops, lazy)
+        return self
+
+    @staticmethod
+    def _random_crop(wells, length, n_crops=1, lazy=False):
+        """Create `n_crops` random crops from segments at the last level of
+        each of `wells`. Crop positions for all the wells are sampled in a
+        single vectorized pass. Lazy crops at the last level are created
+        only if they are chosen to be cropped, and branches of the trees
+        without crops are pruned without traversing lazy crops."""
         length = parse_depth(length, check_positive=True, var_name="length")
-        self._check_segment_lengths(length)
-        wells = self.iter_level(-2)
-        p = np.array([sum([segment.length for segment in item]) for item in wells])
-        random_wells = Counter(np.random.choice(wells, n_crops, p=p/sum(p)))
         for well in wells:
-            if well in random_wells:
-                n_well_crops = random_wells[well]
-                p = np.array([item.length for item in well])
-                random_segments = Counter(np.random.choice(well.segments, n_well_crops, p=p/sum(p)))
-                well.segments = [
-                    Well(segments=segment.random_crop(length, n_segment_crops))
-                    for segment, n_segment_crops in random_segments.items()
-                ]
+            well._check_segment_lengths(length)  # pylint: disable=protected-access
+        # Levels of each well down to parents of segments and bounds of segments of each parent
+        well_levels = [well._get_parent_levels() for well in wells]  # pylint: disable=protected-access
+        subwells = [subwell for levels, _ in well_levels for subwell in levels[-1]]
+        subwell_bounds = [subwell._get_children_bounds() for subwell in subwells]  # pylint: disable=protected-access
+        n_subwell_segments = np.array([len(bounds[0]) for bounds in subwell_bounds], dtype=np.int64)
+        depth_from = np.concatenate([np.zeros(0, dtype=np.int64)] + [bounds[0] for bounds in subwell_bounds])
+        depth_to = np.concatenate([np.zeros(0, dtype=np.int64)] + [bounds[1] for bounds in subwell_bounds])
+
+        # Sample segments of each well with probabilities, proportional to their lengths, by inverting
+        # cumulative lengths of segments of all wells
+        cum_lengths = np.cumsum(depth_to - depth_from)
+        subwell_wells = np.repeat(np.arange(len(wells)), [len(levels[-1]) for levels, _ in well_levels])
+        n_well_segments = np.bincount(subwell_wells, weights=n_subwell_segments, minlength=len(wells))
+        well_ends = np.cumsum(n_well_segments.astype(np.int64))
+        well_cum_to = cum_lengths[well_ends - 1]
+        well_cum_from = np.concatenate([[0], well_cum_to[:-1]])
+        uniform = np.random.uniform(size=(len(wells), n_crops))
+        points = well_cum_from[:, None] + uniform * (well_cum_to - well_cum_from)[:, None]
+        positions = np.searchsorted(cum_lengths, points.ravel(), side="right")
+        positions = np.minimum(positions, np.repeat(well_ends - 1, n_crops))
+
+        # Sample crop starts uniformly in chosen segments
+        crop_from = depth_from[positions]
+        crop_to = np.maximum(crop_from, depth_to[positions] - length)
+        starts = np.floor(np.random.uniform(crop_from, crop_to)).astype(int)
+        order = np.lexsort((starts, positions))
+        positions, starts = positions[order], starts[order]
+        segment_positions, split_indices = np.unique(positions, return_index=True)
+
+        # Get chosen segments before the segments of their parents are replaced by crops
+        segment_parents = np.repeat(np.arange(len(subwells)), n_subwell_segments)
+        segment_offsets = np.cumsum(n_subwell_segments) - n_subwell_segments
+        chosen_segments = [subwells[parent].segments[position - segment_offsets[parent]]
+                           for parent, position in zip(segment_parents[segment_positions].tolist(),
+                                                       segment_positions.tolist())]
+        for subwell in subwells:
+            subwell.segments = []
+        for segment_position, segment, segment_starts in zip(segment_positions.tolist(), chosen_segments,
+                                                             np.split(starts, split_indices[1:])):
+            segment_starts = segment_starts.tolist()
+            if lazy:
+                crop_well = Well._from_lazy_crop(segment, "crop_at", segment_starts, length)
             else:
-                well.segments = []
-        return self.prune()
+                crop_well = Well(segments=segment.crop_at(segment_starts, length))
+            subwells[segment_parents[segment_position]].segments.append(crop_well)
+        for levels, parents in well_levels:
+            n_subwell_crops = [len(subwell.segments) for subwell in levels[-1]]
+            Well._prune_levels(levels, parents, n_subwell_crops)
 
     def drop_short_segments(self, min_length):
         """Drop segments at the last level with length smaller than
@@ -430,53 +842,232 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
             well.segments = [segment for segment in well if segment.length >= min_length]
         return self.prune()
 
-    def _aggregate_array(self, func, attr):
+    def _aggregate_logs(self, func):
+        """Aggregate `logs` of segments on a regular depth grid with
+        `logs_step` step without their concatenation.
+
+        Values of each segment are accumulated into a preallocated grid by
+        their integer row offsets, ignoring `numpy.nan` values like
+        `pandas` aggregation does. Depths, missing in all segments, are
+        filled with `numpy.nan`.
+
+        Parameters
+        ----------
+        func : str or callable
+            Aggregation function. Only "mean", "max", "min" and "sum" are
+            supported.
+
+        Returns
+        -------
+        logs : pandas.DataFrame or None
+            Aggregated `logs` or `None` if `func` is not supported or `logs`
+            of segments have different columns, non-float values or depths,
+            not aligned with a common grid. Such `logs` must be aggregated by
+            `pandas`.
+        """
+        if not isinstance(func, str) or func not in {"mean", "max", "min", "sum"}:
+            return None
+        logs = [segment.logs for segment in self.segments]
+        columns = logs[0].columns
+        if any(not df.columns.equals(columns) for df in logs):
+            return None
+        logs = [df for df in logs if len(df) > 0]
+        if not logs:
+            return None
+        # Logs are usually stored in a single block, so their values are obtained without copying
+        values = [df.to_numpy() for df in logs]
+        if any(arr.dtype.kind != "f" for arr in values):
+            return None
+
+        step = self.segments[0].logs_step
+        depths = [df.index.values for df in logs]
+        depth_from = min(depth.min() for depth in depths)
+        rows = []
+        for depth in depths:
+            offsets = depth - depth_from
+            if np.any(offsets % step):
+                return None
+            rows.append(offsets // step)
+        n_rows = max(df_rows.max() for df_rows in rows) + 1
+        dtype = np.result_type(*values)
+
+        is_present = np.zeros(n_rows, dtype=bool)
+        reduce_func = np.fmax if func == "max" else np.fmin
+        counts = None
+        if func in {"max", "min"}:
+            res = np.full((n_rows, len(columns)), np.nan, dtype=dtype)
+        else:
+            res = np.zeros((n_rows, len(columns)), dtype=np.float64)
+            counts = np.zeros((n_rows, len(columns)), dtype=np.int32)
+        for df_values, df_rows in zip(values, rows):
+            is_present[df_rows] = True
+            if func in {"max", "min"}:
+                res[df_rows] = reduce_func(res[df_rows], df_values)
+                continue
+            is_nan = np.isnan(df_values)
+            res[df_rows] += np.where(is_nan, 0, df_values)
+            if func == "mean":
+                counts[df_rows] += ~is_nan
+
+        if func == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                res = res / counts
+        res[~is_present] = np.nan
+        index = pd.RangeIndex(depth_from, depth_from + n_rows * step, step, name="DEPTH")
+        return pd.DataFrame(res.astype(dtype, copy=False), index=index, columns=columns)
+
+    @staticmethod
+    def _get_row_weights(weights, image):
+        """Get weights of `image` rows for weighted mean aggregation,
+        reshaped to be broadcastable to the image."""
+        row_weights = np.asarray(weights(len(image)), dtype=np.float32)
+        if row_weights.shape != (len(image),):
+            raise ValueError("weights must return a 1-D array with a weight for each image row")
+        return row_weights.reshape(-1, *([1] * (image.ndim - 1)))
+
+    def _aggregate_array(self, func, attr, weights=None, chunk_size=1024):
         """Aggregate loaded attributes from `WellSegment.attrs_image`.
 
+        Images in "float32" `core_dtype` are aggregated ignoring `numpy.nan`
+        values. Images in "uint8" `core_dtype` are aggregated only over rows,
+        covered by core samples according to their masks. The mean of such
+        images is rounded to the nearest integer.
+
+        Images are accumulated in place in an array of at least "float32"
+        precision, the number of aggregated values is counted in the
+        smallest unsigned integer type, that can't overflow. Segment images
+        are processed by chunks of rows to limit the size of temporary
+        arrays.
+
         Parameters
         ----------
-        func : {"mean", "max"}
+        func : {"mean", "max", "min"}
             Name of an aggregation function.
         attr : str
             Name of an image attribute to aggregate.
+        weights : callable or None, optional
+            A function, that takes the number of rows of a segment image and
+            returns a 1-D array of their weights for weighted mean
+            aggregation (e.g. `numpy.hanning`). If `None`, all rows have the
+            same weight. Defaults to `None`.
+        chunk_size : positive int, optional
+            The number of rows of a segment image to process at once.
+            Defaults to 1024.
 
         Returns
         -------
-        numpy.ndarray
+        image : numpy.ndarray
             Aggregated image.
+        mask : numpy.ndarray or None
+            A mask of aggregated image rows, covered by core samples, for
+            images in "uint8" `core_dtype` or `None` otherwise.
         """
-        if getattr(self.iter_level()[0], '_' + attr) is None:
-            return None
-        if func not in ["mean", "max"]:
-            warnings.warn("Only 'mean' and 'max' aggregations are currently supported for image attributes, \
+        segments = self.iter_level()
+        if getattr(segments[0], '_' + attr) is None:
+            return None, None
+        if func not in ["mean", "max", "min"]:
+            warnings.warn("Only 'mean', 'max' and 'min' aggregations are currently supported for image attributes, \
                           but {} was given. It was replaced by 'mean'.".format(func))
             func = "mean"
 
-        pixels_per_cm = self.iter_level()[0].pixels_per_cm
+        if getattr(segments[0], '_' + attr + '_mask') is not None:
+            return self._aggregate_masked_array(func, attr, weights, chunk_size)
+
+        pixels_per_cm = segments[0].pixels_per_cm
         agg_array_height_pix = round((self.depth_to - self.depth_from) * pixels_per_cm)
-        attr_val_shape = getattr(self.iter_level()[0], "_" + attr).shape
+        attr_val_0 = getattr(segments[0], "_" + attr)
+        shape = (agg_array_height_pix, *attr_val_0.shape[1:])
+        dtype = np.promote_types(attr_val_0.dtype, np.float32)
+
+        reduce_func = np.fmax if func == "max" else np.fmin
+        total = None
+        if func == "mean":
+            background = np.zeros(shape, dtype=dtype)
+            # Total weights of non-nan values or their counts if weights are not given
+            total = np.zeros(shape, dtype=dtype if weights is not None else np.min_scalar_type(len(segments)))
+        else:
+            background = np.full(shape, np.nan, dtype=dtype)
 
-        total = np.zeros((agg_array_height_pix, *attr_val_shape[1:]), dtype=int)
-        background = np.full_like(total, np.nan, dtype=np.double)
-        for segment in self.iter_level():
+        for segment in segments:
             attr_val = getattr(segment, "_" + attr)
-            segment_place = slice(round((segment.depth_from - self.depth_from) * pixels_per_cm),
-                                  round((segment.depth_to - self.depth_from) * pixels_per_cm))
-
-            if func == "max":
-                background[segment_place] = np.fmax(background[segment_place], attr_val)
-                continue
-            if func == "mean":
-                background[segment_place] = np.nansum([background[segment_place], attr_val], axis=0)
-                total[segment_place] += 1
+            segment_start = round((segment.depth_from - self.depth_from) * pixels_per_cm)
+            row_weights = None if weights is None or func != "mean" else self._get_row_weights(weights, attr_val)
+            for chunk_start in range(0, len(attr_val), chunk_size):
+                chunk = attr_val[chunk_start:chunk_start+chunk_size]
+                chunk_place = slice(segment_start + chunk_start, segment_start + chunk_start + len(chunk))
+                chunk_background = background[chunk_place]
+                if func != "mean":
+                    reduce_func(chunk_background, chunk, out=chunk_background)
+                    continue
+                chunk_total = total[chunk_place]
+                is_valid = ~np.isnan(chunk) if chunk.dtype.kind == "f" else np.ones(chunk.shape, dtype=bool)
+                if row_weights is None:
+                    chunk_background += np.where(is_valid, chunk, 0)
+                    chunk_total += is_valid
+                else:
+                    chunk_weights = np.where(is_valid, row_weights[chunk_start:chunk_start+chunk_size], 0)
+                    chunk_background += np.where(is_valid, chunk, 0) * chunk_weights
+                    chunk_total += chunk_weights
+
+        if func == "mean":
+            # Pixels without non-nan values or with zero total weight become nan
+            with np.errstate(invalid="ignore", divide="ignore"):
+                np.divide(background, total, out=background)
+        return background, None
+
+    def _aggregate_masked_array(self, func, attr, weights=None, chunk_size=1024):
+        """Aggregate images from `WellSegment.attrs_image` in "uint8"
+        `core_dtype` over rows, covered by core samples. Segment images are
+        processed by chunks of `chunk_size` rows."""
+        segments = self.iter_level()
+        pixels_per_cm = segments[0].pixels_per_cm
+        agg_array_height_pix = round((self.depth_to - self.depth_from) * pixels_per_cm)
+        attr_val_shape = getattr(segments[0], "_" + attr).shape
+        shape = (agg_array_height_pix, *attr_val_shape[1:])
 
+        total = None
         if func == "max":
-            return background
-
-        total = np.where(total == 0, 1, total)
-        return background / total
-
-    def aggregate(self, func="mean", level=0):
+            background = np.zeros(shape, dtype=np.uint8)
+        elif func == "min":
+            background = np.full(shape, np.iinfo(np.uint8).max, dtype=np.uint8)
+        else:
+            background = np.zeros(shape, dtype=np.float32)
+            # Total weights of covered rows or their counts if weights are not given
+            total = np.zeros(agg_array_height_pix,
+                             dtype=np.float32 if weights is not None else np.min_scalar_type(len(segments)))
+        mask = np.zeros(agg_array_height_pix, dtype=bool)
+        for segment in segments:
+            attr_val = getattr(segment, "_" + attr)
+            attr_mask = getattr(segment, "_" + attr + "_mask")
+            segment_start = round((segment.depth_from - self.depth_from) * pixels_per_cm)
+            row_weights = None if weights is None or func != "mean" else self._get_row_weights(weights, attr_val)
+            for chunk_start in range(0, len(attr_val), chunk_size):
+                chunk = attr_val[chunk_start:chunk_start+chunk_size]
+                chunk_mask = attr_mask[chunk_start:chunk_start+chunk_size]
+                chunk_place = slice(segment_start + chunk_start, segment_start + chunk_start + len(chunk))
+                chunk_background = background[chunk_place]
+                if func == "max":
+                    chunk_background[chunk_mask] = np.maximum(chunk_background[chunk_mask], chunk[chunk_mask])
+                elif func == "min":
+                    chunk_background[chunk_mask] = np.minimum(chunk_background[chunk_mask], chunk[chunk_mask])
+                elif row_weights is None:
+                    chunk_background[chunk_mask] += chunk[chunk_mask]
+                    total[chunk_place][chunk_mask] += 1
+                else:
+                    chunk_weights = row_weights[chunk_start:chunk_start+chunk_size][chunk_mask]
+                    chunk_background[chunk_mask] += chunk[chunk_mask] * chunk_weights
+                    total[chunk_place][chunk_mask] += chunk_weights.ravel()
+                mask[chunk_place] |= chunk_mask
+
+        if func == "min":
+            background[~mask] = 0
+        elif func == "mean":
+            total = total.reshape(-1, *([1] * (background.ndim - 1)))
+            np.divide(background, np.where(total > 0, total, 1), out=background)
+            background = np.rint(background, out=background).astype(np.uint8)
+        return background, mask
+
+    def aggregate(self, func="mean", level=0, weights=None, chunk_size=1024):
         """Aggregate loaded attributes from `WellSegment.attrs_image` and
         `WellSegment.attrs_depth_index`. Concatenate loaded attributes from
         `WellSegment.attrs_fdtd_index`. As a result, a single segment is
@@ -489,15 +1080,29 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
         func : str, callable
             Function to use for aggregating the data.
             - `str` - short function name (e.g. `"max"`, `"min"`). See
-              `pd.aggregate` documentation.
+              `pd.aggregate` documentation. "mean", "max", "min" and "sum"
+              aggregations of `logs` on a regular depth grid are performed
+              without concatenation of segments' `logs`.
             - `callable` - a function which takes a `pd.Series` and returns a
                single element.
-            Only "mean" and "max" aggregations are currently supported for
-            attributes from `WellSegment.attrs_image`! Defaults to "mean".
+            Only "mean", "max" and "min" aggregations are currently supported
+            for attributes from `WellSegment.attrs_image`! Defaults to
+            "mean".
         level : int, optional
             The level of the well tree to which aggregation is performed. All
             segments of each subtree on this level will be gathered into one.
             Defaults to an aggregation of the whole tree.
+        weights : callable or None, optional
+            A function, that takes the number of rows of a segment image and
+            returns a 1-D array of their weights (e.g. `numpy.hanning`) to
+            perform weighted mean aggregation of attributes from
+            `WellSegment.attrs_image`. Can't be used with "max" and "min"
+            aggregations. `logs` and other tables are always aggregated
+            without weights. If `None`, all rows have the same weight.
+            Defaults to `None`.
+        chunk_size : positive int, optional
+            The number of rows of segment images to aggregate at once. Limits
+            the size of temporary arrays. Defaults to 1024.
 
         Returns
         -------
@@ -506,6 +1111,8 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
         """
         if level < -self.tree_depth or level == -1 or level >= self.tree_depth - 1:
             raise ValueError("Aggregation level can't be ({})".format(level))
+        if weights is not None and func in {"max", "min"}:
+            raise ValueError("weights can't be used with {} aggregation".format(func))
 
         aggregate_attrs = list(WellSegment.attrs_depth_index)
         concat_attrs = list(WellSegment.attrs_fdtd_index)
@@ -517,10 +1124,24 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
 
             # TODO: different aggregation functions
             for attr in WellSegment.attrs_image:
-                setattr(seg_0, "_" + attr, well._aggregate_array(func, attr))  # pylint: disable=protected-access
+                image, mask = well._aggregate_array(func, attr, weights, chunk_size)  # pylint: disable=protected-access
+                setattr(seg_0, "_" + attr, image)
+                setattr(seg_0, "_" + attr + "_mask", mask)
+
+            # Aggregate logs on a regular grid without concatenation if possible
+            kernel_attrs = set()
+            if "logs" in aggregate_attrs and any(segment._logs is not None for segment in well.segments):  # pylint: disable=protected-access
+                if weights is not None:
+                    warnings.warn("weights are applied only to core images, logs are aggregated without weights")
+                logs = well._aggregate_logs(func)  # pylint: disable=protected-access
+                if logs is not None:
+                    seg_0._logs = logs  # pylint: disable=protected-access
+                    kernel_attrs.add("logs")
 
             # Concatenate all segments' attributes
             for attr in aggregate_attrs + concat_attrs:
+                if attr in kernel_attrs:
+                    continue
                 attr_values = [getattr(segment, "_" + attr) for segment in well.segments]
                 if all(value is None for value in attr_values):
                     if attr in concat_attrs:
@@ -542,6 +1163,8 @@ class Well(AbstractWell, metaclass=SegmentDelegatingMeta):
                 setattr(seg_0, "_" + attr, attr_val_0)
 
             for attr in aggregate_attrs:
+                if attr in kernel_attrs:
+                    continue
                 attr_val_0 = getattr(seg_0, "_" + attr)
                 attr_val_0 = attr_val_0.groupby(level=0).agg(func)
 
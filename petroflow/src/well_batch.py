@@ -1,20 +1,51 @@
 """Implements WellBatch class."""
 # pylint: disable=abstract-method
 
+import inspect
 import traceback
 from functools import wraps
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 import numpy as np
 
 from ..batchflow import Batch, SkipBatchException, action, inbatch_parallel, any_action_failed
 from ..batchflow.batchflow.batch import MethodsTransformingMeta  # pylint: disable=import-error
 from .well import Well
+from .well_segment import WellSegment
 from .base_delegator import BaseDelegator
 from .abstract_classes import AbstractWell
 from .exceptions import SkipWellException
 
 
+# Names of keyword arguments of `Well.__init__`, which are passed to `WellSegment.__init__`
+WELL_KWARGS = frozenset(name for name, param in inspect.signature(WellSegment.__init__).parameters.items()
+                        if param.kind == param.KEYWORD_ONLY)
+
+# `Well.__init__` keyword arguments, shared by all wells, created in a worker process
+_worker_well_kwargs = {}
+
+
+def _create_well(path, **kwargs):
+    """Create a `Well`, returning raised exception instead of the well if
+    the creation fails."""
+    try:
+        return Well(path, **kwargs)
+    except Exception as err:  # pylint: disable=broad-except
+        return err
+
+
+def _init_worker(well_kwargs):
+    """Store `Well.__init__` keyword arguments in a worker process once, so
+    that they are not pickled for each created well."""
+    _worker_well_kwargs.update(well_kwargs)
+
+
+def _create_well_in_worker(path):
+    """Create a `Well` in a worker process with its stored arguments."""
+    return _create_well(path, **_worker_well_kwargs)
+
+
 class WellDelegatingMeta(BaseDelegator, MethodsTransformingMeta):
     """A metaclass to delegate calls to absent abstract methods of a
     `WellBatch` to `Well` objects in `wells` component."""
@@ -46,8 +77,25 @@ class WellBatch(Batch, AbstractWell, metaclass=WellDelegatingMeta):
         Unique identifiers of wells in the batch.
     preloaded : tuple, optional
         Data to put in the batch if given. Defaults to `None`.
+    init_target : {"threads", "mpc", "for"}, optional
+        Specifies how to create wells of the batch: in a pool of threads, in
+        a pool of processes or sequentially. Well creation is I/O-bound, so
+        threads are used by default. Errors are handled the same way for all
+        targets: wells, raised `SkipWellException`, are dropped from the
+        batch, and any other error fails batch creation. Defaults to
+        "threads".
+    init_workers : positive int or None, optional
+        The number of workers in the pool. If `None`, the default number of
+        workers of `concurrent.futures` executors is used. Defaults to
+        `None`.
+    well_cache : WellCache or None, optional
+        A cache of loaded wells. If given, the batch gets views of cached
+        wells and only wells, missing in the cache, are created and cached.
+        Defaults to `None`.
     kwargs : misc
-        Any additional named arguments to `Well.__init__`.
+        Any additional named arguments to `Well.__init__`. Only keyword
+        arguments of `WellSegment.__init__` are passed to created wells, all
+        other ones are passed to `Batch.__init__` only.
 
     Attributes
     ----------
@@ -71,15 +119,39 @@ class WellBatch(Batch, AbstractWell, metaclass=WellDelegatingMeta):
         match_core_logs="for",
     )
 
-    def __init__(self, index, *args, preloaded=None, **kwargs):
+    def __init__(self, index, *args, preloaded=None, init_target="threads", init_workers=None, well_cache=None,
+                 **kwargs):
         super().__init__(index, *args, preloaded=preloaded, **kwargs)
         if preloaded is None:
-            self._init_wells(**kwargs)
-
-    @inbatch_parallel(init="indices", post="_filter_assemble", target="for")
-    def _init_wells(self, index, **kwargs):
-        """Init a well with its path from batch index."""
-        return Well(self.index.get_fullpath(index), **kwargs)
+            well_kwargs = {key: val for key, val in kwargs.items() if key in WELL_KWARGS}
+            self._init_wells(init_target, init_workers, well_cache, **well_kwargs)
+
+    def _init_wells(self, target, n_workers, well_cache=None, **kwargs):
+        """Init wells with their paths from batch index, using a pool of
+        threads or processes depending on `target`. If `well_cache` is given,
+        only wells, missing in it, are created."""
+        paths = [self.index.get_fullpath(index) for index in self.indices]
+        results = [None] * len(paths) if well_cache is None else [well_cache.get(path, **kwargs) for path in paths]
+        missing = [i for i, res in enumerate(results) if res is None]
+        missing_paths = [paths[i] for i in missing]
+        if target == "for":
+            created = [_create_well(path, **kwargs) for path in missing_paths]
+        elif target == "threads":
+            with ThreadPoolExecutor(max_workers=n_workers) as executor:
+                futures = [executor.submit(_create_well, path, **kwargs) for path in missing_paths]
+            created = [future.exception() or future.result() for future in futures]
+        elif target == "mpc":
+            # Arguments, such as a catalog, are sent to each worker once instead of each well
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(kwargs,)) as executor:
+                futures = [executor.submit(_create_well_in_worker, path) for path in missing_paths]
+            created = [future.exception() or future.result() for future in futures]
+        else:
+            raise ValueError("Unknown well init target {}".format(target))
+        for i, well in zip(missing, created):
+            if well_cache is not None and isinstance(well, Well):
+                well = well_cache.put(paths[i], well, **kwargs)
+            results[i] = well
+        return self._filter_assemble(results)
 
     def _filter_assemble(self, results, *args, **kwargs):
         skip_mask = np.array([isinstance(res, SkipWellException) for res in results])
@@ -94,3 +166,63 @@ class WellBatch(Batch, AbstractWell, metaclass=WellDelegatingMeta):
         self.index = self.index.create_subset(self.indices[~skip_mask])  # pylint: disable=invalid-unary-operand-type, attribute-defined-outside-init, line-too-long
         self.wells = results    # pylint: disable=attribute-defined-outside-init
         return self
+
+    @action
+    def random_crop(self, length, n_crops=1, lazy=False):
+        """Create random crops from segments at the last level of each well.
+        All cropped segments have the same length, their positions are
+        sampled uniformly from the segment.
+
+        Crop positions for all wells of the batch are sampled in a single
+        vectorized pass instead of a separate sampling for each well.
+        Segments of a well are sampled with probabilities, proportional to
+        their lengths.
+
+        Parameters
+        ----------
+        length : positive int or str
+            Length of each crop in centimeters. If `str`, must be specified in
+            a <value><units> format (e.g. "10m").
+        n_crops : positive int, optional
+            The number of crops from each well. Defaults to 1.
+        lazy : bool, optional
+            Whether to postpone creation of cropped segments until the
+            segment tree is accessed. Data of lazy crops can be obtained by
+            `crop_to_array` without creating them. Defaults to `False`.
+
+        Returns
+        -------
+        self : AbstractWell
+            The batch with cropped wells.
+        """
+        Well._random_crop(self.wells, length, n_crops, lazy)  # pylint: disable=protected-access
+        return self
+
+    @action
+    def crop_to_array(self, attrs="logs", dst="crops"):
+        """Get data of all segments at the last level of cropped wells as
+        arrays of windows, preallocated for the whole batch. See
+        `Well.crop_to_array` for details.
+
+        Parameters
+        ----------
+        attrs : str or list of str, optional
+            Attributes to get: "logs" and core images with their masks.
+            Defaults to "logs".
+        dst : str, optional
+            A batch attribute to save a mapping from an attribute name to an
+            array of its windows for all crops of the batch into. Start
+            depths of crops and positions of their wells in the batch are
+            saved into `<dst>_depth_from` and `<dst>_wells` attributes.
+            Defaults to "crops".
+
+        Returns
+        -------
+        self : AbstractWell
+            The batch with gathered crops.
+        """
+        depth_from, arrays, well_indices = Well._crops_to_array(self.wells, attrs)  # pylint: disable=protected-access
+        setattr(self, dst, arrays)
+        setattr(self, dst + "_depth_from", depth_from)
+        setattr(self, dst + "_wells", well_indices)
+        return self
@@ -0,0 +1,170 @@
+"""Implements WellCache - an in-memory cache of loaded wells, that keeps them
+between epochs."""
+
+import os
+import threading
+from collections import OrderedDict
+
+
+class _CacheEntry:
+    """A handle of a cached well, passed to its views. Lazy loading of the
+    well data by views is performed under the `lock` of the entry, since
+    several threads may use views of the same well. After each load the size
+    of the well in the cache is updated."""
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        self.lock = threading.RLock()
+
+    def on_load(self):
+        """Update the size of the well in the cache after it loaded new
+        data."""
+        self.cache._on_load(self.key)  # pylint: disable=protected-access
+
+
+class WellCache:
+    """A per-process cache of loaded wells with a least recently used
+    eviction policy, bounded by the total size of well data.
+
+    A cached well is never changed by batch processing: each request returns
+    a view of the well, which shares all its loaded tables and core images.
+    Attributes, lazily loaded by a view at the same depth range, are stored
+    in the cached well, so that the following epochs don't load them again.
+    Shared attributes are copied by a view on their first inplace change, so
+    any actions can be safely applied to views.
+
+    Since wells load their data lazily after they are put into the cache,
+    the size of a cached well is updated each time it is requested or loads
+    new data and the limit is enforced at those moments. Lazy loading into a
+    cached well is guarded by a per-well lock.
+
+    Parameters
+    ----------
+    max_bytes : positive int
+        The maximum total size of loaded tables and core images of cached
+        wells in bytes.
+
+    Attributes
+    ----------
+    max_bytes : positive int
+        The maximum total size of cached wells in bytes.
+    nbytes : int
+        The current total size of cached wells in bytes.
+    hits : int
+        The number of requests, served from the cache.
+    misses : int
+        The number of requests for wells, that were missing in the cache.
+    """
+
+    def __init__(self, max_bytes):
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._wells = OrderedDict()
+        self._sizes = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._wells)
+
+    @staticmethod
+    def get_key(path, **kwargs):
+        """Get a cache key of a well, created with a given `path` and
+        `Well.__init__` arguments `kwargs`."""
+        return (os.path.abspath(path),) + tuple(sorted((key, repr(val)) for key, val in kwargs.items()))
+
+    def _evict(self):
+        """Remove least recently used wells until the total size of the
+        cache fits its limit."""
+        while self.nbytes > self.max_bytes and self._wells:
+            key, _ = self._wells.popitem(last=False)
+            self.nbytes -= self._sizes.pop(key)
+            del self._entries[key]
+
+    def _update_size(self, key):
+        """Update the size of a cached well, which could load new data."""
+        size = self._wells[key].nbytes
+        self.nbytes += size - self._sizes[key]
+        self._sizes[key] = size
+
+    def _on_load(self, key):
+        """Update the size of a cached well after it loaded new data and
+        enforce the limit."""
+        with self._lock:
+            if key not in self._wells:
+                return
+            self._update_size(key)
+            self._evict()
+
+    def get(self, path, **kwargs):
+        """Get a view of a cached well.
+
+        Parameters
+        ----------
+        path : str
+            A path to the well directory.
+        kwargs : misc
+            `Well.__init__` arguments, that the well was created with.
+
+        Returns
+        -------
+        well : Well or None
+            A view of the cached well or `None` if the well is not cached.
+        """
+        key = self.get_key(path, **kwargs)
+        with self._lock:
+            well = self._wells.get(key)
+            if well is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._wells.move_to_end(key)
+            self._update_size(key)
+            entry = self._entries[key]
+            self._evict()
+        return well._create_view(entry)  # pylint: disable=protected-access
+
+    def put(self, path, well, **kwargs):
+        """Put a well into the cache.
+
+        Parameters
+        ----------
+        path : str
+            A path to the well directory.
+        well : Well
+            A well to cache. It must not be changed afterwards.
+        kwargs : misc
+            `Well.__init__` arguments, that the well was created with.
+
+        Returns
+        -------
+        well : Well
+            A view of the cached well.
+        """
+        key = self.get_key(path, **kwargs)
+        with self._lock:
+            if key in self._wells:
+                del self._wells[key]
+                self.nbytes -= self._sizes.pop(key)
+            entry = _CacheEntry(self, key)
+            self._wells[key] = well
+            self._sizes[key] = 0
+            self._entries[key] = entry
+            self._update_size(key)
+            self._evict()
+        return well._create_view(entry)  # pylint: disable=protected-access
+
+    def clear(self):
+        """Remove all wells from the cache and reset its counters."""
+        with self._lock:
+            self._wells.clear()
+            self._sizes.clear()
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
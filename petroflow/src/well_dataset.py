@@ -2,6 +2,8 @@
 
 from ..batchflow import Dataset, FilesIndex
 from .well_batch import WellBatch
+from .catalog import WellCatalog
+from .well_cache import WellCache
 
 
 class WellDataset(Dataset):
@@ -13,7 +15,8 @@ class WellDataset(Dataset):
     ----------
     index : DatasetIndex or None, optional
         Unique identifiers of wells in a dataset. If `index` is not given, it
-        is constructed by instantiating `FilesIndex` with passed `kwargs`.
+        is constructed by instantiating `FilesIndex` with passed `kwargs` or
+        from the `catalog` if it is given.
     batch_class : type, optional
         A class of batches, generated by a dataset. Must be inherited from
         `Batch`.
@@ -24,11 +27,52 @@ class WellDataset(Dataset):
         `False`, preloaded data will be updated each time an inplace method of
         a `Well` is called which is usually an undesirable behavior. Defaults
         to `True`.
+    catalog : WellCatalog or str or None, optional
+        A catalog of the field or a path to the field directory to load or
+        build the catalog for. If given, the dataset index is created from the
+        catalog without scanning the field directory, and wells in all
+        generated batches take their metadata and directory listings from the
+        catalog. Defaults to `None`.
+    init_target : {"threads", "mpc", "for"}, optional
+        Specifies whether to create wells of generated batches in a pool of
+        threads, in a pool of processes or sequentially. See `WellBatch` for
+        more details. Defaults to "threads".
+    init_workers : positive int or None, optional
+        The number of workers to create wells of generated batches with. If
+        `None`, the default number of workers of `concurrent.futures`
+        executors is used. Defaults to `None`.
+    well_cache : WellCache or positive int or None, optional
+        A cache of loaded wells to keep them between epochs or the maximum
+        size of such a cache in bytes. If given, wells of generated batches
+        are taken from the cache, and those missing in it are created and
+        cached. Batches get copy-on-write views of cached wells, so their
+        processing doesn't change cached data. Defaults to `None`.
     kwargs : misc, optional
         Additional keyword arguments to `FilesIndex.__init__`.
     """
 
-    def __init__(self, index=None, batch_class=WellBatch, preloaded=None, copy=True, **kwargs):
+    def __init__(self, index=None, batch_class=WellBatch, preloaded=None, copy=True, catalog=None,
+                 init_target="threads", init_workers=None, well_cache=None, **kwargs):
+        if isinstance(catalog, str):
+            catalog = WellCatalog(catalog)
+        if isinstance(well_cache, int):
+            well_cache = WellCache(well_cache)
         if index is None:
-            index = FilesIndex(**kwargs)
-        super().__init__(index, batch_class=batch_class, preloaded=preloaded, copy=copy, **kwargs)
+            if catalog is not None:
+                paths = catalog.paths
+                index = FilesIndex(index=sorted(paths), paths=paths, dirs=True)
+            else:
+                index = FilesIndex(**kwargs)
+        super().__init__(index, batch_class=batch_class, preloaded=preloaded, copy=copy, catalog=catalog,
+                         init_target=init_target, init_workers=init_workers, well_cache=well_cache, **kwargs)
+
+    def create_batch(self, index, pos=False, *args, **kwargs):
+        """Create a batch from given indices, passing the dataset catalog,
+        well cache and well creation parameters to it."""
+        # pylint: disable=no-member
+        kwargs.setdefault("init_target", self.init_target)
+        kwargs.setdefault("init_workers", self.init_workers)
+        kwargs.setdefault("well_cache", self.well_cache)
+        if self.catalog is not None:
+            kwargs.setdefault("catalog", self.catalog)
+        return super().create_batch(index, pos, *args, **kwargs)
@@ -1,6 +1,6 @@
 """Implements WellSegment - a class, representing a contiguous part of a well.
 """
-# pylint: disable=no-member, protected-access
+# pylint: disable=no-member, protected-access, too-many-instance-attributes
 
 import os
 import re
@@ -9,31 +9,48 @@ import base64
 import shutil
 import warnings
 from copy import copy, deepcopy
-from glob import glob
 from functools import reduce
 from itertools import chain, repeat
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import pandas as pd
-import lasio
-import PIL
-from scipy.interpolate import interp1d
-from sklearn.linear_model import LinearRegression
-import cv2
-from plotly import graph_objs as go
-from plotly.subplots import make_subplots
-from plotly.offline import init_notebook_mode, plot, iplot
 
 from .abstract_classes import AbstractWellSegment
 from .matching import select_contigious_intervals, match_boring_sequence, find_best_shifts, create_zero_shift
 from .joins import cross_join, between_join, fdtd_join
-from .utils import to_list, process_columns, parse_depth, map_values, fill_intervals
+from .utils import (to_list, process_columns, parse_depth, map_values, fill_intervals, get_overlapping_slice,
+                    CopyableWeakRef, dump_atomic)
+from .cache import get_cache_dir, get_file_stamp, load_cached_df, load_cached_arrays, dump_cached_arrays
+from .shared_cache import get_block_name, get_shared_arrays
+from .las_io import read_las
+from .packed_io import PACKED_EXT, PackedWell, is_packed, write_packed
+from .arrow_io import read_arrow, write_arrow, dump_arrow_buffer, get_arrow_columns
+from .directory_index import DirectoryIndex
 from .exceptions import SkipWellException, DataRegularityError
 
 
 pd.options.mode.chained_assignment = None
 
 
+# A key of a `deepcopy` memo, that makes copied segments share loaded data with the original ones
+SHARE_DATA_MEMO_KEY = "petroflow_share_data"
+
+# Names of PIL filters to resize core sample images with. Filters are
+# looked up in `PIL.Image` on use, since `PIL` is imported lazily.
+RESAMPLE_FILTERS = {
+    "nearest": "NEAREST",
+    "box": "BOX",
+    "bilinear": "BILINEAR",
+    "hamming": "HAMMING",
+    "bicubic": "BICUBIC",
+    "lanczos": "LANCZOS",
+}
+
+# Supported dtypes of core images
+CORE_DTYPES = ("float32", "uint8")
+
+
 def add_attr_properties(cls):
     """Add missing properties for lazy loading of `WellSegment` table-based
     attributes."""
@@ -41,7 +58,7 @@ def add_attr_properties(cls):
         if hasattr(cls, attr):
             continue
         def prop(self, attr=attr):
-            if getattr(self, "_" + attr) is None:
+            if getattr(self, "_" + attr) is None and not self._load_from_source(attr):
                 getattr(self, "load_" + attr)()
             return getattr(self, "_" + attr)
         setattr(cls, attr, property(prop))
@@ -92,6 +109,21 @@ class WellSegment(AbstractWellSegment):
     `core_dl` and `core_uv` attributes are loaded either by accessing them for
     the first time, or by calling `load_core` method.
 
+    `.arrow` files are uncompressed Arrow IPC files, which are read through
+    a memory map. Numeric columns of loaded attributes are not copied into
+    process memory, so several processes, reading the same well, share the
+    same physical pages. Such columns are read-only and slicing a segment
+    along the wellbore keeps them shared. Depth-indexed tables in `.arrow`
+    files are stored in chunks with known depth ranges, so that lazy loading
+    of a short segment reads only chunks, overlapping with it. `.arrow` files
+    can be created by `dump` with `table_format="arrow"`.
+
+    A well can also be stored in a single packed `.pfw` file, created by
+    `dump` with `table_format="packed"`. In this case, `path` is a path to
+    the file. Each table and each block of rows of stored core images is
+    compressed separately, so that loading of an attribute or of core images
+    of a short segment reads only the corresponding blocks.
+
     Depth and length values in all the attributes are assumed to be stored in
     centimeters for all formats, except for `.las`, where depths units are
     assumed to be meters and are converted to centimeters by the `load_las`
@@ -111,17 +143,62 @@ class WellSegment(AbstractWellSegment):
         - `samples_dl` and `samples_uv` (optional) - directories, containing
           daylight and ultraviolet images of core samples respectively. Images
           of the same sample must have the same name in both dirs.
-        - Optional `.csv`, `.las` or `.feather` file for certain class
-          attributes (see more details in the `Attributes` section).
+        - Optional `.csv`, `.las`, `.feather` or `.arrow` file for certain
+          class attributes (see more details in the `Attributes` section).
+        Alternatively, a path to a packed `.pfw` well file.
     core_width : positive float, optional
         The width of core samples in cm. Defaults to 10 cm.
     pixels_per_cm : positive float, optional
         The number of pixels in cm used to determine the loaded width of core
         sample images. Image height is calculated so as to keep the aspect
         ratio. Defaults to 5 pixels.
+    core_workers : positive int or None, optional
+        The number of threads to decode and resize core sample images with.
+        If 1, samples are loaded sequentially. If `None`, the default number
+        of workers of `ThreadPoolExecutor` is used. Defaults to `None`.
+    core_resample : str, optional
+        A name of the `PIL` filter to resize core sample images with: one of
+        "nearest", "box", "bilinear", "hamming", "bicubic" or "lanczos".
+        Defaults to "lanczos".
+    core_dtype : {"float32", "uint8"}, optional
+        The dtype of loaded core images. If "float32", rows of core images,
+        not covered by any sample image, are filled with `numpy.nan`. If
+        "uint8", such rows are filled with zeros and covered rows are marked
+        in `core_dl_mask` and `core_uv_mask` attributes, which takes 4 times
+        less memory. Defaults to "float32".
+    core_fast_decode : bool, optional
+        Specifies whether to decode JPEG sample images at a reduced scale,
+        that still exceeds the resulting image size, using `PIL` draft mode.
+        Significantly speeds up core loading, but resulting pixels may
+        slightly differ from those of a fully decoded image. Defaults to
+        `False`.
     validate : bool, optional
         Specifies whether to check well data for correctness and consistency.
         Slightly reduces processing speed. Defaults to `True`.
+    cache : bool or str, optional
+        Specifies whether to cache a binary columnar copy of `.las` and `.csv`
+        files the first time they are parsed. Later loads of these files will
+        read the cached copy through a memory map until the source file is
+        changed. If `True`,
+        cache files are stored in a `.cache` subdirectory of the well
+        directory. If `str`, a path to a directory to store cache files of
+        all wells in. The cache is used only if a file is loaded without any
+        additional loader arguments. Core images of all well samples are
+        also cached as memory-mapped strips for each set of image parameters
+        (see `build_core_cache`). Defaults to `False`.
+    shared_cache : bool, optional
+        Specifies whether to share loaded table attributes and core images
+        between processes on the same node through shared memory. The first
+        process to load a file publishes its content, others map it with zero
+        copies. Shared attributes are read-only. Blocks are removed when the
+        last process, using them, exits. Requires Python 3.8 or later and a
+        POSIX system. Defaults to `False`.
+    catalog : WellCatalog or None, optional
+        A catalog of the field, containing the well. If given and the well is
+        in the catalog, its metadata and directory listings are taken from
+        the catalog instead of reading `meta.json` and scanning well
+        directories. The catalog must be up to date with well directories.
+        Defaults to `None`.
 
     Attributes
     ----------
@@ -194,6 +271,14 @@ class WellSegment(AbstractWellSegment):
         `core_uv` values are equal to `numpy.nan`. Loaded from images in
         `samples_uv` directory, requires `samples` file to exist in the well
         directory.
+    core_dl_mask : numpy.ndarray
+        A boolean mask of `core_dl` rows, covered by core sample images. It
+        is stored along with `core_dl` if `core_dtype` is "uint8" and is
+        calculated from `numpy.nan` values of `core_dl` otherwise.
+    core_uv_mask : numpy.ndarray
+        A boolean mask of `core_uv` rows, covered by core sample images. It
+        is stored along with `core_uv` if `core_dtype` is "uint8" and is
+        calculated from `numpy.nan` values of `core_uv` otherwise.
     """
 
     attrs_depth_index = ("logs", "core_properties", "core_logs")
@@ -201,16 +286,43 @@ class WellSegment(AbstractWellSegment):
     attrs_no_index = ("inclination",)
     attrs_image = ("core_uv", "core_dl")
 
-    def __init__(self, path, *args, core_width=10, pixels_per_cm=5, validate=True, **kwargs):
+    # core images and their masks, which are loaded together
+    _core_attrs = ("core_dl", "core_uv", "core_dl_mask", "core_uv_mask")
+
+    # tables and core images, which are shared between copies of a segment until their inplace change
+    _data_attrs = attrs_depth_index + attrs_fdtd_index + attrs_no_index + _core_attrs
+
+    # extensions of files, whose parsed copies are cached if `cache` is enabled
+    cached_exts = ("las", "csv")
+
+    def __init__(self, path, *args, core_width=10, pixels_per_cm=5, core_workers=None, core_resample="lanczos",
+                 core_dtype="float32", core_fast_decode=False, validate=True, cache=False, shared_cache=False,
+                 catalog=None, **kwargs):
         super().__init__()
         _ = args, kwargs
         self.path = path
         self.core_width = core_width
         self.pixels_per_cm = pixels_per_cm
+        self.core_workers = core_workers
+        self.core_resample = core_resample
+        self.core_dtype = core_dtype
+        self.core_fast_decode = core_fast_decode
         self.validate = validate
-
-        with open(os.path.join(self.path, "meta.json")) as meta_file:
-            meta = json.load(meta_file)
+        self.cache = cache
+        self.shared_cache = shared_cache
+
+        self._packed = PackedWell(self.path) if is_packed(self.path) else None
+        entry = None if catalog is None else catalog.get_entry(self.path)
+        if self._packed is not None:
+            self._files_index = self._get_packed_files_index()
+            meta = self._packed.meta
+        elif entry is None:
+            self._files_index = DirectoryIndex()
+            with open(os.path.join(self.path, "meta.json")) as meta_file:
+                meta = json.load(meta_file)
+        else:
+            self._files_index = DirectoryIndex(catalog.get_listings(self.path))
+            meta = entry["meta"]
         self.name = meta["name"]
         self.field = meta["field"]
         self.depth_from = parse_depth(meta["depth_from"], var_name="depth_from")
@@ -233,24 +345,74 @@ class WellSegment(AbstractWellSegment):
         self._samples = None
         self._core_dl = None
         self._core_uv = None
+        self._core_dl_mask = None
+        self._core_uv_mask = None
         self._boring_intervals_deltas = None
         self._core_lithology_deltas = None
 
+        # Names of attributes, whose data is shared with a cached well and must be copied before inplace changes
+        self._shared_attrs = frozenset()
+        # A weak reference to a cached segment, which this segment is a view of
+        self._cache_source = CopyableWeakRef()
+        # A weak reference to a cache entry of the well of the cached segment, which guards its lazy loading
+        self._cache_entry = CopyableWeakRef()
+        # The number of inplace changes of loaded attributes
+        self._version = 0
+        # Sorted depth arrays of loaded tables, used to slice them by binary search
+        self._depth_arrays = {}
+
         # In order to unify aggregate behavior in case of loaded and calculated `boring_sequences`,
         # they should be computed explicitly during the creation of a segment.
         if self._has_file("boring_intervals") and not self._has_file("boring_sequences"):
             _ = self.boring_sequences
 
+    @property
+    def nbytes(self):
+        """int: Total size of loaded tables and core images of the segment
+        in bytes."""
+        nbytes = 0
+        for attr in self.attrs_depth_index + self.attrs_fdtd_index + self.attrs_no_index:
+            df = getattr(self, "_" + attr)
+            if df is not None:
+                nbytes += int(df.memory_usage(index=True, deep=True).sum())
+        for attr in self._core_attrs:
+            img = getattr(self, "_" + attr)
+            if img is not None:
+                nbytes += img.nbytes
+        return nbytes
+
+    def _get_state(self):
+        """Get the state of the segment, which changes on any change of its
+        depth range, loaded attributes or on their inplace changes.
+
+        Returns
+        -------
+        bounds : tuple
+            Depth range of the segment and the number of inplace changes of
+            its attributes, which should be compared by value.
+        data : tuple
+            Loaded attributes of the segment, which should be compared by
+            identity.
+        """
+        bounds = (self.depth_from, self.depth_to, self.actual_depth_to, self._version)
+        data = tuple(getattr(self, "_" + attr) for attr in self._data_attrs)
+        return bounds, data
+
     @property
     def length(self):
         """float: Length of the segment in centimeters."""
         return self.depth_to - self.depth_from
 
-    def load_logs(self, *args, **kwargs):
+    def load_logs(self, *args, mnemonics=None, **kwargs):
         """Load well logs and calculate logs step in centimeters.
 
         Parameters
         ----------
+        mnemonics : str or list of str or None, optional
+            Mnemonics of well logs to load. Other logs are not read from
+            `.feather`, `.arrow` and `.csv` files. Mnemonics, missing in the
+            file, are ignored. If `None`, all logs are loaded. Defaults to
+            `None`.
         args : misc
             Any additional positional arguments to pass to the file loader,
             depends on its extension.
@@ -268,7 +430,7 @@ class WellSegment(AbstractWellSegment):
         ValueError
             If logs don't have a fixed sampling rate.
         """
-        self._logs = self._load_depth_df(self._get_full_name(self.path, "logs"), *args, **kwargs)
+        self._logs = self._load_depth_df(self._get_full_name(self.path, "logs"), *args, columns=mnemonics, **kwargs)
         steps = self.logs.index[1:] - self.logs.index[:-1]
         unique_steps = np.unique(steps)
         if self.validate and (len(unique_steps) > 1):
@@ -301,42 +463,184 @@ class WellSegment(AbstractWellSegment):
         return os.path.splitext(path)[1][1:]
 
     @staticmethod
-    def _load_las(path, *args, **kwargs):
-        """Load a `.las` file into a `DataFrame`."""
-        df = lasio.read(path, *args, **kwargs).df().reset_index().rename(columns={"DEPT": "DEPTH"})
-        # DEPTH values in a .las file are assumed to be in meters and converted to centimeters in the next line. Units
-        # are not parsed from .las file header since they are optional and their format is not strictly fixed.
-        df["DEPTH"] = np.round(df["DEPTH"] * 100).astype(int)
+    def _load_las(path, *args, columns=None, depth_range=None, **kwargs):
+        """Load a `.las` file into a `DataFrame`. If `columns` are given, only
+        those of them, that exist in the file, are kept. `depth_range` is
+        ignored: the whole file is always read. If no loader arguments are
+        given, the file is read by a fast `read_las` reader, falling back to
+        `lasio` for files, that it doesn't support."""
+        _ = depth_range
+        df = None
+        if not args and not kwargs:
+            try:
+                df = read_las(path)
+            except ValueError:
+                pass
+        if df is None:
+            import lasio  # pylint: disable=import-outside-toplevel
+            df = lasio.read(path, *args, **kwargs).df().reset_index().rename(columns={"DEPT": "DEPTH"})
+            # DEPTH values in a .las file are assumed to be in meters and converted to centimeters in the next line.
+            # Units are not parsed from .las file header since they are optional and their format is not strictly
+            # fixed.
+            df["DEPTH"] = np.round(df["DEPTH"] * 100).astype(int)
+        if columns is not None:
+            df = df[[col for col in columns if col in df]]
         return df
 
     @staticmethod
-    def _load_csv(path, *args, **kwargs):
-        """Load a `.csv` file into a `DataFrame`."""
+    def _load_csv(path, *args, columns=None, depth_range=None, **kwargs):
+        """Load a `.csv` file into a `DataFrame`. If `columns` are given, only
+        those of them, that exist in the file, are parsed. `depth_range` is
+        ignored: the whole file is always read."""
+        _ = depth_range
+        if columns is not None:
+            kwargs["usecols"] = lambda col: col in columns
         return pd.read_csv(path, *args, **kwargs)
 
     @staticmethod
-    def _load_feather(path, *args, **kwargs):
-        """Load a `.feather` file into a `DataFrame`."""
-        return pd.read_feather(path, *args, **kwargs)
+    def _load_feather(path, *args, columns=None, depth_range=None, **kwargs):
+        """Load a `.feather` file into a `DataFrame`. If `columns` are given,
+        only those of them, that exist in the file, are read. `depth_range`
+        is ignored: the whole file is always read."""
+        _ = depth_range
+        if columns is not None:
+            file_columns = get_arrow_columns(path)
+            columns = [col for col in columns if col in file_columns]
+        return pd.read_feather(path, *args, columns=columns, **kwargs)
+
+    @staticmethod
+    def _load_arrow(path, *args, columns=None, depth_range=None, **kwargs):
+        """Load an `.arrow` file into a `DataFrame` through a memory map. If
+        `columns` are given, only those of them, that exist in the file, are
+        read. If `depth_range` is given, only file chunks, overlapping with
+        it, are read."""
+        _ = args, kwargs
+        return read_arrow(path, columns=columns, depth_range=depth_range)
 
-    def _load_df(self, path, *args, **kwargs):
-        """Load a `DataFrame` from a table format (`.las`, `.csv` or
-        `.feather`) depending on its extension."""
+    def _load_pfw(self, path, *args, columns=None, depth_range=None, **kwargs):
+        """Load a table of a packed well, given by a path `<packed well
+        path>/<table name>.pfw`. If `columns` are given, only those of them,
+        that exist in the table, are loaded. Only blocks, overlapping with
+        `depth_range`, are read."""
+        _ = args, kwargs
+        name = os.path.splitext(os.path.basename(path))[0]
+        return self._packed.read_table(name, columns=columns, depth_range=depth_range)
+
+    def _load_df(self, path, *args, columns=None, depth_range=None, **kwargs):
+        """Load a `DataFrame` from a table format (`.las`, `.csv`, `.feather`,
+        `.arrow` or a table of a packed well) depending on its extension. If `columns` are given, only
+        those of them, that exist in the file, are loaded.
+
+        If `depth_range` is given, loaders, supporting partial reads, may skip
+        rows outside this closed interval. The result still has to be filtered
+        by depth.
+
+        If `self.cache` is enabled, `.las` and `.csv` files loaded without
+        extra arguments are read from their cached columnar copies. If
+        `self.shared_cache` is enabled, files loaded without extra arguments
+        are read from shared memory.
+        """
         ext = self._get_extension(path)
         if not hasattr(self, "_load_" + ext):
             raise ValueError("A loader for data in {} format is not implemented".format(ext))
-        return getattr(self, "_load_" + ext)(path, *args, **kwargs)
+        loader = getattr(self, "_load_" + ext)
+        if columns is not None:
+            columns = to_list(columns)
+        if self.shared_cache and not args and not kwargs:
+            return self._load_shared_df(path, columns=columns, depth_range=depth_range)
+        if self.cache and ext in self.cached_exts and not args and not kwargs:
+            cache_dir = get_cache_dir(self.path, self.cache)
+            return load_cached_df(path, loader, cache_dir, columns=columns, depth_range=depth_range)
+        return loader(path, *args, columns=columns, depth_range=depth_range, **kwargs)
+
+    def _load_shared_df(self, path, columns=None, depth_range=None):
+        """Load a `DataFrame` from its copy in shared memory, publishing the
+        whole file content there first if it is missing. A block is keyed by
+        the file path, size and modification time."""
+        # Tables of a packed well are keyed by the stamp of the packed file
+        stamp = get_file_stamp(self.path if self._packed is not None else path)
+        name = get_block_name(os.path.abspath(path), stamp["size"], stamp["mtime"])
+
+        def build_fn():
+            res = copy(self)
+            res.shared_cache = False
+            return {"table": dump_arrow_buffer(res._load_df(path))}, {}
+
+        arrays, _ = get_shared_arrays(name, build_fn)
+        return read_arrow(arrays["table"], columns=columns, depth_range=depth_range)
+
+    @staticmethod
+    def _add_index_columns(columns, index_columns):
+        """Prepend index columns to requested `columns` unless all columns are
+        requested."""
+        if columns is None:
+            return None
+        return list(index_columns) + [col for col in to_list(columns) if col not in index_columns]
+
+    @staticmethod
+    def _get_sorted_depths(df):
+        """Get depths of a `DataFrame`, indexed by depth, or starts and ends
+        of depth ranges of a `DataFrame`, indexed by depth range, as a tuple
+        of integer arrays. Returns `None` if the arrays are not sorted."""
+        if isinstance(df.index, pd.MultiIndex):
+            depths = (df.index.get_level_values(0).values, df.index.get_level_values(1).values)
+        else:
+            depths = (df.index.values,)
+        if any(arr.dtype.kind not in "iu" or np.any(arr[1:] < arr[:-1]) for arr in depths):
+            return None
+        return depths
+
+    def _get_cached_depths(self, attr, df):
+        """Get sorted depths of a table `df`, stored in an `attr` attribute,
+        caching them until the index of the table is replaced."""
+        cached = self._depth_arrays.get(attr)
+        if cached is not None and cached[0] is df.index:
+            return cached[1]
+        depths = self._get_sorted_depths(df)
+        self._depth_arrays[attr] = (df.index, depths)
+        return depths
 
-    def _filter_depth_df(self, df):
+    @staticmethod
+    def _get_depth_positions(depths, depth_from, depth_to):
+        """Get positional bounds of rows of a `DataFrame` with sorted
+        `depths`, that are kept by `_filter_depth_df` for each pair of
+        `depth_from` and `depth_to` arrays."""
+        depth = depths[0]
+        starts = np.searchsorted(depth, depth_from, side="left")
+        stops = np.searchsorted(depth, depth_to, side="right")
+        if len(depth) > 0:
+            # See __getitem__ docstring for an explanation of this behaviour.
+            both_ends = ((stops > starts) & (depth[np.minimum(starts, len(depth) - 1)] == depth_from) &
+                         (depth[np.maximum(stops - 1, 0)] == depth_to))
+            stops = stops - both_ends
+        return starts, stops
+
+    @staticmethod
+    def _get_fdtd_positions(depths, depth_from, depth_to):
+        """Get positional bounds of rows of a `DataFrame` with sorted starts
+        and ends of depth ranges `depths`, that overlap with each pair of
+        `depth_from` and `depth_to` arrays."""
+        starts = np.searchsorted(depths[1], depth_from, side="right")
+        stops = np.searchsorted(depths[0], depth_to, side="left")
+        return starts, np.maximum(starts, stops)
+
+    def _filter_depth_df(self, df, depths=None):
         """Keep only depths between `self.depth_from` and `self.depth_to` in a
-        `DataFrame`, indexed by depth."""
-        df = df.loc[self.depth_from:self.depth_to]
-        if len(df) == 0:
+        `DataFrame`, indexed by depth. If its sorted `depths` are passed, the
+        `DataFrame` is sliced positionally by binary search."""
+        if depths is None:
+            depths = self._get_sorted_depths(df)
+        if depths is None:
+            df = df.loc[self.depth_from:self.depth_to]
+            if len(df) == 0:
+                return df
+            if (self.depth_from == df.index[0]) and (self.depth_to == df.index[-1]):
+                # See __getitem__ docstring for an explanation of this behaviour.
+                # Positional slicing is used instead of dropping to return a view of memory-mapped data.
+                df = df.iloc[:-1]
             return df
-        if (self.depth_from == df.index[0]) and (self.depth_to == df.index[-1]):
-            # See __getitem__ docstring for an explanation of this behaviour
-            df.drop(df.index[-1], inplace=True)
-        return df
+        (start,), (stop,) = self._get_depth_positions(depths, [self.depth_from], [self.depth_to])
+        return df.iloc[start:stop]
 
     @staticmethod
     def _validate_depth_df(df):
@@ -366,23 +670,36 @@ class WellSegment(AbstractWellSegment):
         if not depth.is_monotonic_increasing:
             raise DataRegularityError("non_increasing_index", depth)
 
-    def _load_depth_df(self, path, *args, **kwargs):
+    def _load_depth_df(self, path, *args, columns=None, **kwargs):
         """Load a `DataFrame`, indexed by depth, from a table format and keep
-        only depths between `self.depth_from` and `self.depth_to`."""
-        df = self._load_df(path, *args, **kwargs).set_index("DEPTH")
+        only depths between `self.depth_from` and `self.depth_to`. If
+        `columns` are given, only them are loaded in addition to the
+        index."""
+        columns = self._add_index_columns(columns, ["DEPTH"])
+        depth_range = (self.depth_from, self.depth_to)
+        df = self._load_df(path, *args, columns=columns, depth_range=depth_range, **kwargs)
+        # Inplace index setting doesn't copy memory-mapped data
+        df.set_index("DEPTH", inplace=True)
         if self.validate:
             self._validate_depth_df(df)
         df = self._filter_depth_df(df)
         return df
 
-    def _filter_fdtd_df(self, df):
+    def _filter_fdtd_df(self, df, depths=None):
         """Keep only depths between `self.depth_from` and `self.depth_to` in a
-        `DataFrame`, indexed by depth range."""
+        `DataFrame`, indexed by depth range. If its sorted `depths` are
+        passed, overlapping ranges are found by binary search."""
         if len(df) == 0:
             return df
-        depth_from, depth_to = zip(*df.index.values)
-        mask = (np.array(depth_from) < self.depth_to) & (self.depth_from < np.array(depth_to))
-        return df[mask]
+        if depths is None:
+            depths = self._get_sorted_depths(df)
+        if depths is None:
+            depth_from = df.index.get_level_values(0).values
+            depth_to = df.index.get_level_values(1).values
+            mask = (depth_from < self.depth_to) & (self.depth_from < depth_to)
+            return df[mask]
+        (start,), (stop,) = self._get_fdtd_positions(depths, [self.depth_from], [self.depth_to])
+        return df.iloc[start:stop]
 
     @staticmethod
     def _validate_fdtd_df(df):
@@ -425,27 +742,54 @@ class WellSegment(AbstractWellSegment):
         if (depth_from.values[1:] < depth_to.values[:-1]).any():
             raise DataRegularityError("overlapping_index", df.index)
 
-    def _load_fdtd_df(self, path, *args, **kwargs):
+    def _load_fdtd_df(self, path, *args, columns=None, **kwargs):
         """Load a `DataFrame`, indexed by depth range, from a table format and
-        keep only depths between `self.depth_from` and `self.depth_to`."""
-        df = self._load_df(path, *args, **kwargs).set_index(["DEPTH_FROM", "DEPTH_TO"])
+        keep only depths between `self.depth_from` and `self.depth_to`. If
+        `columns` are given, only them are loaded in addition to the
+        index."""
+        columns = self._add_index_columns(columns, ["DEPTH_FROM", "DEPTH_TO"])
+        depth_range = (self.depth_from, self.depth_to)
+        df = self._load_df(path, *args, columns=columns, depth_range=depth_range, **kwargs)
+        df.set_index(["DEPTH_FROM", "DEPTH_TO"], inplace=True)
         if self.validate:
             self._validate_fdtd_df(df)
         df = self._filter_fdtd_df(df)
         return df
 
+    def _get_packed_files_index(self):
+        """Create a directory index, that lists tables of a packed well as
+        files `<table name>.pfw` in a directory `self.path`."""
+        files = [table + "." + PACKED_EXT for table in self._packed.tables]
+        return DirectoryIndex({self.path: {"files": files, "dirs": []}})
+
+    def refresh_files_index(self):
+        """Drop cached listings of the well directory and its subdirectories.
+        Should be called if well files were added, removed or renamed after
+        the well was created. For a packed well, its index footer is reread.
+
+        Returns
+        -------
+        self : type(self)
+            Self with refreshed directory listings.
+        """
+        if self._packed is not None:
+            self._packed = PackedWell(self.path)
+            self._files_index = self._get_packed_files_index()
+        else:
+            self._files_index.refresh()
+        return self
+
     def _has_file(self, name):
         """Check that exactly one file with a given name and any extension
         exists in a well directory."""
-        files = glob(os.path.join(self.path, name + ".*"))
+        files = self._files_index.find(self.path, name)
         if len(files) == 1:
             return True
         return False
 
-    @classmethod
-    def _get_full_name(cls, path, name):
+    def _get_full_name(self, path, name):
         """Get full name of a file with a given `name` in a dir, specified in
-        `path`.
+        `path`. Directory listings are cached in `self._files_index`.
 
         Parameters
         ----------
@@ -467,14 +811,14 @@ class WellSegment(AbstractWellSegment):
             If extension is not specified and several files with given name
             exist.
         """
-        ext = cls._get_extension(name)
+        ext = self._get_extension(name)
         if ext != "":
             full_name = os.path.join(path, name)
-            if os.path.exists(full_name):
+            if self._files_index.exists(full_name):
                 return full_name
             raise FileNotFoundError("A file {} does not exist in {}".format(name, path))
 
-        files = glob(os.path.join(path, name + ".*"))
+        files = self._files_index.find(path, name)
         if len(files) == 0:
             raise FileNotFoundError("A file {} does not exist in {}".format(name, path))
         if len(files) > 1:
@@ -485,7 +829,7 @@ class WellSegment(AbstractWellSegment):
     def core_dl(self):
         """numpy.ndarray: Concatenated daylight image of all core samples in
         the segment."""
-        if self._core_dl is None:
+        if self._core_dl is None and not self._load_from_source("core_dl", *self._core_attrs):
             self.load_core()
         return self._core_dl
 
@@ -493,29 +837,72 @@ class WellSegment(AbstractWellSegment):
     def core_uv(self):
         """numpy.ndarray: Concatenated ultraviolet image of all core samples
         in the segment."""
-        if self._core_uv is None:
+        if self._core_uv is None and not self._load_from_source("core_uv", *self._core_attrs):
             self.load_core()
         return self._core_uv
 
+    def _get_core_mask(self, attr):
+        """Get a boolean mask of rows of a core image `attr`, covered by core
+        sample images."""
+        img = getattr(self, attr)
+        if img is None:
+            return None
+        mask = getattr(self, "_" + attr + "_mask")
+        if mask is None:
+            mask = ~np.isnan(img).all(axis=tuple(range(1, img.ndim)))
+        return mask
+
+    @property
+    def core_dl_mask(self):
+        """numpy.ndarray: A boolean mask of `core_dl` rows, covered by core
+        sample images."""
+        return self._get_core_mask("core_dl")
+
+    @property
+    def core_uv_mask(self):
+        """numpy.ndarray: A boolean mask of `core_uv` rows, covered by core
+        sample images."""
+        return self._get_core_mask("core_uv")
+
     @staticmethod
     def _load_image(path):
         """Open an image in `PIL` format."""
-        return PIL.Image.open(path) if os.path.isfile(path) else None
+        from PIL import Image  # pylint: disable=import-outside-toplevel
+        return Image.open(path) if os.path.isfile(path) else None
 
     @staticmethod
-    def _match_samples(dl_img, uv_img, height, width):
+    def _resize_image(img, height, width, rows, resample="lanczos", fast_decode=False):
+        """Resize an image to the given shape with a `resample` filter and
+        keep only a range of `rows` of the result.
+
+        Only source rows, required to get the resulting ones, are resampled.
+        If `fast_decode` is `True`, JPEG images are decoded at the lowest
+        scale, that still exceeds the resulting shape, using `PIL` draft
+        mode.
+        """
+        from PIL import Image  # pylint: disable=import-outside-toplevel
+        top, bottom = rows
+        if img is None:
+            return np.full((max(bottom - top, 0), width, 3), np.nan, dtype=np.float32)
+        resample = getattr(Image, RESAMPLE_FILTERS[resample])
+        if bottom <= top:
+            return np.array(img.resize((width, 1), resample=resample))[:0]
+        if fast_decode and img.format == "JPEG":
+            img.draft(img.mode, (width, height))
+        scale = img.height / height
+        box = (0, top * scale, img.width, bottom * scale)
+        return np.array(img.resize((width, bottom - top), resample=resample, box=box))
+
+    @staticmethod
+    def _match_samples(dl_img, uv_img, height, width, resample="lanczos", rows=None, fast_decode=False):
         """Match core samples in daylight and ultraviolet by resizing them to
-        the given shape."""
-        if (dl_img is not None) and (dl_img is not None):
-            # TODO: contour matching instead of resizing
-            dl_img = np.array(dl_img.resize((width, height), resample=PIL.Image.LANCZOS))
-            uv_img = np.array(uv_img.resize((width, height), resample=PIL.Image.LANCZOS))
-        elif dl_img is not None:
-            dl_img = np.array(dl_img.resize((width, height), resample=PIL.Image.LANCZOS))
-            uv_img = np.full((height, width, 3), np.nan, dtype=np.float32)
-        else:
-            dl_img = np.full((height, width, 3), np.nan, dtype=np.float32)
-            uv_img = np.array(uv_img.resize((width, height), resample=PIL.Image.LANCZOS))
+        the given shape with a `resample` filter. If `rows` are given, only
+        this range of rows of resized images is returned."""
+        # TODO: contour matching instead of resizing
+        if rows is None:
+            rows = (0, height)
+        dl_img = WellSegment._resize_image(dl_img, height, width, rows, resample, fast_decode)
+        uv_img = WellSegment._resize_image(uv_img, height, width, rows, resample, fast_decode)
         return dl_img, uv_img
 
     def _cm_to_pixels(self, length):
@@ -524,9 +911,273 @@ class WellSegment(AbstractWellSegment):
         # int is required to correctly handle numpy float dtypes, which are not converted to int by round
         return int(round(length * self.pixels_per_cm))
 
-    def load_core(self, core_width=None, pixels_per_cm=None):
+    def _load_sample(self, sample_depth_from, sample_depth_to, sample_name, width, depth_from, depth_to):
+        """Load daylight and ultraviolet images of a core sample, resize them
+        and crop to the depth range [`depth_from`, `depth_to`).
+
+        Returns
+        -------
+        fill_pos : int
+            The row of core images to put sample images at.
+        dl_img : numpy.ndarray
+            Daylight image of the sample.
+        uv_img : numpy.ndarray
+            Ultraviolet image of the sample.
+        """
+        sample_height = self._cm_to_pixels(sample_depth_to - sample_depth_from)
+        sample_name = str(sample_name)
+
+        dl_path = self._get_full_name(os.path.join(self.path, "samples_dl"), sample_name)
+        dl_img = self._load_image(dl_path)
+        uv_path = self._get_full_name(os.path.join(self.path, "samples_uv"), sample_name)
+        uv_img = self._load_image(uv_path)
+
+        # Only rows of the sample, that lie in the depth range, are resized
+        top_crop = max(0, self._cm_to_pixels(depth_from - sample_depth_from))
+        bottom_crop = sample_height - max(0, self._cm_to_pixels(sample_depth_to - depth_to))
+        rows = (min(top_crop, sample_height), max(bottom_crop, 0))
+        dl_img, uv_img = self._match_samples(dl_img, uv_img, sample_height, width, self.core_resample, rows,
+                                             self.core_fast_decode)
+
+        fill_pos = max(0, self._cm_to_pixels(sample_depth_from - depth_from))
+        return fill_pos, dl_img, uv_img
+
+    def _get_overlapping_samples(self):
+        """Get a list of (`DEPTH_FROM`, `DEPTH_TO`, `SAMPLE`) tuples of core
+        samples, overlapping with the segment. If `samples` are sorted, they
+        are looked up by binary search over their depth ranges."""
+        samples = self.samples
+        depth_from = samples.index.get_level_values("DEPTH_FROM").values
+        depth_to = samples.index.get_level_values("DEPTH_TO").values
+        if np.all(depth_from[1:] >= depth_to[:-1]):
+            overlap = get_overlapping_slice(depth_from, depth_to, self.depth_from, self.depth_to)
+        else:
+            overlap = np.where((depth_from < self.depth_to) & (self.depth_from < depth_to))[0]
+        return list(zip(depth_from[overlap], depth_to[overlap], samples["SAMPLE"].values[overlap]))
+
+    def _render_core(self, samples, depth_from, depth_to):
+        """Render daylight and ultraviolet images of core `samples`, given as
+        a list of (`DEPTH_FROM`, `DEPTH_TO`, `SAMPLE`) tuples, in the depth
+        range [`depth_from`, `depth_to`).
+
+        Returns
+        -------
+        core_dl : numpy.ndarray
+            Daylight core image of `self.core_dtype` dtype.
+        core_uv : numpy.ndarray
+            Ultraviolet core image of `self.core_dtype` dtype.
+        core_dl_mask : numpy.ndarray or None
+            A mask of `core_dl` rows, covered by samples, if `core_dtype` is
+            "uint8" or `None` otherwise.
+        core_uv_mask : numpy.ndarray or None
+            A mask of `core_uv` rows, covered by samples, if `core_dtype` is
+            "uint8" or `None` otherwise.
+        """
+        if self.core_dtype not in CORE_DTYPES:
+            raise ValueError("Unknown core dtype {}".format(self.core_dtype))
+        height = self._cm_to_pixels(depth_to - depth_from)
+        width = self._cm_to_pixels(self.core_width)
+        if self.core_dtype == "uint8":
+            core_dl = np.zeros((height, width, 3), dtype=np.uint8)
+            core_uv = np.zeros((height, width, 3), dtype=np.uint8)
+            core_dl_mask = np.zeros(height, dtype=bool)
+            core_uv_mask = np.zeros(height, dtype=bool)
+        else:
+            core_dl = np.full((height, width, 3), np.nan, dtype=np.float32)
+            core_uv = np.full((height, width, 3), np.nan, dtype=np.float32)
+            core_dl_mask = None
+            core_uv_mask = None
+
+        def load_sample(sample):
+            return self._load_sample(*sample, width, depth_from, depth_to)
+
+        def fill_image(core, core_mask, fill_pos, img):
+            if core_mask is None:
+                core[fill_pos:fill_pos+img.shape[0]] = img
+            elif img.dtype != np.float32:
+                # Missing sample images are returned as float arrays of nans and are not written to uint8 images
+                core[fill_pos:fill_pos+img.shape[0]] = img
+                core_mask[fill_pos:fill_pos+img.shape[0]] = True
+
+        def fill_core(fill_pos, dl_img, uv_img):
+            fill_image(core_dl, core_dl_mask, fill_pos, dl_img)
+            fill_image(core_uv, core_uv_mask, fill_pos, uv_img)
+
+        def load_and_fill(sample):
+            fill_core(*load_sample(sample))
+
+        if self.core_workers == 1:
+            for sample in samples:
+                load_and_fill(sample)
+        else:
+            # Samples can be written concurrently only if their pixel ranges don't intersect
+            bounds = np.array([(self._cm_to_pixels(sample_depth_from), self._cm_to_pixels(sample_depth_to))
+                               for sample_depth_from, sample_depth_to, _ in samples]).reshape(-1, 2)
+            overlap = np.any(bounds[1:, 0] < np.maximum.accumulate(bounds[:-1, 1]))
+            with ThreadPoolExecutor(max_workers=self.core_workers) as executor:
+                if overlap:
+                    for res in executor.map(load_sample, samples):
+                        fill_core(*res)
+                else:
+                    # list is used to reraise worker exceptions
+                    list(executor.map(load_and_fill, samples))
+        return core_dl, core_uv, core_dl_mask, core_uv_mask
+
+    def _get_core_cache_name(self):
+        """Get a name of cached core strips for current image parameters."""
+        name = "core_{}_{}_{}_{}".format(self.pixels_per_cm, self.core_width, self.core_resample, self.core_dtype)
+        return name + "_fast" if self.core_fast_decode else name
+
+    def _get_core_stamp(self):
+        """Get a stamp of core sources: the `samples` file and all core
+        sample images. Cached core strips are rebuilt if it changes. The
+        stamp is computed once per well and shared by all its segments
+        until the files index is refreshed."""
+        return self._files_index.memoize(("core_stamp", self.path), self._compute_core_stamp)
+
+    def _compute_core_stamp(self):
+        """Stat core sources to compute a stamp for `_get_core_stamp`."""
+        samples_path = self._get_full_name(self.path, "samples")
+        stamp = {"samples": [os.path.basename(samples_path), get_file_stamp(samples_path)]}
+        for image_dir in ("samples_dl", "samples_uv"):
+            dir_path = os.path.join(self.path, image_dir)
+            if self._files_index.isdir(dir_path):
+                stamp[image_dir] = [[name, get_file_stamp(os.path.join(dir_path, name))]
+                                    for name in self._files_index.listdir(dir_path)]
+        return stamp
+
+    def _build_core_strips(self, exist_dl, exist_uv):
+        """Render core images of all samples of the well and cache them if
+        the cache is enabled. If the shared cache is enabled, the strips are
+        published in shared memory.
+
+        Returns
+        -------
+        strips : dict
+            A mapping from `core_dl` and `core_uv` to rendered images of
+            existing sample directories. If `core_dtype` is "uint8", masks of
+            covered rows are also stored under `core_dl_mask` and
+            `core_uv_mask` keys.
+        meta : dict
+            Depth range of the strips.
+        """
+        if self.shared_cache:
+            name = get_block_name(os.path.abspath(self.path), self._get_core_cache_name(), self._get_core_stamp())
+            res = copy(self)
+            res.shared_cache = False
+            return get_shared_arrays(name, lambda: res._build_core_strips(exist_dl, exist_uv))
+
+        if self.cache:
+            stamp = self._get_core_stamp()
+            cache_dir = get_cache_dir(self.path, self.cache)
+            strips, meta = load_cached_arrays(cache_dir, self._get_core_cache_name(), stamp)
+            if strips is not None:
+                return strips, meta
+
+        samples = self._load_df(self._get_full_name(self.path, "samples"), columns=["DEPTH_FROM", "DEPTH_TO", "SAMPLE"])
+        samples.set_index(["DEPTH_FROM", "DEPTH_TO"], inplace=True)
+        if self.validate:
+            self._validate_fdtd_df(samples)
+        samples = [(depth_from, depth_to, name) for (depth_from, depth_to), name in samples["SAMPLE"].items()]
+        if len(samples) == 0:
+            meta = {"depth_from": self.depth_from, "depth_to": self.depth_from}
+        else:
+            meta = {"depth_from": int(min(sample[0] for sample in samples)),
+                    "depth_to": int(max(sample[1] for sample in samples))}
+        core_dl, core_uv, core_dl_mask, core_uv_mask = self._render_core(samples, meta["depth_from"], meta["depth_to"])
+        strips = {}
+        if exist_dl:
+            strips["core_dl"] = core_dl
+            if core_dl_mask is not None:
+                strips["core_dl_mask"] = core_dl_mask
+        if exist_uv:
+            strips["core_uv"] = core_uv
+            if core_uv_mask is not None:
+                strips["core_uv_mask"] = core_uv_mask
+        if self.cache:
+            dump_cached_arrays(cache_dir, self._get_core_cache_name(), strips, stamp, meta)
+        return strips, meta
+
+    def _slice_core_strip(self, strip, strip_depth_from):
+        """Get core image or its mask of the segment from a core strip of the
+        well, starting at `strip_depth_from`. If the segment lies within the
+        strip, a view of the strip is returned. Otherwise, rows outside the
+        strip are filled with `numpy.nan` for float images and zeros for
+        others."""
+        height = self._cm_to_pixels(self.length)
+        start = self._cm_to_pixels(self.depth_from - strip_depth_from)
+        if start >= 0 and start + height <= len(strip):
+            return strip[start:start+height]
+        fill_value = np.nan if strip.dtype.kind == "f" else 0
+        core = np.full((height,) + strip.shape[1:], fill_value, dtype=strip.dtype)
+        strip_start, strip_stop = max(start, 0), min(start + height, len(strip))
+        if strip_start < strip_stop:
+            core[strip_start-start:strip_stop-start] = strip[strip_start:strip_stop]
+        return core
+
+    def build_core_cache(self, core_width=None, pixels_per_cm=None, core_resample=None, core_dtype=None,
+                         core_fast_decode=None):
+        """Render core images of all samples of the well into contiguous
+        depth-aligned strips and save them in the cache directory, so that
+        subsequent `load_core` calls with the same image parameters slice
+        memory-mapped strips instead of decoding sample images.
+
+        Strips are rebuilt automatically if the `samples` file or any sample
+        image is changed. The cache is stored as described in `cache`
+        argument of `__init__`, if it is `False`, a `.cache` subdirectory of
+        the well directory is used, but the strips will be read only by
+        segments with enabled cache.
+
+        Parameters
+        ----------
+        core_width : positive float, optional
+            The width of core samples in centimeters.
+        pixels_per_cm : positive float, optional
+            The number of pixels in centimeters used to determine the loaded
+            width of core sample images.
+        core_resample : str, optional
+            A name of the `PIL` filter to resize core samples with.
+        core_dtype : {"float32", "uint8"}, optional
+            The dtype of core images.
+        core_fast_decode : bool, optional
+            Whether to decode JPEG sample images at a reduced scale.
+
+        Returns
+        -------
+        self : type(self)
+            Self unchanged.
+        """
+        res = copy(self)
+        res.core_width = core_width if core_width is not None else self.core_width
+        res.pixels_per_cm = pixels_per_cm if pixels_per_cm is not None else self.pixels_per_cm
+        res.core_resample = core_resample if core_resample is not None else self.core_resample
+        res.core_dtype = core_dtype if core_dtype is not None else self.core_dtype
+        res.core_fast_decode = core_fast_decode if core_fast_decode is not None else self.core_fast_decode
+        res.cache = self.cache or True
+        exist_dl = self._files_index.isdir(os.path.join(self.path, "samples_dl"))
+        exist_uv = self._files_index.isdir(os.path.join(self.path, "samples_uv"))
+        if not exist_dl and not exist_uv:
+            raise FileNotFoundError("At least one of samples_dl or samples_uv must exist")
+        res._build_core_strips(exist_dl, exist_uv)
+        return self
+
+    def load_core(self, core_width=None, pixels_per_cm=None, core_workers=None, core_resample=None, core_dtype=None,
+                  core_fast_decode=None):
         """Load core images in daylight and ultraviolet.
 
+        Core samples are decoded and resized in a pool of `core_workers`
+        threads. If samples don't overlap, each worker writes its images
+        directly into the resulting arrays. Otherwise, images are written in
+        the order of samples, so that later samples overwrite earlier ones.
+
+        If the cache is enabled, core images of all well samples are rendered
+        once per image parameters into depth-aligned strips, which are saved
+        in the cache directory (see `build_core_cache`). If the shared cache
+        is enabled, the strips are also published in shared memory. Core images of the
+        segment are then sliced from memory-mapped strips without decoding
+        any sample images. The result is the same as without cache if sample
+        depths multiplied by `pixels_per_cm` are integers.
+
         If any of method arguments are not specified, those, passed to
         `__init__`, will be used. Otherwise, they will be overridden in
         `self`.
@@ -539,6 +1190,20 @@ class WellSegment(AbstractWellSegment):
             The number of pixels in centimeters used to determine the loaded
             width of core sample images. Image height is calculated so as to
             keep the aspect ratio.
+        core_workers : positive int, optional
+            The number of threads to load core samples with. If 1, samples
+            are loaded sequentially in the calling thread.
+        core_resample : str, optional
+            A name of the `PIL` filter to resize core samples with. Must be
+            one of the keys of `RESAMPLE_FILTERS`.
+        core_dtype : {"float32", "uint8"}, optional
+            The dtype of loaded core images. If "uint8", masks of rows,
+            covered by sample images, are stored in `core_dl_mask` and
+            `core_uv_mask`.
+        core_fast_decode : bool, optional
+            Whether to decode JPEG sample images at a reduced scale, that
+            still exceeds the resulting image size. Faster, but resulting
+            pixels may slightly differ from those of full decoding.
 
         Returns
         -------
@@ -547,41 +1212,70 @@ class WellSegment(AbstractWellSegment):
         """
         self.core_width = core_width if core_width is not None else self.core_width
         self.pixels_per_cm = pixels_per_cm if pixels_per_cm is not None else self.pixels_per_cm
+        self.core_workers = core_workers if core_workers is not None else self.core_workers
+        self.core_resample = core_resample if core_resample is not None else self.core_resample
+        self.core_dtype = core_dtype if core_dtype is not None else self.core_dtype
+        self.core_fast_decode = core_fast_decode if core_fast_decode is not None else self.core_fast_decode
+        if self.core_resample not in RESAMPLE_FILTERS:
+            raise ValueError("Unknown resampling filter {}".format(self.core_resample))
+
+        if self._packed is not None:
+            core = self._load_packed_core()
+            exist_dl, exist_uv = "core_dl" in core, "core_uv" in core
+        else:
+            exist_dl = self._files_index.isdir(os.path.join(self.path, "samples_dl"))
+            exist_uv = self._files_index.isdir(os.path.join(self.path, "samples_uv"))
+            if not exist_dl and not exist_uv:
+                raise FileNotFoundError("At least one of samples_dl or samples_uv must exist")
+            if self.cache or self.shared_cache:
+                strips, meta = self._build_core_strips(exist_dl, exist_uv)
+                core = {name: self._slice_core_strip(strip, meta["depth_from"]) for name, strip in strips.items()}
+            else:
+                core = dict(zip(self._core_attrs, self._render_core(self._get_overlapping_samples(),
+                                                                    self.depth_from, self.depth_to)))
 
-        height = self._cm_to_pixels(self.length)
-        width = self._cm_to_pixels(self.core_width)
-
-        exist_dl = os.path.isdir(os.path.join(self.path, "samples_dl"))
-        exist_uv = os.path.isdir(os.path.join(self.path, "samples_uv"))
-        if not exist_dl and not exist_uv:
-            raise FileNotFoundError("At least one of samples_dl or samples_uv must exist")
-        core_dl = np.full((height, width, 3), np.nan, dtype=np.float32)
-        core_uv = np.full((height, width, 3), np.nan, dtype=np.float32)
-
-        for (sample_depth_from, sample_depth_to), sample_name in self.samples["SAMPLE"].iteritems():
-            sample_height = self._cm_to_pixels(sample_depth_to - sample_depth_from)
-            sample_name = str(sample_name)
-
-            dl_path = self._get_full_name(os.path.join(self.path, "samples_dl"), sample_name)
-            dl_img = self._load_image(dl_path)
-            uv_path = self._get_full_name(os.path.join(self.path, "samples_uv"), sample_name)
-            uv_img = self._load_image(uv_path)
-            dl_img, uv_img = self._match_samples(dl_img, uv_img, sample_height, width)
-
-            top_crop = max(0, self._cm_to_pixels(self.depth_from - sample_depth_from))
-            bottom_crop = sample_height - max(0, self._cm_to_pixels(sample_depth_to - self.depth_to))
-            dl_img = dl_img[top_crop:bottom_crop]
-            uv_img = uv_img[top_crop:bottom_crop]
+        self._core_dl = core.get("core_dl") if exist_dl else None
+        self._core_uv = core.get("core_uv") if exist_uv else None
+        self._core_dl_mask = core.get("core_dl_mask") if exist_dl else None
+        self._core_uv_mask = core.get("core_uv_mask") if exist_uv else None
+        return self
 
-            fill_pos = max(0, self._cm_to_pixels(sample_depth_from - self.depth_from))
-            core_dl[fill_pos:fill_pos+dl_img.shape[0]] = dl_img
-            core_uv[fill_pos:fill_pos+uv_img.shape[0]] = uv_img
+    def _get_core_params(self):
+        """Get parameters, that define rendered core images."""
+        return {
+            "core_width": self.core_width,
+            "pixels_per_cm": self.pixels_per_cm,
+            "core_resample": self.core_resample,
+            "core_dtype": self.core_dtype,
+            "core_fast_decode": self.core_fast_decode,
+        }
 
-        self._core_dl = core_dl if exist_dl else None
-        self._core_uv = core_uv if exist_uv else None
-        return self
+    def _load_packed_core(self):
+        """Read core images of the segment and their masks from core strips
+        of a packed well. Only compressed blocks of strips, overlapping with
+        the segment, are read.
 
-    def dump(self, path):
+        Returns
+        -------
+        core : dict
+            A mapping from a name of a stored core image or its mask to its
+            part, corresponding to the segment.
+        """
+        core_meta = self._packed.core_meta
+        if core_meta is None:
+            raise FileNotFoundError("Core images are not stored in {}".format(self.path))
+        params = self._get_core_params()
+        # Core images of wells, packed before fast decoding was introduced, were fully decoded
+        core_meta = dict({"core_fast_decode": False}, **core_meta)
+        if any(core_meta[key] != val for key, val in params.items()):
+            packed_params = {key: core_meta[key] for key in params}
+            raise ValueError("Core images in {} are stored with parameters {}, got {}"
+                             .format(self.path, packed_params, params))
+        start = self._cm_to_pixels(self.depth_from - core_meta["depth_from"])
+        stop = start + self._cm_to_pixels(self.length)
+        return {name: self._packed.read_image(name, start, stop) for name in self._packed.images}
+
+    def dump(self, path, table_format="feather", pack_core=True):
         """Dump well segment data.
 
         Segment attributes are saved in the following manner:
@@ -589,33 +1283,61 @@ class WellSegment(AbstractWellSegment):
           `meta.json` file.
         - `core_dl` and `core_uv` are not saved. Instead, `samples_dl` and
           `samples_uv` directories are copied if exist.
-        - All other attributes are dumped in feather format.
+        - All other attributes are dumped in `table_format` format. If an
+          attribute is not loaded, its source file is copied for "feather"
+          format and converted for "arrow" format.
+
+        If `table_format` is "packed", the whole segment is saved into a
+        single file `<name>.pfw` instead of a directory. The file contains
+        the meta, all tables and, if `pack_core` is `True`, core images,
+        rendered with current core parameters of the segment, in separately
+        blosc-compressed blocks and an index footer, that allows to read any
+        block without reading the rest of the file. Sample images are not
+        saved, so a packed well can only load core images, stored in it.
 
         Parameters
         ----------
         path : str
             A path to a directory, where well dir with dump will be created.
+        table_format : {"feather", "arrow", "packed"}, optional
+            A format to dump table-based attributes in. `arrow` files are
+            uncompressed and are read through a memory map. Defaults to
+            "feather".
+        pack_core : bool, optional
+            Whether to store core images in a packed well file. Ignored for
+            other formats. Defaults to `True`.
 
         Returns
         -------
         self : WellSegment
             Self unchanged.
         """
-        path = os.path.join(path, self.name)
-        if not os.path.exists(path):
-            os.makedirs(path)
-
+        if table_format not in {"feather", "arrow", "packed"}:
+            raise ValueError("Unknown table format {}".format(table_format))
         meta = {
             "name": self.name,
             "field": self.field,
             "depth_from": self.depth_from,
             "depth_to": self.depth_to,
         }
+        if table_format == "packed":
+            if not os.path.exists(path):
+                os.makedirs(path)
+            self._dump_packed(os.path.join(path, self.name + "." + PACKED_EXT), meta, pack_core)
+            return self
+
+        path = os.path.join(path, self.name)
+        if not os.path.exists(path):
+            os.makedirs(path)
         with open(os.path.join(path, "meta.json"), "w") as meta_file:
             json.dump(meta, meta_file)
 
         for attr in self.attrs_depth_index + self.attrs_fdtd_index + self.attrs_no_index:
             attr_val = getattr(self, "_" + attr)
+            if attr_val is None and (table_format == "arrow" or self._packed is not None) and self._has_file(attr):
+                # Convert source files to arrow format instead of copying them. Tables of a packed well can't be
+                # copied since they are not separate files.
+                attr_val = getattr(self, attr)
             if attr_val is None:
                 try:
                     shutil.copy2(self._get_full_name(self.path, attr), path)
@@ -624,7 +1346,11 @@ class WellSegment(AbstractWellSegment):
             else:
                 if attr not in self.attrs_no_index:
                     attr_val = attr_val.reset_index()
-                attr_val.to_feather(os.path.join(path, attr + ".feather"))
+                attr_path = os.path.join(path, attr + "." + table_format)
+                if table_format == "arrow":
+                    write_arrow(attr_val, attr_path)
+                else:
+                    attr_val.to_feather(attr_path)
 
         if not self.has_samples:
             return self
@@ -635,17 +1361,43 @@ class WellSegment(AbstractWellSegment):
             return sorted(set(files) - set(self.samples["SAMPLE"]))
 
         samples_dl_path = os.path.join(self.path, "samples_dl")
-        if os.path.exists(samples_dl_path):
+        if self._files_index.isdir(samples_dl_path):
             shutil.copytree(samples_dl_path, os.path.join(path, "samples_dl"),
                             copy_function=os.link, ignore=ignore)
 
         samples_uv_path = os.path.join(self.path, "samples_uv")
-        if os.path.exists(samples_uv_path):
+        if self._files_index.isdir(samples_uv_path):
             shutil.copytree(samples_uv_path, os.path.join(path, "samples_uv"),
                             copy_function=os.link, ignore=ignore)
 
         return self
 
+    def _dump_packed(self, path, meta, pack_core):
+        """Dump all tables of the segment and, if `pack_core` is `True`, its
+        core images into a packed well file `path`."""
+        tables = {}
+        for attr in self.attrs_depth_index + self.attrs_fdtd_index + self.attrs_no_index:
+            attr_val = getattr(self, "_" + attr)
+            if attr_val is None and self._has_file(attr):
+                attr_val = getattr(self, attr)
+            if attr_val is None:
+                continue
+            tables[attr] = attr_val if attr in self.attrs_no_index else attr_val.reset_index()
+
+        core = None
+        core_meta = None
+        if self._packed is not None:
+            has_core = bool(self._packed.images)
+        else:
+            has_core = self.has_samples and any(self._files_index.isdir(os.path.join(self.path, samples_dir))
+                                                for samples_dir in ("samples_dl", "samples_uv"))
+        if pack_core and has_core:
+            _ = self.core_dl
+            core = {attr: getattr(self, "_" + attr) for attr in self._core_attrs}
+            core = {attr: img for attr, img in core.items() if img is not None}
+            core_meta = dict(self._get_core_params(), depth_from=self.depth_from)
+        dump_atomic(path, lambda tmp_path: write_packed(tmp_path, meta, tables, core, core_meta))
+
     @staticmethod
     def _encode(img_path):
         """Encode an image into a `plotly` representation."""
@@ -662,7 +1414,9 @@ class WellSegment(AbstractWellSegment):
         Note, that the method has side effects: it updates `subplot_titles`,
         `traces` and `images` lists inplace.
         """
-        plot_core = plot_core and os.path.isdir(os.path.join(self.path, image_dir))
+        from plotly import graph_objs as go  # pylint: disable=import-outside-toplevel
+
+        plot_core = plot_core and self._files_index.isdir(os.path.join(self.path, image_dir))
         if not plot_core:
             return None
         col = len(traces) + 1
@@ -711,6 +1465,11 @@ class WellSegment(AbstractWellSegment):
         self : type(self)
             Self unchanged.
         """
+        # Plotly is imported on first plot since its import is slow
+        from plotly import graph_objs as go  # pylint: disable=import-outside-toplevel
+        from plotly.subplots import make_subplots  # pylint: disable=import-outside-toplevel
+        from plotly.offline import init_notebook_mode, plot, iplot  # pylint: disable=import-outside-toplevel
+
         init_notebook_mode(connected=True)
 
         # Approximate size of the left margin of a plot, that will be added to the calculated
@@ -782,37 +1541,83 @@ class WellSegment(AbstractWellSegment):
         """
         if not isinstance(key, slice):
             return self.keep_logs(key)
-        res = self.copy()
         if key.step is not None:
             raise ValueError("A well does not support slicing with a specified step")
 
+        depth_from = self.depth_from
         if key.start is not None:
-            res.depth_from = max(parse_depth(key.start, var_name="depth_from"), res.depth_from)
+            depth_from = max(parse_depth(key.start, var_name="depth_from"), depth_from)
 
+        depth_to = self.depth_to
         if key.stop is not None:
-            res.depth_to = min(parse_depth(key.stop, var_name="depth_to"), res.depth_to)
+            depth_to = min(parse_depth(key.stop, var_name="depth_to"), depth_to)
 
-        if res.depth_from > res.depth_to:
+        if depth_from > depth_to:
             raise SkipWellException("Slicing interval is out of segment bounds")
+        return self._slice_segments([depth_from], [depth_to])[0]
+
+    def _slice_segments(self, depth_from, depth_to):
+        """Slice the segment along the wellbore into several segments at once.
+
+        Positions of the bounds of all new segments in each loaded attribute
+        are found by a single vectorized binary search, so that the cost of
+        slicing is dominated by the creation of segments themselves. Slicing
+        rules are the same as in `__getitem__`.
+
+        Parameters
+        ----------
+        depth_from : list of int
+            Tops of new segments in centimeters within segment bounds.
+        depth_to : list of int
+            Bottoms of new segments in centimeters within segment bounds.
+
+        Returns
+        -------
+        segments : list of WellSegment
+            Sliced segments.
+        """
+        segments = []
+        for seg_depth_from, seg_depth_to in zip(depth_from, depth_to):
+            res = self.copy()
+            res.depth_from = seg_depth_from
+            res.depth_to = seg_depth_to
+            res._depth_arrays = {}
+            segments.append(res)
 
         # Slice attributes
         attr_iter = chain(
-            zip(res.attrs_depth_index, repeat(res._filter_depth_df)),
-            zip(res.attrs_fdtd_index, repeat(res._filter_fdtd_df))
+            zip(self.attrs_depth_index, repeat((type(self)._filter_depth_df, self._get_depth_positions))),
+            zip(self.attrs_fdtd_index, repeat((type(self)._filter_fdtd_df, self._get_fdtd_positions)))
         )
-        for attr, filt in attr_iter:
-            attr_val = getattr(res, "_" + attr)
-            if attr_val is not None:
-                setattr(res, "_" + attr, filt(attr_val))
+        for attr, (filt, get_positions) in attr_iter:
+            attr_val = getattr(self, "_" + attr)
+            if attr_val is None:
+                continue
+            depths = self._get_cached_depths(attr, attr_val)
+            if depths is None or len(attr_val) == 0:
+                for res in segments:
+                    setattr(res, "_" + attr, filt(res, attr_val, depths))
+                continue
+            starts, stops = get_positions(depths, depth_from, depth_to)
+            for res, start, stop in zip(segments, starts.tolist(), stops.tolist()):
+                setattr(res, "_" + attr, attr_val.iloc[start:stop])
 
         # Slice images
-        start_pos = self._cm_to_pixels(res.depth_from - self.depth_from)
-        stop_pos = self._cm_to_pixels(res.depth_to - self.depth_from)
-        if res._core_dl is not None:
-            res._core_dl = res._core_dl[start_pos:stop_pos]
-        if res._core_uv is not None:
-            res._core_uv = res._core_uv[start_pos:stop_pos]
-        return res
+        for attr in self._core_attrs:
+            attr_val = getattr(self, "_" + attr)
+            if attr_val is None:
+                continue
+            for res in segments:
+                start_pos = self._cm_to_pixels(res.depth_from - self.depth_from)
+                stop_pos = self._cm_to_pixels(res.depth_to - self.depth_from)
+                setattr(res, "_" + attr, attr_val[start_pos:stop_pos])
+
+        # Filtered tables and sliced images are views of the data of the segment
+        loaded_attrs = self._get_loaded_attrs()
+        self._shared_attrs = self._shared_attrs | loaded_attrs
+        for res in segments:
+            res._shared_attrs = res._shared_attrs | loaded_attrs
+        return segments
 
     def copy(self):
         """Perform a shallow copy of an object.
@@ -824,15 +1629,104 @@ class WellSegment(AbstractWellSegment):
         """
         return copy(self)
 
-    def deepcopy(self):
+    def deepcopy(self, share_data=False):
         """Perform a deep copy of an object.
 
+        Parameters
+        ----------
+        share_data : bool, optional
+            If `True`, loaded tables and core images are not copied, but
+            shared with the copy until the first inplace change of either of
+            them by segment methods. Direct inplace changes of shared
+            attributes affect both segments. Defaults to `False`.
+
         Returns
         -------
         self : WellSegment
             Deep copy.
         """
-        return deepcopy(self)
+        return deepcopy(self, {SHARE_DATA_MEMO_KEY: True} if share_data else None)
+
+    def __deepcopy__(self, memo):
+        """Create a deep copy of the segment. If the `memo` has a true
+        `SHARE_DATA_MEMO_KEY` item, loaded tables and core images are shared
+        with the segment until the first inplace change of either of them,
+        all other attributes are deep copied."""
+        res = copy(self)
+        memo[id(self)] = res
+        share_data = memo.get(SHARE_DATA_MEMO_KEY, False)
+        loaded_attrs = self._get_loaded_attrs()
+        data_attrs = {"_" + attr for attr in self._data_attrs}
+        for name, val in self.__dict__.items():
+            if name in data_attrs and share_data:
+                # Respect objects, replaced in the memo by the caller
+                res.__dict__[name] = memo.get(id(val), val)
+            elif name == "_depth_arrays":
+                # Cached arrays are checked against the index of a table, so they are recalculated for copied tables
+                res.__dict__[name] = dict(val)
+            else:
+                res.__dict__[name] = deepcopy(val, memo)
+        if share_data:
+            self._shared_attrs = self._shared_attrs | loaded_attrs
+            res._shared_attrs = frozenset(attr for attr in loaded_attrs if getattr(res, "_" + attr) is not None)
+        else:
+            res._shared_attrs = frozenset()
+        return res
+
+    def _get_loaded_attrs(self):
+        """Get names of loaded tables and core images of the segment."""
+        return frozenset(attr for attr in self._data_attrs if getattr(self, "_" + attr) is not None)
+
+    def _create_view(self, cache_entry=None):
+        """Create a shallow copy of the segment, which shares all its loaded
+        attributes and lazily loads missing ones into the segment itself, so
+        that they are shared with its further views. Shared attributes are
+        copied on the first inplace change of the view.
+
+        If `cache_entry` is given, lazy loading into the segment is performed
+        under its `lock` and is followed by a call of its `on_load` method."""
+        res = self.copy()
+        res._shared_attrs = self._get_loaded_attrs()
+        res._cache_source = CopyableWeakRef(self)
+        res._cache_entry = CopyableWeakRef(cache_entry)
+        return res
+
+    def _load_from_source(self, attr, *attrs):
+        """Load `attr` and other `attrs` from the segment, that this segment is
+        a view of, if it still exists and has the same depth range. Returns
+        whether the attributes were loaded."""
+        source = self._cache_source()
+        if source is None or (source.depth_from, source.depth_to) != (self.depth_from, self.depth_to):
+            return False
+        cache_entry = self._cache_entry()
+        if cache_entry is None:
+            _ = getattr(source, attr)
+        else:
+            with cache_entry.lock:
+                is_loaded = getattr(source, "_" + attr) is not None
+                _ = getattr(source, attr)
+            if not is_loaded:
+                cache_entry.on_load()
+        attrs = {attr, *attrs}
+        for name in attrs:
+            setattr(self, "_" + name, getattr(source, "_" + name))
+        if "logs" in attrs:
+            self.logs_step = source.logs_step
+        self._shared_attrs = self._shared_attrs | attrs
+        return True
+
+    def _detach(self, attr):
+        """Copy an attribute, shared with a cached segment, a slice or a deep
+        copy of the segment, so that it can be changed inplace. Must be called before any inplace change of an
+        attribute, since it also updates the state of the segment."""
+        # Access the attribute first, since lazy loading can share it
+        val = getattr(self, attr)
+        self._version += 1
+        if attr not in self._shared_attrs:
+            return
+        self._shared_attrs = self._shared_attrs - {attr}
+        if val is not None:
+            setattr(self, "_" + attr, val.copy())
 
     def validate_core(self, validate_lithology=True):
         """Check core data for consistency.
@@ -957,7 +1851,7 @@ class WellSegment(AbstractWellSegment):
         if len(samples) > len(set(samples)):
             raise DataRegularityError("duplicated_files", "samples.feather")
 
-        samples_folders = {"samples_dl", "samples_uv"}.intersection(os.listdir(self.path))
+        samples_folders = {"samples_dl", "samples_uv"}.intersection(self._files_index.listdir(self.path))
         if not samples_folders:
             raise DataRegularityError("missing_samples_dirs")
 
@@ -1293,6 +2187,8 @@ class WellSegment(AbstractWellSegment):
         first well log values are estimated at core log depths by linear
         interpolation and then `R^2` is calculated for the resulting arrays.
         """
+        from scipy.interpolate import interp1d  # pylint: disable=import-outside-toplevel
+
         well_log = well_log.dropna()
         interpolator = interp1d(well_log.index, well_log, kind="linear", fill_value="extrapolate")
         well_log = interpolator(core_log.index)
@@ -1341,6 +2237,12 @@ class WellSegment(AbstractWellSegment):
         self : type(self)
             Self unchanged.
         """
+        from plotly import graph_objs as go  # pylint: disable=import-outside-toplevel
+        from plotly.subplots import make_subplots  # pylint: disable=import-outside-toplevel
+        from plotly.offline import init_notebook_mode, plot, iplot  # pylint: disable=import-outside-toplevel
+        from scipy.interpolate import interp1d  # pylint: disable=import-outside-toplevel
+        from sklearn.linear_model import LinearRegression  # pylint: disable=import-outside-toplevel
+
         init_notebook_mode(connected=True)
 
         # Approximate size of the left margin of a plot, that will be added to the calculated
@@ -1437,6 +2339,7 @@ class WellSegment(AbstractWellSegment):
         self : type(self)
             Self with created depth log.
         """
+        self._detach("logs")
         self.logs[dst] = self.logs.index
         return self
 
@@ -1454,12 +2357,15 @@ class WellSegment(AbstractWellSegment):
             Self with filtered logs.
         """
         res = self.copy()
+        res._detach("logs")
         res._logs.drop(to_list(mnemonics), axis=1, inplace=True)
         return res
 
     def keep_logs(self, mnemonics):
         """Drop well logs whose mnemonics are not in `mnemonics`.
 
+        If logs are not loaded yet, only logs from `mnemonics` are loaded.
+
         Parameters
         ----------
         mnemonics : str or list of str
@@ -1470,11 +2376,13 @@ class WellSegment(AbstractWellSegment):
         self : type(self)
             Self with filtered logs.
         """
-        missing_mnemonics = np.setdiff1d(mnemonics, self.logs.columns)
+        res = self.copy()
+        if res._logs is None:
+            res.load_logs(mnemonics=mnemonics)
+        missing_mnemonics = np.setdiff1d(mnemonics, res.logs.columns)
         if len(missing_mnemonics) > 0:
             err_msg = "The following logs were not recorded for the well: {}".format(", ".join(missing_mnemonics))
             raise SkipWellException(err_msg)
-        res = self.copy()
         res._logs = res.logs[to_list(mnemonics)]
         return res
 
@@ -1491,6 +2399,7 @@ class WellSegment(AbstractWellSegment):
         self : type(self)
             Self with renamed logs. Changes `logs` inplace.
         """
+        self._detach("logs")
         self.logs.rename(columns=rename_dict, inplace=True)
         return self
 
@@ -1664,8 +2573,104 @@ class WellSegment(AbstractWellSegment):
         length = parse_depth(length, check_positive=True, var_name="length")
         bounds = self.depth_from, max(self.depth_from, self.depth_to - length)
         crops_starts = np.floor(np.sort(np.random.uniform(*bounds, size=n_crops))).astype(int).tolist()
-        crops = [self[start:start+length] for start in crops_starts]
-        return crops
+        return self.crop_at(crops_starts, length)
+
+    def crop_at(self, starts, length):
+        """Create crops of the same length, starting at given depths.
+
+        Parameters
+        ----------
+        starts : list of int
+            Start depths of crops in centimeters.
+        length : positive int or str
+            Length of each crop in centimeters. If `str`, must be specified in
+            a <value><units> format (e.g. "10m").
+
+        Returns
+        -------
+        segments : list of WellSegment
+            Cropped segments.
+        """
+        length = parse_depth(length, check_positive=True, var_name="length")
+        return [self[start:start+length] for start in starts]
+
+    def crop_at_to_array(self, starts, length, attrs="logs", out=None):
+        """Get data of crops, that `crop_at` would create with the same
+        arguments, as arrays of windows without creating cropped segments.
+
+        Windows of all crops are gathered by a single fancy indexing of the
+        data of the segment for each attribute. Depths, missing in `logs`,
+        and rows out of core images are filled with `numpy.nan` or zeros for
+        integer images.
+
+        Parameters
+        ----------
+        starts : array-like of int
+            Start depths of crops in centimeters.
+        length : positive int or str
+            Length of each crop in centimeters. If `str`, must be specified in
+            a <value><units> format (e.g. "10m").
+        attrs : str or list of str, optional
+            Attributes to crop: "logs" and core images with their masks.
+            `logs` must have a regular index with `logs_step` step. Defaults
+            to "logs".
+        out : dict, optional
+            A mapping from an attribute name to a preallocated array to
+            gather its windows into. Arrays for missing attributes are
+            created. Defaults to `None`.
+
+        Returns
+        -------
+        depth_from : 1-D ndarray
+            Start depths of crops.
+        arrays : dict
+            A mapping from an attribute name to an array of its windows with
+            shape `(n_crops, window, ...)`. A window of `logs` is a
+            `(length // logs_step, n_logs)` array.
+        """
+        length = parse_depth(length, check_positive=True, var_name="length")
+        starts = np.asarray(starts, dtype=np.int64)
+        arrays = {} if out is None else dict(out)
+        for attr in to_list(attrs):
+            shape, dtype = self._get_crop_shape(attr, length)
+            res = arrays.get(attr)
+            if res is None:
+                res = np.empty((len(starts),) + shape, dtype=dtype)
+                arrays[attr] = res
+            if attr == "logs":
+                logs = self.logs
+                index = logs.index.values
+                if np.any(np.diff(index) != self.logs_step):
+                    raise ValueError("logs must have a regular index with logs_step step")
+                values = logs.to_numpy(dtype=float)
+                # The first depth of a crop is the first logs depth not less than its start
+                first_rows = -((index[:1] - starts) // self.logs_step) if len(index) else np.zeros_like(starts)
+            else:
+                values = getattr(self, attr)
+                first_rows = np.array([self._cm_to_pixels(start - self.depth_from) for start in starts], dtype=np.int64)
+            rows = first_rows[:, None] + np.arange(shape[0])
+            in_bounds = (rows >= 0) & (rows < len(values))
+            # Rows are clipped explicitly, since `np.take` buffers `out` in the default "raise" mode
+            if len(values) > 0:
+                np.take(values, rows, axis=0, out=res, mode="clip")
+            if not in_bounds.all():
+                res[~in_bounds] = np.nan if dtype.kind == "f" else 0
+        return starts, arrays
+
+    def _get_crop_shape(self, attr, length):
+        """Get the shape and dtype of a window of an attribute for crops of
+        given `length`."""
+        if attr == "logs":
+            n_logs = len(self.logs.columns)
+            if length % self.logs_step:
+                raise ValueError("Crop length must be a multiple of logs_step")
+            return (length // self.logs_step, n_logs), np.dtype(float)
+        if attr in self._core_attrs:
+            img = getattr(self, attr)
+            if img is None:
+                raise FileNotFoundError("{} is not available for the segment".format(attr))
+            return (self._cm_to_pixels(length),) + img.shape[1:], img.dtype
+        raise ValueError("Only logs and core images can be cropped into arrays, got {}".format(attr))
 
     def crop(self, length, step, drop_last=False, fill_value=0):
         """Create crops from the segment. All cropped segments have the same
@@ -1695,11 +2700,9 @@ class WellSegment(AbstractWellSegment):
         """
         length = parse_depth(length, check_positive=True, var_name="length")
         step = parse_depth(step, check_positive=True, var_name="step")
-        n_crops, mod = divmod(self.length - length, step)
-        n_crops += 1  # The number of crops strictly within the segment
-        if not drop_last and mod and self._has_file("logs"):  # Pad logs by length
+        n_crops, pad = self._get_n_crops(length, step, drop_last)
+        if pad:  # Pad logs by length
             # TODO: pad core images if loaded
-            n_crops += 1  # Create an extra segment
             logs = self.logs  # Preload logs, since segment depths will be updated further
             self.actual_depth_to = self.depth_to
             self.depth_to += length
@@ -1711,6 +2714,164 @@ class WellSegment(AbstractWellSegment):
         crops = [self[start:start+length] for start in crops_starts]
         return crops
 
+    def _get_crop_bounds(self, method, *crop_args):
+        """Get tops and bottoms of segments, that `method` ("crop" or
+        "crop_at") would create with `crop_args`, without creating them."""
+        if method == "crop":
+            length, step, drop_last, _ = crop_args
+            length = parse_depth(length, check_positive=True, var_name="length")
+            step = parse_depth(step, check_positive=True, var_name="step")
+            n_crops, pad = self._get_n_crops(length, step, drop_last)
+            starts = self.depth_from + np.arange(n_crops) * step
+            # The last crop out of segment bounds is padded by extending the segment
+            depth_to = self.depth_to + length if pad else self.depth_to
+        elif method == "crop_at":
+            starts, length = crop_args
+            length = parse_depth(length, check_positive=True, var_name="length")
+            starts = np.asarray(starts, dtype=np.int64)
+            depth_to = self.depth_to
+        else:
+            raise ValueError("Unknown crop method {}".format(method))
+        # Crops are clipped by segment bounds in the same way as in __getitem__
+        return np.maximum(starts, self.depth_from), np.minimum(starts + length, depth_to)
+
+    def _get_n_crops(self, length, step, drop_last):
+        """Get the number of crops, created by `crop`, and whether the last
+        of them comes out of segment bounds and requires logs padding."""
+        n_crops, mod = divmod(self.length - length, step)
+        n_crops += 1  # The number of crops strictly within the segment
+        pad = not drop_last and mod and self._has_file("logs")
+        return n_crops + int(pad), pad
+
+    def crop_to_array(self, length, step, drop_last=False, fill_value=0, attrs="logs"):
+        """Get data of crops, that `crop` would create with the same
+        arguments, as arrays of windows without creating cropped segments.
+
+        Each array of windows is a read-only view of the segment data, created
+        with stride tricks, so that crops are neither copied nor sliced one by
+        one. The data is copied only if it has to be padded: if `logs` don't
+        cover the whole range of crops or the last crop comes out of segment
+        bounds.
+
+        Parameters
+        ----------
+        length : positive int or str
+            Length of each crop in centimeters. If `str`, must be specified in
+            a <value><units> format (e.g. "10m").
+        step : positive int or str
+            Step of cropping in centimeters.  If `str`, must be specified in a
+            <value><units> format (e.g. "10m").
+        drop_last : bool, optional
+            If `True`, only crops that lie within the segment will be kept.
+            If `False`, the first crop which comes out of segment bounds will
+            also be kept to cover the whole segment with crops. Defaults to
+            `False`.
+        fill_value : float, optional
+            Value to pad `logs` of the last crop out of segment bounds with.
+            Other depths, missing in `logs`, are filled with `numpy.nan`.
+            Defaults to 0.
+        attrs : str or list of str, optional
+            Attributes to crop: "logs" and core images with their masks.
+            `logs` must have a regular index with `logs_step` step. Defaults
+            to "logs".
+
+        Returns
+        -------
+        depth_from : 1-D ndarray
+            Start depths of crops.
+        arrays : dict
+            A mapping from an attribute name to an array of its windows with
+            shape `(n_crops, window, ...)`. A window of `logs` is a
+            `(length // logs_step, n_logs)` array.
+        """
+        length = parse_depth(length, check_positive=True, var_name="length")
+        step = parse_depth(step, check_positive=True, var_name="step")
+        n_crops, pad = self._get_n_crops(length, step, drop_last)
+        crops_starts = self.depth_from + np.arange(n_crops) * step
+        arrays = {}
+        for attr in to_list(attrs):
+            if attr == "logs":
+                arrays[attr] = self._crop_logs_to_array(length, step, n_crops, pad, fill_value)
+            elif attr in self._core_attrs:
+                arrays[attr] = self._crop_image_to_array(attr, length, step, n_crops)
+            else:
+                raise ValueError("Only logs and core images can be cropped into arrays, got {}".format(attr))
+        return crops_starts, arrays
+
+    def _get_crop_array(self, attr):
+        """Get `logs` of the segment, reindexed to a regular depth grid, or
+        its core image as an array, matching a window of `crop_to_array` or
+        `crop_at_to_array`."""
+        if attr == "logs":
+            logs = self.logs
+            # The grid is aligned with logs depths, which may be shifted from the start of a random crop
+            offset = (logs.index[0] - self.depth_from) % self.logs_step if len(logs) else 0
+            n_rows = (self.depth_to - self.depth_from) // self.logs_step
+            index = pd.Index(self.depth_from + offset + np.arange(n_rows) * self.logs_step, name="DEPTH")
+            return logs.reindex(index=index).to_numpy(dtype=float)
+        if attr in self._core_attrs:
+            return getattr(self, attr)
+        raise ValueError("Only logs and core images can be cropped into arrays, got {}".format(attr))
+
+    @staticmethod
+    def _get_windows(arr, window, step, n_windows):
+        """Create a read-only view of `n_windows` windows of `window` rows of
+        an array, taken with `step` rows."""
+        shape = (n_windows, window) + arr.shape[1:]
+        strides = (step * arr.strides[0],) + arr.strides
+        return np.lib.stride_tricks.as_strided(arr, shape=shape, strides=strides, writeable=False)
+
+    def _crop_logs_to_array(self, length, step, n_crops, pad, fill_value):
+        """Create an array of windows of `logs` for `crop_to_array`. If `pad`
+        is `True`, depths after the end of `logs` are filled with
+        `fill_value` the same way as `crop` pads them."""
+        logs = self.logs
+        if length % self.logs_step or step % self.logs_step:
+            raise ValueError("Crop length and step must be multiples of logs_step")
+        window = length // self.logs_step
+        step_rows = step // self.logs_step
+        n_rows = (n_crops - 1) * step_rows + window
+        depths = self.depth_from + np.arange(n_rows) * self.logs_step
+
+        index = logs.index.values
+        if np.any(np.diff(index) != self.logs_step) or np.any((index[:1] - self.depth_from) % self.logs_step):
+            raise ValueError("logs must have a regular index with logs_step step, aligned with depth_from")
+        values = logs.to_numpy(dtype=float)
+        positions = (index - self.depth_from) // self.logs_step
+        if len(index) > 0 and positions[0] <= 0 and positions[-1] >= n_rows - 1:
+            # Logs cover all the crops and their windows are views of logs data
+            values = values[-positions[0]:n_rows-positions[0]]
+        else:
+            padded = np.full((n_rows, values.shape[1]), np.nan)
+            if pad and len(index) > 0:
+                padded[depths > index[-1]] = fill_value
+            in_grid = (positions >= 0) & (positions < n_rows)
+            padded[positions[in_grid]] = values[in_grid]
+            values = padded
+        return self._get_windows(values, window, step_rows, n_crops)
+
+    def _crop_image_to_array(self, attr, length, step, n_crops):
+        """Create an array of windows of a core image or its mask for
+        `crop_to_array`."""
+        img = getattr(self, attr)
+        if img is None:
+            raise FileNotFoundError("{} is not available for the segment".format(attr))
+        step_pixels = step * self.pixels_per_cm
+        if not float(step_pixels).is_integer():
+            raise ValueError("Crop step must correspond to an integer number of pixels")
+        step_pixels = int(step_pixels)
+        window = self._cm_to_pixels(length)
+        n_rows = (n_crops - 1) * step_pixels + window
+        if len(img) < n_rows:
+            if img.dtype == bool:
+                fill_value = False
+            else:
+                fill_value = np.nan if img.dtype.kind == "f" else 0
+            padded = np.full((n_rows,) + img.shape[1:], fill_value, dtype=img.dtype)
+            padded[:len(img)] = img
+            img = padded
+        return self._get_windows(img, window, step_pixels, n_crops)
+
     def create_mask(self, attr, src, mode="logs", dst="mask", mapping=None, default=np.nan, drop=None, limit=None):
         """Create a mask by column of `WellSegment` attribute, using logs or
         core data as a depth indexer.
@@ -1728,6 +2889,8 @@ class WellSegment(AbstractWellSegment):
             If 'core' then depths correspond to `core_dl` and mask is saved to
             `core_masks` attribute. Note that the last one is not working with
             well slicing and therefore not affected by `crop`, `aggregate` etc.
+            If core images are loaded in "uint8" `core_dtype`, mask positions
+            of rows, not covered by any core image, are filled with `default`.
             Defaults to 'logs'.
         dst : str
             Where to save the mask to. If `mode` is 'logs' then assign resulted
@@ -1788,6 +2951,14 @@ class WellSegment(AbstractWellSegment):
             limit = limit // self.logs_step if mode == 'logs' else limit * self.pixels_per_cm
             mask = pd.Series(mask).fillna(method='ffill', limit=limit).fillna(method='bfill', limit=limit).values
 
+        if mode == 'core':
+            core_masks = [mask for mask in (self._core_dl_mask, self._core_uv_mask) if mask is not None]
+            if core_masks:
+                coverage = np.logical_or.reduce(core_masks)
+                if len(coverage) == len(mask):
+                    mask[~coverage] = default
+
+        self._detach(dst_attr)
         getattr(self, dst_attr)[dst] = mask
         return self
 
@@ -1989,22 +3160,25 @@ class WellSegment(AbstractWellSegment):
             If called for a `WellSegment`, returns a list of segments without
             `nan` values. Otherwise, return `self` with dropped `nan` values.
         """
-        mnemonics = self.logs.columns if mnemonics is None else mnemonics
+        logs = self.logs
         if isinstance(mnemonics, int):
-            not_nan_mask = (~np.isnan(self.logs)).sum(axis=1) >= mnemonics
+            not_nan_mask = (~np.isnan(logs.to_numpy(dtype=float))).sum(axis=1) >= mnemonics
         else:
-            not_nan_mask = np.all(~np.isnan(self.logs[to_list(mnemonics)]), axis=1)
-
-        if not not_nan_mask.any():
+            logs = logs if mnemonics is None else logs[to_list(mnemonics)]
+            not_nan_mask = (~np.isnan(logs.to_numpy(dtype=float))).all(axis=1)
+
+        # Run-length encode the mask: runs of not nan rows start after rising and end at falling edges
+        edges = np.diff(np.concatenate([[0], not_nan_mask.view(np.int8), [0]]))
+        run_starts = np.flatnonzero(edges == 1)
+        run_ends = np.flatnonzero(edges == -1)
+        if len(run_starts) == 0:
             return []
 
-        borders = not_nan_mask[not_nan_mask ^ not_nan_mask.shift(1)].index.tolist()
-        # If last mask element is True (segment ends with not nan value in logs) then the xor trick above misses
-        # the last slicing border and therefore None should be added so the last slice could be done as `self[a:None]`
-        if not_nan_mask.iloc[-1]:
-            borders.append(None)
-        borders = zip(borders[0::2], borders[1::2])
-        return [self[a:b] for a, b in borders]
+        # A segment ends at the first nan row after its run or at the bottom of the well for the last run
+        depth = np.append(logs.index.values, self.depth_to)
+        depth_from = np.maximum(depth[run_starts], self.depth_from).tolist()
+        depth_to = np.minimum(depth[run_ends], self.depth_to).tolist()
+        return self._slice_segments(depth_from, depth_to)
 
     @process_columns
     def norm_mean_std(self, df, mean=None, std=None, eps=1e-10):
@@ -2079,6 +3253,11 @@ class WellSegment(AbstractWellSegment):
     def equalize_histogram(self, src=None, dst=None, channels='last'):
         """Normalize core images by histogram equalization.
 
+        If core images are stored in "uint8" `core_dtype`, only rows, covered
+        by core samples, are used to calculate the histogram and are
+        normalized. Other rows stay zero. This requires `channels` to be
+        'last'.
+
         Parameters
         ----------
         src : None, str or iterable
@@ -2105,18 +3284,35 @@ class WellSegment(AbstractWellSegment):
             dst = to_list(dst)
         for _src, _dst in zip(src, dst):
             img = getattr(self, _src)
-            if img.ndim == 3:
-                img = cv2.cvtColor(img.astype('uint8'), cv2.COLOR_RGB2YCrCb)
-                _slice = [slice(None)] * 3
-                axis = -1 if channels == 'last' else 0
-                _slice[axis] = 0
-                img[_slice] = cv2.equalizeHist(img[_slice])
-                img = cv2.cvtColor(img, cv2.COLOR_YCrCb2RGB)
+            mask = getattr(self, _src + "_mask", None)
+            if mask is not None and channels == 'last':
+                res = np.zeros_like(img)
+                res[mask] = self._equalize_histogram(img[mask], channels)
             else:
-                img = cv2.equalizeHist(img)
-            setattr(self, _dst, img)
+                res = self._equalize_histogram(img, channels)
+            setattr(self, _dst, res)
+            if _dst in ['_core_dl', '_core_uv']:
+                setattr(self, _dst + "_mask", mask)
         return self
 
+    @staticmethod
+    def _equalize_histogram(img, channels):
+        """Normalize an image by histogram equalization."""
+        import cv2  # pylint: disable=import-outside-toplevel
+
+        if len(img) == 0:
+            return img.astype('uint8')
+        if img.ndim == 3:
+            img = cv2.cvtColor(img.astype('uint8'), cv2.COLOR_RGB2YCrCb)
+            _slice = [slice(None)] * 3
+            axis = -1 if channels == 'last' else 0
+            _slice[axis] = 0
+            img[tuple(_slice)] = cv2.equalizeHist(img[tuple(_slice)])
+            img = cv2.cvtColor(img, cv2.COLOR_YCrCb2RGB)
+        else:
+            img = cv2.equalizeHist(img)
+        return img
+
     def random_shift_logs(self, max_shift, mnemonics=None):
         """Shift `logs` attr columns by a step sampled from discrete uniform
         distribution in [-`max_period`, `max_period`]. Resulted empty positions
@@ -2135,6 +3331,7 @@ class WellSegment(AbstractWellSegment):
         self : type(self)
             Self with randomly shifted `logs` columns.
         """
+        self._detach("logs")
         df = self.logs
         mnemonics = df.columns if mnemonics is None else to_list(mnemonics)
         max_shift = parse_depth(max_shift, check_positive=True, var_name="max_shift") // self.logs_step
@@ -0,0 +1,25 @@
+"""Common fixtures of the tests."""
+
+import os
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def well_path(tmp_path):
+    """A directory of a well with logs every 10 cm from 0 to 100 m, some of
+    which are `nan`, and two layers."""
+    path = str(tmp_path / "well")
+    os.makedirs(path)
+    with open(os.path.join(path, "meta.json"), "w") as meta_file:
+        json.dump({"name": "well", "field": "field", "depth_from": 0, "depth_to": 10000}, meta_file)
+    rng = np.random.default_rng(42)
+    logs = pd.DataFrame({"DEPTH": np.arange(0, 10000, 10), "GR": rng.random(1000), "PS": rng.random(1000)})
+    logs.loc[100:149, "GR"] = np.nan
+    logs.to_csv(os.path.join(path, "logs.csv"), index=False)
+    layers = pd.DataFrame({"DEPTH_FROM": [0, 5000], "DEPTH_TO": [5000, 10000], "LAYER": ["a", "b"]})
+    layers.to_csv(os.path.join(path, "layers.csv"), index=False)
+    return path
@@ -0,0 +1,40 @@
+"""Check that tables, written by `write_arrow`, are read through a memory
+map without copying."""
+
+import numpy as np
+import pandas as pd
+
+from petroflow.src.arrow_io import CHUNK_SIZE, read_arrow, write_arrow
+
+
+def overwrite_values(path, values):
+    """Overwrite the bytes of `values` in a file at `path` with zeros in
+    place."""
+    with open(path, "r+b") as file:
+        offset = file.read().find(values.tobytes())
+        assert offset >= 0
+        file.seek(offset)
+        file.write(bytes(values.nbytes))
+
+
+def test_read_arrow_is_memory_mapped(tmp_path):
+    """Check, that columns of a table with several depth chunks are backed
+    by the memory map of its file, whether it is read whole or by a depth
+    range."""
+    n_rows = 3 * CHUNK_SIZE + 100
+    logs = pd.DataFrame({"DEPTH": np.arange(n_rows) * 10, "GR": np.random.rand(n_rows)})
+    path = str(tmp_path / "logs.arrow")
+    write_arrow(logs, path)
+
+    df = read_arrow(path)
+    pd.testing.assert_frame_equal(df, logs)
+    depth_from, depth_to = CHUNK_SIZE * 10 + 500, 2 * CHUNK_SIZE * 10 + 500
+    depth_df = read_arrow(path, columns=["GR"], depth_range=(depth_from, depth_to))
+    assert list(depth_df.columns) == ["GR"]
+    assert len(depth_df) == 2 * CHUNK_SIZE
+    np.testing.assert_array_equal(depth_df["GR"].values, logs["GR"].values[CHUNK_SIZE:3*CHUNK_SIZE])
+    assert len(read_arrow(path, depth_range=(-100, -10))) == 0
+
+    overwrite_values(path, logs["GR"].values)
+    assert (df["GR"] == 0).all()
+    assert (depth_df["GR"] == 0).all()
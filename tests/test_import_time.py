@@ -0,0 +1,74 @@
+"""Check that importing well segments doesn't load heavy optional
+dependencies and stays fast. Import times are measured by `python -X
+importtime` in a fresh interpreter.
+
+Importing any module of the package first imports `petroflow` with
+`batchflow` and all of `petroflow.src`, which load some of these
+dependencies anyway. So only modules, first imported by
+`petroflow.src.well_segment`, which is the first one to load well data
+modules, are checked."""
+
+import sys
+import subprocess
+
+
+# A module, whose imports are checked
+MODULE = "petroflow.src.well_segment"
+
+# Modules, that are imported by all wells anyway, so their import time is not counted
+PRELOADED_MODULES = ("numpy", "numba", "pandas")
+
+# Packages, that must be imported only on first use
+LAZY_PACKAGES = ("pyarrow", "blosc", "PIL", "cv2", "plotly", "sklearn", "lasio", "pint", "scipy")
+
+# A module, whose import time is used as a reference, since absolute times depend on a machine
+REFERENCE_MODULE = "pandas"
+
+
+def get_import_rows(modules):
+    """Import `modules` in a fresh interpreter and return a list of tuples
+    with the nesting depth, cumulative import time in microseconds and the
+    name of each imported module in the order of `-X importtime` output."""
+    code = "; ".join("import {}".format(module) for module in modules)
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                            check=True).stderr
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, int(cumulative), name.strip()))
+    return rows
+
+
+def get_import_tree(rows, module):
+    """Get cumulative import time of `module` in seconds and names of all
+    modules, first imported by it, from `rows` of `get_import_rows`."""
+    # Modules are listed in post-order: each one goes after all its imports, which are nested deeper
+    pos = max(i for i, (_, _, name) in enumerate(rows) if name == module)
+    module_depth, module_time, _ = rows[pos]
+    imported = []
+    for depth, _, name in reversed(rows[:pos]):
+        if depth <= module_depth:
+            break
+        imported.append(name)
+    return module_time / 1e6, imported
+
+
+def test_lazy_imports():
+    """Check, that heavy optional dependencies are not imported with well
+    segments."""
+    _, imported = get_import_tree(get_import_rows(PRELOADED_MODULES + (MODULE,)), MODULE)
+    eager = sorted({name for name in imported if name.split(".")[0] in LAZY_PACKAGES})
+    assert not eager, "Packages {} must be imported lazily".format(eager)
+
+
+def test_import_time():
+    """Check, that well segments are imported faster than the reference
+    module."""
+    rows = get_import_rows(PRELOADED_MODULES + (MODULE,))
+    import_time, _ = get_import_tree(rows, MODULE)
+    reference_time, _ = get_import_tree(rows, REFERENCE_MODULE)
+    msg = "Import of well segments takes {:.2f} s, {} takes {:.2f} s"
+    assert import_time < reference_time, msg.format(import_time, REFERENCE_MODULE, reference_time)
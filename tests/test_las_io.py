@@ -0,0 +1,73 @@
+"""Check that the fast `.las` reader and the `lasio` fallback load identical
+frames."""
+# pylint: disable=redefined-outer-name
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from petroflow.src.las_io import read_las
+from petroflow.src.well_segment import WellSegment
+
+
+HEADER = """~VERSION INFORMATION
+ VERS.                 2.0 : CWLS LOG ASCII STANDARD - VERSION 2.0
+ WRAP.                  NO : ONE LINE PER DEPTH STEP
+~WELL INFORMATION
+ STRT.M            {start} : START DEPTH
+ STOP.M             {stop} : STOP DEPTH
+ STEP.M             {step} : STEP
+ NULL.             -999.25 : NULL VALUE
+ WELL.                  W1 : WELL
+~CURVE INFORMATION
+{curves}
+~PARAMETER INFORMATION
+ BHT .DEGC          35.5 : BOTTOM HOLE TEMPERATURE
+~ASCII
+"""
+
+
+def write_las(path, mnemonics, data, step=0.1):
+    """Write a LAS 2.0 file with given curve `mnemonics` and `data`."""
+    curves = "\n".join(" {}.UNIT : CURVE {}".format(mnemonic, i) for i, mnemonic in enumerate(mnemonics))
+    header = HEADER.format(start=data[0, 0], stop=data[-1, 0], step=step, curves=curves)
+    with open(path, "w") as las_file:
+        las_file.write(header)
+        np.savetxt(las_file, data, fmt="%.4f")
+
+
+@pytest.fixture
+def las_data():
+    """Depth in meters and 5 random curves with some `NULL` values."""
+    rng = np.random.default_rng(42)
+    depth = np.round(1000 + 0.1 * np.arange(500), 1)
+    curves = np.round(rng.normal(size=(500, 5)) * 100, 4)
+    curves[rng.random(curves.shape) < 0.1] = -999.25
+    return np.column_stack([depth, curves])
+
+
+def test_read_las_matches_lasio(tmp_path, las_data):
+    """Check, that a supported file is read identically by both readers."""
+    path = str(tmp_path / "logs.las")
+    mnemonics = ["DEPT", "GR", "PS", "DT", "RHOB", "NPHI"]
+    write_las(path, mnemonics, las_data)
+
+    fast_df = read_las(path)
+    # Any loader argument makes the segment read the file with lasio
+    lasio_df = WellSegment._load_las(path, null_policy="strict")  # pylint: disable=protected-access
+    pd.testing.assert_frame_equal(fast_df, lasio_df)
+    pd.testing.assert_frame_equal(WellSegment._load_las(path), lasio_df)  # pylint: disable=protected-access
+    assert list(fast_df.columns) == ["DEPTH", "GR", "PS", "DT", "RHOB", "NPHI"]
+    assert fast_df.isna().any().any()
+
+
+def test_unsupported_las_falls_back_to_lasio(tmp_path, las_data):
+    """Check, that a file with duplicate mnemonics is read by `lasio`."""
+    path = str(tmp_path / "logs.las")
+    write_las(path, ["DEPT", "GR", "GR", "DT", "RHOB", "NPHI"], las_data)
+
+    with pytest.raises(ValueError):
+        read_las(path)
+    df = WellSegment._load_las(path)  # pylint: disable=protected-access
+    lasio_df = WellSegment._load_las(path, null_policy="strict")  # pylint: disable=protected-access
+    pd.testing.assert_frame_equal(df, lasio_df)
@@ -0,0 +1,32 @@
+"""Check reading of chunked tables of packed well files."""
+
+import numpy as np
+import pandas as pd
+
+from petroflow.src import packed_io
+from petroflow.src.packed_io import PackedWell, write_packed
+
+
+def test_read_table_by_depth_range(tmp_path, monkeypatch):
+    """Check, that only blocks, overlapping with a depth range, are read."""
+    monkeypatch.setattr(packed_io, "TABLE_CHUNK_ROWS", 100)
+    logs = pd.DataFrame({"DEPTH": np.arange(0, 10000, 10), "GR": np.random.rand(1000)})
+    layers = pd.DataFrame({"DEPTH_FROM": [0, 5000], "DEPTH_TO": [5000, 10000], "LAYER": ["a", "b"]})
+    path = str(tmp_path / "well.pfw")
+    write_packed(path, {"name": "well"}, {"logs": logs, "layers": layers, "empty": logs.iloc[:0]})
+    packed = PackedWell(path)
+
+    pd.testing.assert_frame_equal(packed.read_table("logs"), logs)
+    pd.testing.assert_frame_equal(packed.read_table("layers"), layers)
+    assert len(packed.read_table("empty")) == 0
+
+    read_blocks = []
+    read_block = packed._read_block  # pylint: disable=protected-access
+    monkeypatch.setattr(packed, "_read_block", lambda block: read_blocks.append(block) or read_block(block))
+    df = packed.read_table("logs", columns=["DEPTH"], depth_range=(2500, 3500))
+    assert len(read_blocks) == 2
+    assert list(df.columns) == ["DEPTH"]
+    assert df["DEPTH"].min() <= 2500 and df["DEPTH"].max() >= 3500
+
+    df = packed.read_table("logs", depth_range=(20000, 30000))
+    assert len(df) == 0 and list(df.columns) == ["DEPTH", "GR"]
@@ -0,0 +1,36 @@
+"""Check that well data in shared memory is loaded without copying."""
+# pylint: disable=redefined-outer-name
+
+import os
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from petroflow.src.arrow_io import CHUNK_SIZE
+from petroflow.src.well import Well
+
+
+@pytest.fixture
+def long_well_path(tmp_path):
+    """A directory of a well with logs, longer than a depth chunk of an
+    Arrow table."""
+    path = str(tmp_path / "well")
+    os.makedirs(path)
+    n_rows = 2 * CHUNK_SIZE
+    with open(os.path.join(path, "meta.json"), "w") as meta_file:
+        json.dump({"name": "well", "field": "field", "depth_from": 0, "depth_to": n_rows * 10}, meta_file)
+    logs = pd.DataFrame({"DEPTH": np.arange(n_rows) * 10, "GR": np.random.rand(n_rows)})
+    logs.to_csv(os.path.join(path, "logs.csv"), index=False)
+    return path
+
+
+def test_shared_logs_are_not_copied(long_well_path):
+    """Check, that logs of different wells, loaded from the same shared
+    memory block, share memory."""
+    logs = Well(long_well_path, shared_cache=True).iter_level()[0].logs
+    other_logs = Well(long_well_path, shared_cache=True).iter_level()[0].logs
+    pd.testing.assert_frame_equal(logs, other_logs)
+    assert len(logs) == 2 * CHUNK_SIZE
+    assert np.shares_memory(logs["GR"].values, other_logs["GR"].values)
@@ -0,0 +1,285 @@
+"""Check, that well copies, crops and aggregation don't change the original
+well and give the same results regardless of lazy evaluation."""
+# pylint: disable=redefined-outer-name
+
+import gc
+import weakref
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from petroflow.src.well import Well
+
+
+def test_aggregated_attributes_are_copies(well_path):
+    """Check, that inplace changes of aggregated attributes and of the
+    aggregated segment don't affect the well."""
+    well = Well(well_path)
+    logs = well.logs
+    expected = logs.copy()
+    logs["GR"] *= 0
+    pd.testing.assert_frame_equal(well.logs, expected)
+
+    segment = well.aggregated_segment
+    segment.logs["PS"] *= 0
+    pd.testing.assert_frame_equal(well.logs, expected)
+
+
+def test_deepcopy_doesnt_share_data(well_path):
+    """Check, that a deep copy doesn't share loaded tables with the well."""
+    well = Well(well_path)
+    logs = well.iter_level()[0].logs
+    copy = well.deepcopy()
+    copy_logs = copy.iter_level()[0].logs
+    assert not np.shares_memory(logs["GR"].values, copy_logs["GR"].values)
+    copy_logs["GR"] *= 0
+    assert (well.iter_level()[0].logs["GR"].dropna() > 0).all()
+
+
+@pytest.mark.parametrize("share_data", [False, True])
+@pytest.mark.parametrize("action, kwargs", [
+    ("rename_logs", {"rename_dict": {"GR": "GR_NEW"}}),
+    ("norm_mean_std", {"src": "GR"}),
+    ("norm_min_max", {"src": "PS"}),
+    ("drop_logs", {"mnemonics": "PS"}),
+])
+def test_actions_on_copies_dont_change_well(well_path, share_data, action, kwargs):
+    """Check, that actions, applied to deep copies and slices of a well,
+    don't change the well."""
+    well = Well(well_path)
+    segment = well.iter_level()[0]
+    expected_logs = segment.logs.copy()
+    expected_layers = segment.layers.copy()
+
+    getattr(well.deepcopy(share_data=share_data), action)(**kwargs)
+    getattr(well[2000:3000], action)(**kwargs)
+    getattr(well.deepcopy(share_data=share_data)[2000:3000], action)(**kwargs)
+
+    pd.testing.assert_frame_equal(segment.logs, expected_logs)
+    pd.testing.assert_frame_equal(segment.layers, expected_layers)
+
+
+def test_deepcopy_shares_data_on_request(well_path):
+    """Check, that a deep copy with `share_data` shares loaded tables with
+    the well until they are changed."""
+    well = Well(well_path)
+    logs = well.iter_level()[0].logs
+    copy = well.deepcopy(share_data=True)
+    assert copy.iter_level()[0].logs is logs
+    copy.norm_mean_std(src="GR")
+    assert copy.iter_level()[0].logs is not logs
+
+
+def test_empty_well_depth_range():
+    """Check, that depth range of a well without segments can't be taken."""
+    well = Well(segments=[Well(segments=[])])
+    with pytest.raises(ValueError):
+        _ = well.depth_from
+    with pytest.raises(ValueError):
+        _ = well.depth_to
+
+
+def assert_lazy_crops(well):
+    """Check, that segments at the last level of a well are not created."""
+    assert all(subwell._lazy_crop is not None for subwell in well.iter_level(-2))  # pylint: disable=protected-access
+
+
+@pytest.mark.parametrize("drop_last, fill_value", [(False, 0), (False, -1), (True, 0)])
+def test_lazy_crop_matches_materialized(well_path, drop_last, fill_value):
+    """Check, that lazy and materialized regular crops have the same bounds
+    and data, including logs padding by `fill_value`."""
+    lazy_well = Well(well_path).crop(700, 400, drop_last=drop_last, fill_value=fill_value, lazy=True)
+    well = Well(well_path).crop(700, 400, drop_last=drop_last, fill_value=fill_value)
+
+    assert (lazy_well.depth_from, lazy_well.depth_to) == (well.depth_from, well.depth_to)
+    assert lazy_well.n_segments == well.n_segments
+    assert_lazy_crops(lazy_well)
+
+    lazy_starts, lazy_arrays = lazy_well.crop_to_array()
+    starts, arrays = well.crop_to_array()
+    np.testing.assert_array_equal(lazy_starts, starts)
+    np.testing.assert_array_equal(lazy_arrays["logs"], arrays["logs"])
+    if not drop_last:
+        assert (arrays["logs"][-1, -1] == fill_value).all()
+
+    _ = lazy_well.segments[0].segments
+    lazy_starts, lazy_arrays = lazy_well.crop_to_array()
+    np.testing.assert_array_equal(lazy_arrays["logs"], arrays["logs"])
+
+
+def test_lazy_random_crop_matches_materialized(well_path):
+    """Check, that lazy and materialized random crops with the same seed
+    have the same bounds and data."""
+    np.random.seed(42)
+    lazy_well = Well(well_path).drop_nans().random_crop(500, n_crops=20, lazy=True)
+    np.random.seed(42)
+    well = Well(well_path).drop_nans().random_crop(500, n_crops=20)
+
+    assert (lazy_well.depth_from, lazy_well.depth_to) == (well.depth_from, well.depth_to)
+    assert lazy_well.n_segments == well.n_segments == 20
+    assert_lazy_crops(lazy_well)
+
+    lazy_starts, lazy_arrays = lazy_well.crop_to_array()
+    starts, arrays = well.crop_to_array()
+    np.testing.assert_array_equal(lazy_starts, starts)
+    np.testing.assert_array_equal(lazy_arrays["logs"], arrays["logs"])
+
+    np.random.seed(0)
+    lazy_well.random_crop(100, n_crops=5, lazy=True)
+    np.random.seed(0)
+    well.random_crop(100, n_crops=5, lazy=True)
+    np.testing.assert_array_equal(lazy_well.crop_to_array()[1]["logs"], well.crop_to_array()[1]["logs"])
+
+
+def set_core_images(well, seed=42):
+    """Set random core images with `nan` values and random uint8 images with
+    masks for all segments at the last level of a well."""
+    rng = np.random.default_rng(seed)
+    for segment in well.iter_level():
+        n_rows = segment._cm_to_pixels(segment.length)  # pylint: disable=protected-access
+        core_dl = rng.random((n_rows, 4, 3)).astype(np.float32)
+        core_dl[rng.random(core_dl.shape) < 0.3] = np.nan
+        segment._core_dl = core_dl  # pylint: disable=protected-access
+        segment._core_uv = (rng.random((n_rows, 4, 3)) * 255).astype(np.uint8)  # pylint: disable=protected-access
+        segment._core_uv_mask = rng.random(n_rows) < 0.7  # pylint: disable=protected-access
+
+
+@pytest.mark.parametrize("func, weights", [("mean", None), ("mean", np.hanning), ("max", None), ("min", None)])
+def test_aggregate_images_by_chunks(well_path, func, weights):
+    """Check, that image aggregation doesn't depend on the chunk size."""
+    well = Well(well_path).crop(700, 400, drop_last=True)
+    set_core_images(well)
+    res = [well.deepcopy().aggregate(func, weights=weights, chunk_size=chunk_size).segments[0]
+           for chunk_size in (1024, 7)]
+    for attr in ("core_dl", "core_uv", "core_uv_mask"):
+        np.testing.assert_array_equal(getattr(res[0], "_" + attr), getattr(res[1], "_" + attr))
+
+
+def test_aggregate_weights(well_path):
+    """Check, that weights can't be used with max and min aggregations and
+    that they are reported to be ignored for logs."""
+    well = Well(well_path)
+    _ = well.iter_level()[0].logs
+    well.crop(700, 400, drop_last=True)
+    with pytest.raises(ValueError):
+        well.deepcopy().aggregate("max", weights=np.hanning)
+    with pytest.warns(UserWarning):
+        well.deepcopy().aggregate("mean", weights=np.hanning)
+
+
+def aggregate_logs_by_pandas(well, func):
+    """Aggregate `logs` of all segments of a well by their concatenation
+    and grouping by depth."""
+    logs = pd.concat([segment.logs for segment in well.iter_level()]).groupby(level=0).agg(func)
+    step = well.iter_level()[0].logs_step
+    index = pd.RangeIndex(logs.index[0], logs.index[-1] + step, step, name="DEPTH")
+    return logs.reindex(index=index)
+
+
+@pytest.mark.parametrize("func", ["mean", "max", "min", "sum"])
+@pytest.mark.parametrize("length, step", [(700, 400), (300, 400)])
+def test_aggregate_logs_matches_pandas(well_path, func, length, step):
+    """Check, that logs, aggregated on a regular grid, match `pandas`
+    aggregation for overlapping and gapped crops with `nan` rows."""
+    well = Well(well_path)
+    well.iter_level()[0].logs.loc[5000:5200] = np.nan
+    well.crop(length, step, drop_last=True)
+    assert any(segment.logs.isna().all(axis=1).any() for segment in well.iter_level())
+    expected = aggregate_logs_by_pandas(well, func)
+
+    logs = well.iter_level(-2)[0]._aggregate_logs(func)  # pylint: disable=protected-access
+    assert logs is not None
+    pd.testing.assert_frame_equal(logs, expected)
+    res = well.deepcopy().aggregate(func).iter_level()[0].logs
+    pd.testing.assert_frame_equal(res, expected)
+
+
+@pytest.mark.parametrize("func", ["mean", "max", "min", "sum"])
+def test_aggregate_misaligned_logs_by_pandas(well_path, func):
+    """Check, that logs with depths, not aligned with a common grid, are
+    aggregated by `pandas`."""
+    well = Well(well_path)
+    _ = well.iter_level()[0].logs
+    well.crop(700, 400, drop_last=True)
+    segment = well.iter_level()[1]
+    segment.logs.index = segment.logs.index + 5
+    expected = aggregate_logs_by_pandas(well, func)
+
+    assert well.iter_level(-2)[0]._aggregate_logs(func) is None  # pylint: disable=protected-access
+    res = well.deepcopy().aggregate(func).iter_level()[0].logs
+    pd.testing.assert_frame_equal(res, expected)
+
+
+def test_crop_at_to_array_matches_crop_at(well_path):
+    """Check, that windows of crops at random depths with a fixed seed match
+    `logs` of segments, created by `crop_at`, including depths out of
+    `logs`."""
+    segment = Well(well_path).iter_level()[0]
+    starts = np.random.default_rng(42).integers(-100, 9800, size=50) // 10 * 10
+    depth_from, arrays = segment.crop_at_to_array(starts, 500)
+    np.testing.assert_array_equal(depth_from, starts)
+
+    expected = np.stack([crop.logs.reindex(np.arange(start, start + 500, crop.logs_step)).values
+                         for start, crop in zip(starts, segment.crop_at(starts, 500))])
+    np.testing.assert_array_equal(arrays["logs"], expected)
+
+    out = {"logs": np.empty_like(expected)}
+    segment.crop_at_to_array(starts, 500, out=out)
+    np.testing.assert_array_equal(out["logs"], expected)
+
+
+def test_aggregated_cache_doesnt_keep_data(well_path):
+    """Check, that the cached aggregated segment doesn't keep replaced
+    tables of segments and aggregated images in memory."""
+    well = Well(well_path)
+    logs_ref = weakref.ref(well.iter_level()[0].logs)
+    expected = well.logs
+    well.crop(700, 400, drop_last=True)
+    gc.collect()
+    assert logs_ref() is None
+
+    set_core_images(well)
+    assert well.core_dl is not None
+    pd.testing.assert_frame_equal(well.logs, expected.loc[:well.depth_to - 1])
+    segment = well._aggregated_cache[-1]  # pylint: disable=protected-access
+    assert segment._core_dl is None  # pylint: disable=protected-access
+
+
+def drop_nans_by_slices(segment, not_nan_mask):
+    """Slice a segment into runs of rows of `not_nan_mask` one by one. The
+    last run ends at the bottom of the segment."""
+    depth = list(segment.logs.index) + [segment.depth_to]
+    bounds = []
+    run_start = None
+    for i, is_not_nan in enumerate(list(not_nan_mask) + [False]):
+        if is_not_nan and run_start is None:
+            run_start = depth[i]
+        elif not is_not_nan and run_start is not None:
+            bounds.append((max(run_start, segment.depth_from), min(depth[i], segment.depth_to)))
+            run_start = None
+    return [segment[depth_from:depth_to] for depth_from, depth_to in bounds]
+
+
+@pytest.mark.parametrize("mnemonics", [None, ["PS"], ["GR", "PS"], 1, 2])
+def test_drop_nans_matches_slices(well_path, mnemonics):
+    """Check, that segments, created by `drop_nans`, match slices of runs of
+    rows without `nan` values."""
+    segment = Well(well_path).iter_level()[0]
+    logs = segment.logs
+    logs.iloc[300:310, 1] = np.nan
+    logs.iloc[500, 0] = np.nan
+    logs.iloc[700:705] = np.nan
+    if isinstance(mnemonics, int):
+        not_nan_mask = logs.notna().sum(axis=1) >= mnemonics
+    else:
+        not_nan_mask = logs[mnemonics or logs.columns].notna().all(axis=1)
+
+    segments = segment.drop_nans(mnemonics=mnemonics)
+    expected = drop_nans_by_slices(segment, not_nan_mask)
+    assert len(segments) == len(expected) > 1
+    assert segments[-1].depth_to == segment.depth_to
+    for res, exp in zip(segments, expected):
+        assert (res.depth_from, res.depth_to) == (exp.depth_from, exp.depth_to)
+        pd.testing.assert_frame_equal(res.logs, exp.logs)
+        pd.testing.assert_frame_equal(res.layers, exp.layers)